@@ -0,0 +1,314 @@
+import json
+from dataclasses import asdict
+from pathlib import Path
+from typing import Annotated
+import typer
+from benchmarks.cases import BenchmarkCase, run_case, run_case_in_subprocess
+from benchmarks.fake_github import (
+    DEFAULT_PAGE_SIZE,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_RATE_LIMIT_WINDOW,
+    FakeGitHubAPI,
+    FakeGitHubConfig,
+)
+from benchmarks.results import (
+    DEFAULT_REGRESSION_THRESHOLD,
+    DEFAULT_RESULTS_PATH,
+    append_records,
+    compare_records,
+    current_commit,
+    load_records,
+    make_record,
+    recorded_commits,
+)
+from orgwarden import typer_print_functions as tpf
+
+app = typer.Typer(rich_markup_mode="markdown")
+
+DEFAULT_FETCH_SIZES = [100, 1000, 10000, 50000]
+DEFAULT_STREAM_SIZES = [1000, 10000, 50000]
+DEFAULT_AUDIT_SIZES = [100, 1000]
+DEFAULT_BACKENDS = ["rest", "graphql"]
+DEFAULT_ENGINES = ["subprocess", "asyncio"]
+
+ResultsOption = Annotated[
+    Path,
+    typer.Option(
+        "--results",
+        help="JSON Lines file that benchmark results are appended to and compared from.",
+    ),
+]
+
+
+def format_metric(value: float | None, unit: str = "") -> str:
+    return "-" if value is None else f"{value:,.2f}{unit}"
+
+
+@app.command()
+def run(
+    fetch_sizes: Annotated[
+        list[int] | None,
+        typer.Option(
+            "--fetch-repos",
+            min=1,
+            help="Organization sizes to benchmark `fetch_org_repos` against. Can be provided multiple times. "
+            "Defaults to 100, 1000, 10000 and 50000.",
+            show_default=False,
+        ),
+    ] = None,
+    stream_sizes: Annotated[
+        list[int] | None,
+        typer.Option(
+            "--stream-repos",
+            min=1,
+            help="Organization sizes to benchmark iterating over `iter_org_repos` without keeping the repositories. "
+            "Its peak memory should not grow with the organization's size. Can be provided multiple times. "
+            "Defaults to 1000, 10000 and 50000.",
+            show_default=False,
+        ),
+    ] = None,
+    audit_sizes: Annotated[
+        list[int] | None,
+        typer.Option(
+            "--audit-repos",
+            min=1,
+            help="Organization sizes to benchmark the `audit` command against. Can be provided multiple times. "
+            "Defaults to 100 and 1000.",
+            show_default=False,
+        ),
+    ] = None,
+    backends: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--api",
+            help="Crawler backends to benchmark. Can be provided multiple times. Defaults to *rest* and *graphql*.",
+            show_default=False,
+        ),
+    ] = None,
+    engines: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--engine",
+            help="Audit engines to benchmark. Can be provided multiple times. "
+            "Only *subprocess*, *asyncio* and *batch* launch the fake RepoAuditor. Defaults to *subprocess* and *asyncio*.",
+            show_default=False,
+        ),
+    ] = None,
+    jobs: Annotated[
+        int,
+        typer.Option("--jobs", "-j", min=1, help="The `--jobs` value of audit runs."),
+    ] = 16,
+    latency: Annotated[
+        float,
+        typer.Option(
+            "--latency", min=0, help="Seconds the fake GitHub API delays each response."
+        ),
+    ] = 0.05,
+    page_size: Annotated[
+        int,
+        typer.Option(
+            "--page-size",
+            min=1,
+            help="Largest page the fake GitHub API returns, regardless of the requested `per_page`.",
+        ),
+    ] = DEFAULT_PAGE_SIZE,
+    rate_limit: Annotated[
+        int,
+        typer.Option(
+            "--rate-limit",
+            min=1,
+            help="Requests the fake GitHub API allows per rate limit window.",
+        ),
+    ] = DEFAULT_RATE_LIMIT,
+    rate_limit_window: Annotated[
+        float,
+        typer.Option(
+            "--rate-limit-window",
+            min=0,
+            help="Seconds until the fake GitHub API's rate limit budget is refilled.",
+        ),
+    ] = DEFAULT_RATE_LIMIT_WINDOW,
+    auditor_runtime: Annotated[
+        float,
+        typer.Option(
+            "--auditor-runtime",
+            min=0,
+            help="Seconds each fake RepoAuditor run takes.",
+        ),
+    ] = 0.2,
+    repeat: Annotated[
+        int,
+        typer.Option(
+            "--repeat",
+            min=1,
+            help="Number of times each case is run. The median wall time and the highest peak memory are recorded.",
+        ),
+    ] = 3,
+    results_path: ResultsOption = DEFAULT_RESULTS_PATH,
+    no_record: Annotated[
+        bool,
+        typer.Option(
+            "--no-record",
+            help="Print the results without appending them to the results file.",
+            show_default=False,
+        ),
+    ] = False,
+) -> None:
+    """
+    Benchmarks listing and auditing synthetic organizations served by a local fake GitHub API,
+    and records the results under the current commit.
+    """
+    fetch_sizes = fetch_sizes or DEFAULT_FETCH_SIZES
+    stream_sizes = stream_sizes or DEFAULT_STREAM_SIZES
+    audit_sizes = audit_sizes or DEFAULT_AUDIT_SIZES
+    backends = backends or DEFAULT_BACKENDS
+    engines = engines or DEFAULT_ENGINES
+    config = FakeGitHubConfig(
+        latency=latency,
+        page_size=page_size,
+        rate_limit=rate_limit,
+        rate_limit_window=rate_limit_window,
+    )
+    cases = (
+        [
+            BenchmarkCase("fetch", size, backend=backend)
+            for backend in backends
+            for size in fetch_sizes
+        ]
+        + [
+            BenchmarkCase("stream", size, backend=backend)
+            for backend in backends
+            for size in stream_sizes
+        ]
+        + [
+            BenchmarkCase("audit", size, backend=backends[0], engine=engine, jobs=jobs)
+            for engine in engines
+            for size in audit_sizes
+        ]
+    )
+
+    commit = current_commit()
+    records = []
+    rows = []
+    with FakeGitHubAPI(config) as server:
+        for case in cases:
+            case_config = {**asdict(config)}
+            if case.kind == "audit":
+                case_config["auditor_runtime"] = auditor_runtime
+            runs = [
+                run_case_in_subprocess(case, server, auditor_runtime=auditor_runtime)
+                for _ in range(repeat)
+            ]
+            record = make_record(
+                commit, case.name, {"repos": case.repos}, case_config, runs
+            )
+            records.append(record)
+            metrics = record["metrics"]
+            rows.append(
+                [
+                    case.name,
+                    f"{case.repos:,}",
+                    format_metric(metrics["wall_time"], "s"),
+                    format_metric(metrics["repos_per_second"]),
+                    f"{metrics['requests']:,.0f}",
+                    format_metric(metrics["peak_memory_mb"], " MB"),
+                    format_metric(metrics.get("memory_growth_mb"), " MB"),
+                ]
+            )
+            typer.echo(f"{case.name} with {case.repos:,} repositories: done")
+
+    tpf.print_table(
+        [
+            "Case",
+            "Repos",
+            "Wall Time",
+            "Repos/s",
+            "Requests",
+            "Peak Memory",
+            "Memory Growth",
+        ],
+        rows,
+    )
+    if not no_record:
+        append_records(results_path, records)
+        typer.echo(f"Recorded {len(records)} results for {commit} in {results_path}")
+
+
+@app.command()
+def compare(
+    base: Annotated[
+        str | None,
+        typer.Argument(
+            help="Commit to compare against. Defaults to the second most recently recorded commit.",
+            show_default=False,
+        ),
+    ] = None,
+    head: Annotated[
+        str | None,
+        typer.Argument(
+            help="Commit to compare. Defaults to the most recently recorded commit.",
+            show_default=False,
+        ),
+    ] = None,
+    threshold: Annotated[
+        float,
+        typer.Option(
+            "--threshold",
+            min=0,
+            help="Relative increase of wall time or peak memory reported as a regression.",
+        ),
+    ] = DEFAULT_REGRESSION_THRESHOLD,
+    results_path: ResultsOption = DEFAULT_RESULTS_PATH,
+) -> None:
+    """
+    Compares the results recorded for two commits. Exits with code 1 if any case regressed.
+    """
+    if not results_path.exists():
+        typer.echo(f"No results have been recorded in {results_path} yet.")
+        raise typer.Exit(1)
+    records = load_records(results_path)
+    commits = recorded_commits(records)
+    head = head or (commits[-1] if commits else None)
+    base = base or (commits[-2] if len(commits) >= 2 else None)
+    if base is None or head is None:
+        typer.echo("Results for at least two commits are needed to compare.")
+        raise typer.Exit(1)
+
+    comparisons = compare_records(records, base, head)
+    if not comparisons:
+        typer.echo(f"{base} and {head} have no benchmark cases in common.")
+        raise typer.Exit(1)
+
+    regressions = [c for c in comparisons if c.change > threshold]
+    tpf.print_table(
+        ["Case", "Metric", base, head, "Change", ""],
+        [
+            [
+                c.case,
+                c.metric,
+                format_metric(c.base),
+                format_metric(c.head),
+                f"{c.change:+.1%}",
+                "REGRESSION" if c in regressions else "",
+            ]
+            for c in comparisons
+        ],
+    )
+    raise typer.Exit(1 if regressions else 0)
+
+
+@app.command(hidden=True)
+def case(
+    spec: Annotated[str, typer.Argument()],
+    base_url: Annotated[str, typer.Argument()],
+    result_file: Annotated[Path, typer.Option("--result-file")],
+) -> None:
+    """
+    Runs a single benchmark case in this process and writes its metrics to `--result-file`.
+    """
+    metrics = run_case(BenchmarkCase(**json.loads(spec)), base_url)
+    result_file.write_text(json.dumps(metrics), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    app()
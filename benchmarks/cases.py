@@ -0,0 +1,224 @@
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from unittest import mock
+from benchmarks import fake_repo_auditor
+from benchmarks.fake_github import (
+    FAKE_HOSTNAME,
+    FakeGitHubAPI,
+    expected_repo_count,
+    synthetic_org_name,
+)
+
+BENCHMARK_PAT = "benchmark-token"
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    """
+    A single measurement.
+
+    Attributes
+    __________
+    kind : str
+        *fetch* lists a fake organization's repositories with `fetch_org_repos`,
+        *stream* iterates over them with `iter_org_repos` without keeping them, as `audit` does,
+        *audit* runs the `audit` command end to end against the fake organization
+    repos : int
+        Number of repositories in the fake organization
+    backend : str
+        The `CrawlerBackend` used to list repositories
+    engine : str
+        The `AuditEngine` used by *audit* cases
+    jobs : int
+        The `--jobs` value used by *audit* cases
+    """
+
+    kind: str
+    repos: int
+    backend: str = "rest"
+    engine: str = "subprocess"
+    jobs: int = 1
+
+    @property
+    def name(self) -> str:
+        if self.kind in ("fetch", "stream"):
+            return f"{self.kind}[{self.backend}]"
+        return f"audit[{self.engine},jobs={self.jobs},{self.backend}]"
+
+
+@contextlib.contextmanager
+def redirect_github_api(base_url: str) -> Iterator[None]:
+    """
+    Sends every `GitHubClient` request to `base_url`, whatever the hostname of the audited urls.
+    """
+    with (
+        mock.patch("orgwarden.github_client.api_base_url", return_value=base_url),
+        mock.patch(
+            "orgwarden.github_client.graphql_url", return_value=f"{base_url}/graphql"
+        ),
+    ):
+        yield
+
+
+def run_fetch_case(case: BenchmarkCase, base_url: str) -> dict:
+    """
+    Lists the fake organization's repositories and returns the wall time and throughput.
+    *stream* cases count the repositories as they are yielded instead of collecting them,
+    so their peak memory shows what the crawl itself holds on to.
+    """
+    from orgwarden.github_client import GitHubClient
+    from orgwarden.repo_crawler import CrawlerBackend, iter_org_repos
+
+    with GitHubClient(FAKE_HOSTNAME, BENCHMARK_PAT, base_url=base_url) as client:
+        start = time.perf_counter()
+        repos = iter_org_repos(
+            synthetic_org_name(case.repos),
+            FAKE_HOSTNAME,
+            BENCHMARK_PAT,
+            include_all_private_repos=False,
+            client=client,
+            backend=CrawlerBackend(case.backend),
+        )
+        if case.kind == "stream":
+            listed = sum(1 for _ in repos)
+        else:
+            listed = len(list(repos))
+        wall_time = time.perf_counter() - start
+
+    expected = expected_repo_count(case.repos, include_all_private_repos=False)
+    if listed != expected:
+        raise RuntimeError(f"Expected {expected} repositories, got {listed}.")
+    return {
+        "wall_time": wall_time,
+        "listed_repos": listed,
+        "repos_per_second": listed / wall_time,
+    }
+
+
+def run_audit_case(case: BenchmarkCase, base_url: str) -> dict:
+    """
+    Runs the `audit` command against the fake organization, with RepoAuditor replaced by the fake,
+    and returns the wall time and throughput. The response cache and audit history are kept in a temporary directory.
+    """
+    from orgwarden.__main__ import app
+
+    with tempfile.TemporaryDirectory() as temp_dir, redirect_github_api(base_url):
+        args = [
+            "audit",
+            f"https://{FAKE_HOSTNAME}/{synthetic_org_name(case.repos)}",
+            BENCHMARK_PAT,
+            "--engine",
+            case.engine,
+            "--jobs",
+            str(case.jobs),
+            "--api",
+            case.backend,
+            "--cache-dir",
+            str(Path(temp_dir) / "http"),
+            "--history-db",
+            str(Path(temp_dir) / "history.sqlite3"),
+        ]
+        start = time.perf_counter()
+        exit_code = app(args=args, prog_name="orgwarden", standalone_mode=False)
+        wall_time = time.perf_counter() - start
+
+    if exit_code:
+        raise RuntimeError(f"`audit` exited with code {exit_code}.")
+    audited = expected_repo_count(case.repos, include_all_private_repos=False)
+    return {
+        "wall_time": wall_time,
+        "audited_repos": audited,
+        "repos_per_second": audited / wall_time,
+    }
+
+
+def peak_memory_mb() -> float | None:
+    """
+    Returns the peak resident memory of the current process in MB.
+    On Linux, `ru_maxrss` starts from the parent's peak after a fork, so the kernel's
+    per-process high water mark is read instead where it is available.
+    """
+    from orgwarden.worker_pool import peak_memory_mb as ru_maxrss_mb
+
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024  # reported in kB
+    except OSError:
+        pass
+    return ru_maxrss_mb()
+
+
+def run_case(case: BenchmarkCase, base_url: str) -> dict:
+    """
+    Runs `case` in the current process and returns its metrics, including the process's peak memory.
+    """
+    # import the crawler and its HTTP stack before the baseline is taken, so they are not counted as growth
+    import orgwarden.repo_crawler  # noqa: F401
+
+    baseline_memory = peak_memory_mb()
+    if case.kind in ("fetch", "stream"):
+        metrics = run_fetch_case(case, base_url)
+    elif case.kind == "audit":
+        metrics = run_audit_case(case, base_url)
+    else:
+        raise ValueError(f"Unknown benchmark kind '{case.kind}'.")
+    metrics["baseline_memory_mb"] = baseline_memory
+    metrics["peak_memory_mb"] = peak_memory_mb()
+    if baseline_memory is not None and metrics["peak_memory_mb"] is not None:
+        # memory the case itself needed, excluding the interpreter and imports
+        metrics["memory_growth_mb"] = metrics["peak_memory_mb"] - baseline_memory
+    return metrics
+
+
+def run_case_in_subprocess(
+    case: BenchmarkCase, server: FakeGitHubAPI, *, auditor_runtime: float
+) -> dict:
+    """
+    Runs `case` in a fresh interpreter, so its peak memory is not inflated by earlier cases
+    and the fake server does not compete with it for the GIL. Returns the case's metrics
+    along with the number of requests the fake server handled.
+    """
+    server.reset_stats()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        shim_dir = Path(temp_dir) / "bin"
+        fake_repo_auditor.install(shim_dir)
+        result_file = Path(temp_dir) / "result.json"
+        env = {
+            **os.environ,
+            "PATH": f"{shim_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+            fake_repo_auditor.RUNTIME_ENV_VAR: str(auditor_runtime),
+        }
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks",
+                "case",
+                json.dumps(asdict(case)),
+                server.base_url,
+                "--result-file",
+                str(result_file),
+            ],
+            check=False,
+            cwd=REPO_ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"{case.name} failed:\n{completed.stderr}")
+        metrics = json.loads(result_file.read_text(encoding="utf-8"))
+    metrics["requests"] = server.request_count
+    return metrics
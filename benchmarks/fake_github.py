@@ -0,0 +1,514 @@
+import functools
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Self
+from urllib.parse import parse_qs, urlparse
+
+# hostname used in audit urls, requests are redirected to the fake server
+FAKE_HOSTNAME = "fake-github.local"
+DEFAULT_PAGE_SIZE = 100  # GitHub's maximum `per_page`
+DEFAULT_RATE_LIMIT = 5000  # GitHub's hourly budget for a personal access token
+DEFAULT_RATE_LIMIT_WINDOW = 60 * 60  # seconds
+REPO_TIMESTAMP = "2025-01-01T00:00:00Z"
+
+_ORG_REPOS_PATH = re.compile(r"^/orgs/(?P<org>[^/]+)/repos$")
+_REPO_PATH = re.compile(r"^/repos/(?P<org>[^/]+)/(?P<repo>[^/]+)$")
+
+
+def synthetic_org_name(repo_count: int) -> str:
+    """
+    Returns the name of the fake organization with `repo_count` repositories.
+    """
+    return f"org-{repo_count}"
+
+
+def synthetic_org_size(org_name: str) -> int | None:
+    """
+    Returns the number of repositories of a fake organization, or None if `org_name` is not one.
+    """
+    prefix, _, count = org_name.partition("-")
+    if prefix != "org" or not count.isdigit():
+        return None
+    return int(count)
+
+
+def is_fork(index: int) -> bool:
+    """
+    Every tenth synthetic repository is a fork.
+    """
+    return index % 10 == 9
+
+
+def is_private(index: int) -> bool:
+    """
+    Every seventh synthetic repository is private.
+    """
+    return index % 7 == 6
+
+
+def expected_repo_count(repo_count: int, *, include_all_private_repos: bool) -> int:
+    """
+    Returns the number of repositories OrgWarden should list for a fake organization with `repo_count` repositories.
+    """
+    return sum(
+        1
+        for index in range(repo_count)
+        if not is_fork(index) and (include_all_private_repos or not is_private(index))
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def listed_repo_indices(
+    repo_count: int, repo_type: str = "all", privacy: str | None = None
+) -> tuple[int, ...]:
+    """
+    Returns the indices of a fake organization's repositories that a listing returns, in order.
+    `repo_type` is the REST API's `type` filter, and `privacy` the GraphQL API's `privacy` argument.
+    """
+    return tuple(
+        index
+        for index in range(repo_count)
+        if (
+            (repo_type == "public" and not is_private(index))
+            or (repo_type == "private" and is_private(index))
+            or (repo_type == "forks" and is_fork(index))
+            or (repo_type == "sources" and not is_fork(index))
+            or repo_type in ("all", "member")
+        )
+        and (privacy is None or is_private(index) == (privacy == "PRIVATE"))
+    )
+
+
+def rest_repo_entry(hostname: str, org_name: str, index: int) -> dict:
+    """
+    Returns a synthetic REST API repository entry. Entries carry the same fields as GitHub's,
+    so response sizes and parsing costs are close to the real API.
+    """
+    name = f"repo-{index:05d}"
+    api = f"https://api.{hostname}/repos/{org_name}/{name}"
+    entry: dict = {
+        "id": 100_000 + index,
+        "node_id": f"R_kgDO{index:08d}",
+        "name": name,
+        "full_name": f"{org_name}/{name}",
+        "private": is_private(index),
+        "owner": {
+            "login": org_name,
+            "id": 1,
+            "node_id": "O_kgDOAAAAAQ",
+            "avatar_url": f"https://avatars.{hostname}/u/1?v=4",
+            "url": f"https://api.{hostname}/users/{org_name}",
+            "html_url": f"https://{hostname}/{org_name}",
+            "type": "Organization",
+            "site_admin": False,
+        },
+        "html_url": f"https://{hostname}/{org_name}/{name}",
+        "description": f"Synthetic repository {index} used for benchmarking.",
+        "fork": is_fork(index),
+        "url": api,
+        "created_at": REPO_TIMESTAMP,
+        "updated_at": REPO_TIMESTAMP,
+        "pushed_at": REPO_TIMESTAMP,
+        "git_url": f"git://{hostname}/{org_name}/{name}.git",
+        "ssh_url": f"git@{hostname}:{org_name}/{name}.git",
+        "clone_url": f"https://{hostname}/{org_name}/{name}.git",
+        "homepage": None,
+        "size": index % 5000,
+        "stargazers_count": index % 100,
+        "watchers_count": index % 100,
+        "language": "Python",
+        "has_issues": True,
+        "has_projects": True,
+        "has_downloads": True,
+        "has_wiki": True,
+        "has_pages": False,
+        "has_discussions": False,
+        "forks_count": 0,
+        "archived": False,
+        "disabled": False,
+        "open_issues_count": index % 20,
+        "license": {"key": "mit", "name": "MIT License", "spdx_id": "MIT"},
+        "allow_forking": True,
+        "is_template": False,
+        "topics": ["benchmark", "synthetic"],
+        "visibility": "private" if is_private(index) else "public",
+        "default_branch": "main",
+        "permissions": {
+            "admin": False,
+            "maintain": False,
+            "push": False,
+            "triage": False,
+            "pull": True,
+        },
+    }
+    for resource in (
+        "archive",
+        "assignees",
+        "blobs",
+        "branches",
+        "collaborators",
+        "comments",
+        "commits",
+        "compare",
+        "contents",
+        "contributors",
+        "deployments",
+        "downloads",
+        "events",
+        "forks",
+        "git_commits",
+        "git_refs",
+        "git_tags",
+        "hooks",
+        "issue_comment",
+        "issue_events",
+        "issues",
+        "keys",
+        "labels",
+        "languages",
+        "merges",
+        "milestones",
+        "notifications",
+        "pulls",
+        "releases",
+        "stargazers",
+        "statuses",
+        "subscribers",
+        "subscription",
+        "tags",
+        "teams",
+        "trees",
+    ):
+        entry[f"{resource}_url"] = f"{api}/{resource.replace('_', '/')}"
+    return entry
+
+
+@dataclass
+class FakeGitHubConfig:
+    """
+    Determines how the fake GitHub API behaves.
+
+    Attributes
+    __________
+    latency : float
+        Seconds each response is delayed by, to simulate the network round trip and GitHub's own processing
+    page_size : int
+        Largest number of repositories returned per page, regardless of the requested `per_page`
+    rate_limit : int
+        Number of requests allowed per rate limit window
+    rate_limit_window : float
+        Seconds until the rate limit budget is refilled
+    """
+
+    latency: float = 0.0
+    page_size: int = DEFAULT_PAGE_SIZE
+    rate_limit: int = DEFAULT_RATE_LIMIT
+    rate_limit_window: float = DEFAULT_RATE_LIMIT_WINDOW
+
+
+@dataclass
+class _RateLimitBudget:
+    limit: int
+    window: float
+    remaining: int = field(init=False)
+    reset_at: float = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.remaining = self.limit
+        self.reset_at = time.time() + self.window
+
+
+class FakeGitHubAPI:
+    """
+    A local HTTP server that imitates the parts of GitHub's REST and GraphQL APIs OrgWarden uses.
+
+    Any organization named like `synthetic_org_name(n)` exists and has `n` synthetic repositories,
+    every tenth of which is a fork and every seventh of which is private. Listings honor the REST API's
+    `type` filter and the GraphQL API's `privacy` argument. Responses are paginated
+    with `Link` headers and carry `X-RateLimit-*` headers; once the budget is spent, requests are
+    rejected like GitHub's primary rate limit until the window resets.
+    Use as a context manager, or call `start` and `stop`.
+
+    Attributes
+    __________
+    config : FakeGitHubConfig
+        Latency, page size and rate limit of the server
+    hostname : str
+        Hostname used in the generated repository urls
+    request_count : int
+        Number of requests handled since the server started or `reset_stats` was called
+    """
+
+    def __init__(
+        self, config: FakeGitHubConfig | None = None, *, hostname: str = FAKE_HOSTNAME
+    ):
+        self.config = config or FakeGitHubConfig()
+        if self.config.page_size < 1:
+            raise ValueError("page_size must be at least 1.")
+        if self.config.rate_limit < 1:
+            raise ValueError("rate_limit must be at least 1.")
+
+        self.hostname = hostname
+        self.request_count = 0
+        self._budget = _RateLimitBudget(
+            self.config.rate_limit, self.config.rate_limit_window
+        )
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def base_url(self) -> str:
+        """
+        The server's API base url, e.g. 'http://127.0.0.1:12345'.
+        """
+        if self._server is None:
+            raise RuntimeError("The fake GitHub API is not running.")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        """
+        Starts serving on a free local port from a background thread.
+        """
+        if self._server is not None:
+            return
+        api = self
+
+        class Handler(_FakeGitHubHandler):
+            fake_api = api
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the server.
+        """
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        assert self._thread is not None
+        self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def reset_stats(self) -> None:
+        """
+        Resets `request_count` and refills the rate limit budget.
+        """
+        with self._lock:
+            self.request_count = 0
+            self._budget = _RateLimitBudget(
+                self.config.rate_limit, self.config.rate_limit_window
+            )
+
+    def take_token(self, resource: str) -> dict[str, str]:
+        """
+        Counts a request against the budget and returns its `X-RateLimit-*` headers.
+        A request made with an empty budget reports 0 remaining requests and must be rejected.
+        """
+        with self._lock:
+            self.request_count += 1
+            budget = self._budget
+            now = time.time()
+            if now >= budget.reset_at:
+                budget.remaining = budget.limit
+                budget.reset_at = now + budget.window
+            if budget.remaining > 0:
+                budget.remaining -= 1
+            else:
+                budget.remaining = -1
+            return {
+                "X-RateLimit-Limit": str(budget.limit),
+                "X-RateLimit-Remaining": str(max(budget.remaining, 0)),
+                "X-RateLimit-Used": str(budget.limit - max(budget.remaining, 0)),
+                "X-RateLimit-Reset": str(int(budget.reset_at)),
+                "X-RateLimit-Resource": resource,
+                "X-Rate-Limited": "1" if budget.remaining < 0 else "0",
+            }
+
+
+class _FakeGitHubHandler(BaseHTTPRequestHandler):
+    fake_api: FakeGitHubAPI
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    # headers and body are written separately, Nagle's algorithm would hold the body back for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # keep benchmark output readable
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        headers = self.fake_api.take_token("core")
+        if self._reject_if_rate_limited(headers):
+            return
+
+        if match := _ORG_REPOS_PATH.match(url.path):
+            self._send_org_repos(match["org"], parse_qs(url.query), headers)
+        elif match := _REPO_PATH.match(url.path):
+            self._send_repo(match["org"], match["repo"], headers)
+        else:
+            self._send_json(404, {"message": "Not Found"}, headers)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        headers = self.fake_api.take_token("graphql")
+        if self._reject_if_rate_limited(headers):
+            return
+        if urlparse(self.path).path != "/graphql":
+            self._send_json(404, {"message": "Not Found"}, headers)
+            return
+
+        try:
+            variables = json.loads(body).get("variables", {})
+        except (ValueError, AttributeError):
+            self._send_json(400, {"message": "Problems parsing JSON"}, headers)
+            return
+        self._send_org_repos_graphql(variables, headers)
+
+    def _reject_if_rate_limited(self, headers: dict[str, str]) -> bool:
+        if headers.pop("X-Rate-Limited") == "0":
+            return False
+        self._send_json(
+            403,
+            {"message": "API rate limit exceeded for user ID 1."},
+            headers,
+        )
+        return True
+
+    def _page_size(self, requested: object) -> int:
+        try:
+            per_page = int(str(requested))
+        except ValueError:
+            per_page = 30  # GitHub's default
+        return max(1, min(per_page, self.fake_api.config.page_size))
+
+    def _send_org_repos(
+        self, org_name: str, query: dict[str, list[str]], headers: dict[str, str]
+    ) -> None:
+        repo_count = synthetic_org_size(org_name)
+        if repo_count is None:
+            self._send_json(404, {"message": "Not Found"}, headers)
+            return
+
+        repo_type = query.get("type", ["all"])[0]
+        if repo_type not in ("all", "public", "private", "forks", "sources", "member"):
+            self._send_json(422, {"message": "Validation Failed"}, headers)
+            return
+        indices = listed_repo_indices(repo_count, repo_type)
+        per_page = self._page_size(query.get("per_page", ["30"])[0])
+        page_param = query.get("page", ["1"])[0]
+        page = int(page_param) if page_param.isdigit() else 1
+        last_page = max(1, -(-len(indices) // per_page))
+        start = (page - 1) * per_page
+        entries = [
+            rest_repo_entry(self.fake_api.hostname, org_name, index)
+            for index in indices[start : start + per_page]
+        ]
+
+        links = []
+        page_url = f"{self.fake_api.base_url}/orgs/{org_name}/repos?type={repo_type}&per_page={per_page}&page="
+        if page < last_page:
+            links.append(f'<{page_url}{page + 1}>; rel="next"')
+            links.append(f'<{page_url}{last_page}>; rel="last"')
+        if page > 1:
+            links.append(f'<{page_url}1>; rel="first"')
+            links.append(f'<{page_url}{page - 1}>; rel="prev"')
+        if links:
+            headers["Link"] = ", ".join(links)
+        self._send_json(200, entries, headers)
+
+    def _send_repo(
+        self, org_name: str, repo_name: str, headers: dict[str, str]
+    ) -> None:
+        repo_count = synthetic_org_size(org_name)
+        _, _, index = repo_name.partition("-")
+        if repo_count is None or not index.isdigit() or int(index) >= repo_count:
+            self._send_json(404, {"message": "Not Found"}, headers)
+            return
+        self._send_json(
+            200, rest_repo_entry(self.fake_api.hostname, org_name, int(index)), headers
+        )
+
+    def _send_org_repos_graphql(self, variables: dict, headers: dict[str, str]) -> None:
+        org_name = str(variables.get("org", ""))
+        repo_count = synthetic_org_size(org_name)
+        if repo_count is None:
+            self._send_json(
+                200,
+                {
+                    "data": {"organization": None},
+                    "errors": [
+                        {
+                            "type": "NOT_FOUND",
+                            "message": f"Could not resolve to an Organization with the login of '{org_name}'.",
+                        }
+                    ],
+                },
+                headers,
+            )
+            return
+
+        # the query always excludes forks, cursors are positions among the listed repositories
+        privacy = variables.get("privacy")
+        indices = listed_repo_indices(
+            repo_count, "sources", privacy if privacy in ("PUBLIC", "PRIVATE") else None
+        )
+        per_page = self._page_size(variables.get("perPage", 100))
+        cursor = variables.get("cursor")
+        start = int(cursor) if isinstance(cursor, str) and cursor.isdigit() else 0
+        end = min(start + per_page, len(indices))
+        nodes = []
+        for index in indices[start:end]:
+            name = f"repo-{index:05d}"
+            nodes.append(
+                {
+                    "name": name,
+                    "url": f"https://{self.fake_api.hostname}/{org_name}/{name}",
+                    "isPrivate": is_private(index),
+                    "isFork": False,
+                    "pushedAt": REPO_TIMESTAMP,
+                    "updatedAt": REPO_TIMESTAMP,
+                    "diskUsage": index % 5000,
+                }
+            )
+        data = {
+            "organization": {
+                "repositories": {
+                    "pageInfo": {
+                        "hasNextPage": end < len(indices),
+                        "endCursor": str(end),
+                    },
+                    "nodes": nodes,
+                }
+            }
+        }
+        self._send_json(200, {"data": data}, headers)
+
+    def _send_json(self, status: int, body: object, headers: dict[str, str]) -> None:
+        if self.fake_api.config.latency > 0:
+            time.sleep(self.fake_api.config.latency)
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
@@ -0,0 +1,68 @@
+import os
+import stat
+import sys
+import time
+from pathlib import Path
+
+RUNTIME_ENV_VAR = "FAKE_REPO_AUDITOR_RUNTIME"  # seconds each audit takes
+OUTPUT_LINES_ENV_VAR = "FAKE_REPO_AUDITOR_OUTPUT_LINES"
+EXIT_CODE_ENV_VAR = "FAKE_REPO_AUDITOR_EXIT_CODE"
+
+# RepoAuditor.EntryPoint of the fake, for engines that import RepoAuditor rather than launching it
+ENTRY_POINT = """
+from fake_repo_auditor import main
+
+
+def app(args, prog_name):
+    raise SystemExit(main(args))
+"""
+
+
+def install(directory: Path) -> Path:
+    """
+    Writes a `uv` executable to `directory` that runs this script instead of RepoAuditor,
+    so `uv run repo_auditor ...` launches the fake when `directory` is first on the `PATH`.
+    Returns the path of the executable. The fake skips `site` initialization so that its own
+    startup cost does not dominate the benchmark.
+
+    `uv run python ...`, which the *batch* engine uses, runs Python with a `RepoAuditor` package
+    in `directory` whose entry point calls `main`.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    package = directory / "RepoAuditor"
+    package.mkdir(exist_ok=True)
+    (package / "__init__.py").write_text("", encoding="utf-8")
+    (package / "EntryPoint.py").write_text(ENTRY_POINT, encoding="utf-8")
+    this_dir = Path(__file__).resolve().parent
+    shim = directory / "uv"
+    shim.write_text(
+        "#!/bin/sh\n"
+        'if [ "$1" = run ] && [ "$2" = python ]; then\n'
+        "    shift 2\n"
+        f'    PYTHONPATH="{directory.resolve()}{os.pathsep}{this_dir}" exec "{sys.executable}" -S "$@"\n'
+        "fi\n"
+        f'exec "{sys.executable}" -S "{this_dir / Path(__file__).name}" "$@"\n',
+        encoding="utf-8",
+    )
+    shim.chmod(shim.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return shim
+
+
+def main(argv: list[str]) -> int:
+    """
+    Sleeps for the configured runtime, prints a report resembling RepoAuditor's, and exits with the configured code.
+    """
+    runtime = float(os.environ.get(RUNTIME_ENV_VAR, "0"))
+    output_lines = int(os.environ.get(OUTPUT_LINES_ENV_VAR, "20"))
+    exit_code = int(os.environ.get(EXIT_CODE_ENV_VAR, "0"))
+
+    urls = [arg for arg in argv if arg.startswith(("http://", "https://"))]
+    time.sleep(runtime)
+    print(f"Auditing {urls[0] if urls else 'repository'}")
+    for line in range(output_lines):
+        print(f"  check-{line:03d} ............................................ passed")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
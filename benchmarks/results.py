@@ -0,0 +1,163 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from benchmarks.cases import REPO_ROOT
+
+DEFAULT_RESULTS_PATH = REPO_ROOT / "benchmarks" / "results.jsonl"
+# fraction a metric may worsen by before it is reported as a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.1
+# metrics compared between commits, lower is better for all of them
+COMPARED_METRICS = ("wall_time", "peak_memory_mb")
+
+
+def current_commit() -> str:
+    """
+    Returns the short hash of the checked out commit, suffixed with '+dirty' if the source tree has uncommitted changes.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        changes = subprocess.run(
+            ["git", "status", "--porcelain", "--", "src"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}+dirty" if changes else commit
+
+
+def make_record(
+    commit: str, case_name: str, params: dict, config: dict, runs: list[dict]
+) -> dict:
+    """
+    Summarizes repeated runs of a case into one record: the median of each metric, except peak memory, which is the maximum.
+    """
+    metrics = {}
+    for metric in runs[0]:
+        values = [run[metric] for run in runs if run.get(metric) is not None]
+        if not values:
+            metrics[metric] = None
+        elif metric == "peak_memory_mb":
+            metrics[metric] = max(values)
+        else:
+            metrics[metric] = statistics.median(values)
+    return {
+        "commit": commit,
+        "recorded_at": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "case": case_name,
+        "params": params,
+        "config": config,
+        "runs": len(runs),
+        "metrics": metrics,
+    }
+
+
+def append_records(path: Path, records: list[dict]) -> None:
+    """
+    Appends records to a JSON Lines results file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def load_records(path: Path) -> list[dict]:
+    """
+    Reads a JSON Lines results file, skipping malformed lines.
+    """
+    records = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and "commit" in record and "metrics" in record:
+            records.append(record)
+    return records
+
+
+def recorded_commits(records: list[dict]) -> list[str]:
+    """
+    Returns the commits with recorded results, oldest first.
+    """
+    return list(dict.fromkeys(record["commit"] for record in records))
+
+
+@dataclass
+class Comparison:
+    """
+    The change of one metric of one case between two commits.
+
+    Attributes
+    __________
+    case : str
+        Name and parameters of the benchmark case
+    metric : str
+        The compared metric
+    base : float
+        The metric's value at the base commit
+    head : float
+        The metric's value at the head commit
+    """
+
+    case: str
+    metric: str
+    base: float
+    head: float
+
+    @property
+    def change(self) -> float:
+        """
+        Relative change from `base` to `head`; positive values are regressions.
+        """
+        return (self.head - self.base) / self.base if self.base else 0.0
+
+
+def _case_key(record: dict) -> tuple[str, str]:
+    """
+    Returns the name and parameters of a record's case, and the configuration it ran with.
+    """
+    params = ",".join(
+        f"{key}={value}" for key, value in sorted(record["params"].items())
+    )
+    config = json.dumps(record["config"], sort_keys=True)
+    return f"{record['case']} ({params})", config
+
+
+def compare_records(records: list[dict], base: str, head: str) -> list[Comparison]:
+    """
+    Compares the latest results recorded for `base` and `head`, for every case recorded with the same parameters at both commits.
+    """
+    # results are only comparable if they ran against the same fake API and RepoAuditor
+    latest: dict[str, dict[tuple[str, str], dict]] = {base: {}, head: {}}
+    for record in records:
+        if record["commit"] in latest:
+            latest[record["commit"]][_case_key(record)] = record
+
+    comparisons = []
+    for key, head_record in latest[head].items():
+        base_record = latest[base].get(key)
+        if base_record is None:
+            continue
+        for metric in COMPARED_METRICS:
+            base_value = base_record["metrics"].get(metric)
+            head_value = head_record["metrics"].get(metric)
+            if base_value is None or head_value is None:
+                continue
+            comparisons.append(Comparison(key[0], metric, base_value, head_value))
+    return comparisons
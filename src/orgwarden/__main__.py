@@ -1,18 +1,163 @@
+import asyncio
+import contextlib
+import dataclasses
+import itertools
+import signal
+import sqlite3
+import subprocess
+import time
+from pathlib import Path
+from collections.abc import Iterator
+from urllib.parse import urlparse
 from typing import Annotated
 import typer
+from orgwarden import tracing
 from orgwarden import typer_print_functions as tpf
-from orgwarden.audit import audit_repository
+from orgwarden.audit import (
+    TIMEOUT_EXIT_CODE,
+    AuditEngine,
+    AuditResult,
+    DeadlineError,
+    audit_repository,
+    audit_repository_async,
+    capture_audit,
+    prefetch,
+    run_audits,
+    run_audits_async,
+    timed_out_result,
+)
+from orgwarden.batch import DEFAULT_BATCH_SIZE, BatchAuditor
+from orgwarden.cassette import Cassette, CassetteError, CassetteMode
+from orgwarden.daemon import (
+    DEFAULT_PORT,
+    RECENT_RESULTS,
+    STATUS_PATH,
+    WEBHOOK_PATH,
+    AuditDaemon,
+    DaemonServer,
+    TargetScope,
+)
+from orgwarden.github_client import GitHubClient
+from orgwarden.http_cache import ResponseCache
+from orgwarden.audit_state import AuditStateStore, audit_fingerprint
+from orgwarden.audit_journal import AuditJournal, run_fingerprint
+from orgwarden.audit_history import AuditHistory, HistoryView, default_history_path
 from orgwarden.audit_settings import (
     RepoAuditSettings,
     get_audit_settings,
     parse_settings_string,
 )
+from orgwarden.report import (
+    DEFAULT_MAX_OUTPUT,
+    ReportError,
+    ReportFormat,
+    ReportWriter,
+    read_report,
+    result_from_record,
+)
 from orgwarden.repository import Repository
-from orgwarden.repo_crawler import AuthError, fetch_org_repos
-from orgwarden.url_tools import validate_url
+from orgwarden.repo_crawler import (
+    AuthError,
+    CrawlerBackend,
+    fetch_org_repos,
+    fetch_repo,
+    iter_org_repos,
+)
+from orgwarden.scheduling import (
+    DURATION_HISTORY_DAYS,
+    SchedulePolicy,
+    schedule,
+    simulate_wall_time,
+    stats_from_history,
+)
+from orgwarden.sharding import (
+    Shard,
+    ShardPlan,
+    durations_from_records,
+    parse_shard,
+)
+from orgwarden.url_tools import (
+    ParsedURL,
+    group_urls_by_hostname,
+    read_url_file,
+    validate_url,
+)
+from orgwarden.worker_pool import AuditWorkerPool
 
 app = typer.Typer(rich_markup_mode="markdown")
 
+REPO_QUEUE_SIZE = 200  # repositories buffered between the crawler and the audit stage
+
+CacheDirOption = Annotated[
+    Path | None,
+    typer.Option(
+        "--cache-dir",
+        help="Directory for the GitHub API response cache. "
+        "Cached responses are revalidated with conditional requests, which do not count against the rate limit. "
+        "Defaults to your user cache directory.",
+        show_default=False,
+    ),
+]
+NoCacheOption = Annotated[
+    bool,
+    typer.Option(
+        "--no-cache",
+        help="Do not read from or write to the GitHub API response cache.",
+        show_default=False,
+    ),
+]
+BackendOption = Annotated[
+    CrawlerBackend,
+    typer.Option(
+        "--api",
+        help="The GitHub API used to list an organization's repositories. "
+        "*graphql* requests only the fields OrgWarden needs, which transfers far less data for large organizations.",
+    ),
+]
+HistoryDbOption = Annotated[
+    Path | None,
+    typer.Option(
+        "--history-db",
+        help="SQLite database that records every audit run. Defaults to your user cache directory.",
+        show_default=False,
+    ),
+]
+RefreshOption = Annotated[
+    bool,
+    typer.Option(
+        "--refresh",
+        help="Re-download every GitHub API response instead of revalidating cached ones, then update the cache.",
+        show_default=False,
+    ),
+]
+RecordOption = Annotated[
+    Path | None,
+    typer.Option(
+        "--record",
+        help="Save every GitHub API response OrgWarden receives to a cassette in this directory, "
+        "replacing any earlier recording, so the run can be replayed with `--replay`.",
+        show_default=False,
+    ),
+]
+ReplayOption = Annotated[
+    Path | None,
+    typer.Option(
+        "--replay",
+        help="Serve GitHub API responses from a cassette saved with `--record` instead of contacting GitHub. "
+        "Requests that were not recorded fail.",
+        show_default=False,
+    ),
+]
+TraceOption = Annotated[
+    Path | None,
+    typer.Option(
+        "--trace",
+        help="Write timed spans of every GitHub API request, page decode, page filter, settings resolution and audit to this file "
+        "as Chrome trace-event JSON, viewable in chrome://tracing or https://ui.perfetto.dev, and print a per-phase summary.",
+        show_default=False,
+    ),
+]
+
 
 def reject_empty_string(value: str):
     if not value:
@@ -21,8 +166,126 @@ def reject_empty_string(value: str):
         return value
 
 
+def validate_host_pats(values: list[str] | None):
+    values = values or []
+    for value in values:
+        hostname, _, pat = value.partition("=")
+        if not hostname or not pat:
+            raise typer.BadParameter(f"'{value}' is not in the format 'hostname=pat'.")
+    return values
+
+
+def expand_urls(urls: list[str]) -> list[str]:
+    """
+    Replaces each '@<file>' entry with the urls listed in that file.
+    """
+    expanded = []
+    for url in urls:
+        if url.startswith("@"):
+            expanded += read_url_file(Path(url[1:]))
+        else:
+            expanded.append(url)
+    return expanded
+
+
+def open_cassette(record: Path | None, replay: Path | None) -> Cassette | None:
+    """
+    Returns the cassette selected by the `--record` or `--replay` option, if any.
+    """
+    if record and replay:
+        raise typer.BadParameter(
+            "cannot be combined.", param_hint="'--record' / '--replay'"
+        )
+    try:
+        if record:
+            return Cassette(record, CassetteMode.RECORD)
+        if replay:
+            return Cassette(replay, CassetteMode.REPLAY)
+    except (OSError, CassetteError) as e:
+        tpf.print_general_error(e)
+        raise typer.Exit(1)
+    return None
+
+
+def start_trace(ctx: typer.Context, path: Path | None) -> None:
+    """
+    Starts recording spans if `--trace` was provided.
+    The trace is written, and its summary printed, once the command finishes, even if it fails.
+    """
+    if path is None:
+        return
+    tracer = tracing.start_tracing()
+
+    def finish_trace() -> None:
+        tracing.stop_tracing()
+        wall_time = time.perf_counter() - tracer.start
+        written_to: Path | None = path
+        try:
+            tracer.write(path)
+        except OSError as e:
+            tpf.print_general_error(OSError(f"Could not write trace: {e}"))
+            written_to = None
+        tpf.print_trace_summary(tracer.summary(), wall_time, written_to)
+
+    ctx.call_on_close(finish_trace)
+
+
+def resolve_targets(
+    urls: list[str], gh_pat: str, host_pats: list[str] | None
+) -> tuple[list[str], dict[str, list[tuple[str, ParsedURL]]], dict[str, str]]:
+    """
+    Expands and validates the target urls. Returns them, the targets grouped by host, and the PAT of each host.
+    """
+    try:
+        target_urls = expand_urls(urls)
+    except OSError as e:
+        tpf.print_general_error(e)
+        raise typer.Exit(1)
+    try:
+        targets_by_host = group_urls_by_hostname(target_urls)
+    except ValueError as e:
+        tpf.print_invalid_url_msg(e)
+        raise typer.Exit(1)
+    if not targets_by_host:
+        tpf.print_general_error(ValueError("No urls were provided."))
+        raise typer.Exit(1)
+    pats = {hostname: gh_pat for hostname in targets_by_host}
+    for host_pat in host_pats or []:
+        hostname, _, pat = host_pat.partition("=")
+        pats[hostname] = pat
+    return target_urls, targets_by_host, pats
+
+
+def resolve_audit_settings(
+    settings_sequence: list[RepoAuditSettings] | None,
+) -> dict[str, str] | None:
+    """
+    Returns the repository-specific settings, by repository name.
+    """
+    if not settings_sequence:
+        return None
+    try:
+        return get_audit_settings(settings_sequence)
+    except Exception as e:
+        tpf.print_general_error(e)
+        raise typer.Exit(1)
+
+
+def create_github_client(
+    hostname: str,
+    gh_pat: str,
+    cache_dir: Path | None,
+    no_cache: bool,
+    refresh: bool,
+    cassette: Cassette | None = None,
+) -> GitHubClient:
+    cache = None if no_cache else ResponseCache(cache_dir, refresh=refresh)
+    return GitHubClient(hostname, gh_pat, cache=cache, cassette=cassette)
+
+
 @app.command()
 def list_repos(
+    ctx: typer.Context,
     url: Annotated[
         str,
         typer.Argument(
@@ -49,6 +312,13 @@ def list_repos(
             show_default=False,
         ),
     ] = False,
+    cache_dir: CacheDirOption = None,
+    no_cache: NoCacheOption = False,
+    refresh: RefreshOption = False,
+    backend: BackendOption = CrawlerBackend.REST,
+    record: RecordOption = None,
+    replay: ReplayOption = None,
+    trace: TraceOption = None,
 ) -> None:
     """
     List an organization's repositories.
@@ -63,13 +333,23 @@ def list_repos(
         tpf.print_invalid_url_msg(e)
         raise typer.Exit(1)
 
+    cassette = open_cassette(record, replay)
+    start_trace(ctx, trace)
     try:
-        repos = fetch_org_repos(
-            parsed_url.org_name,
-            parsed_url.hostname,
-            gh_pat,
-            include_all_private_repos=include_private_repos,
-        )
+        with (
+            cassette or contextlib.nullcontext(),
+            create_github_client(
+                parsed_url.hostname, gh_pat, cache_dir, no_cache, refresh, cassette
+            ) as client,
+        ):
+            repos = fetch_org_repos(
+                parsed_url.org_name,
+                parsed_url.hostname,
+                gh_pat,
+                include_all_private_repos=include_private_repos,
+                client=client,
+                backend=backend,
+            )
     except AuthError as e:
         tpf.print_auth_error(e.hostname)
         raise typer.Exit(1)
@@ -86,12 +366,14 @@ def list_repos(
 
 @app.command()
 def audit(
+    ctx: typer.Context,
     url: Annotated[
         str,
         typer.Argument(
             help="The url for a GitHub repository or organization. "
             "If the provided <url> points to a repository, RepoAuditor runs against that repository. "
-            "If the provided <url> points to an organization, RepoAuditor runs against all of that organization's public, non-forked repositories.",
+            "If the provided <url> points to an organization, RepoAuditor runs against all of that organization's public, non-forked repositories. "
+            "Use '@<file>' to read urls from a file, one per line.",
             show_default=False,
             callback=reject_empty_string,
         ),
@@ -146,64 +428,1107 @@ def audit(
             show_default=False,
         ),
     ] = None,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "--jobs",
+            "-j",
+            min=1,
+            help="The number of repositories to audit concurrently. "
+            "When greater than 1, each repository's output is buffered and printed as a single block once its audit finishes.",
+        ),
+    ] = 1,
+    engine: Annotated[
+        AuditEngine,
+        typer.Option(
+            "--engine",
+            help="How RepoAuditor is executed. "
+            "*subprocess* runs `uv run repo_auditor` once per repository. "
+            "*in-process* imports RepoAuditor once and calls it directly, avoiding per-repository startup costs; "
+            "in-process audits run one at a time and fall back to *subprocess* if RepoAuditor cannot be imported. "
+            "*worker-pool* runs audits on `--jobs` long-lived worker processes that each import RepoAuditor once. "
+            "*asyncio* supervises `uv run repo_auditor` children from a single event loop instead of a thread per audit, "
+            "so `--jobs` can be in the hundreds. "
+            "*batch* runs `--jobs` drivers in the environment of `uv run repo_auditor` that each import RepoAuditor once "
+            "and audit `--batch-size` repositories in turn, keeping each repository's exit code and output separate.",
+        ),
+    ] = AuditEngine.SUBPROCESS,
+    batch_size: Annotated[
+        int,
+        typer.Option(
+            "--batch-size",
+            min=1,
+            help="With the *batch* engine, the number of repositories each RepoAuditor driver audits before it is replaced.",
+        ),
+    ] = DEFAULT_BATCH_SIZE,
+    max_tasks_per_worker: Annotated[
+        int,
+        typer.Option(
+            "--max-tasks-per-worker",
+            min=1,
+            help="With the *worker-pool* engine, replace a worker process after it completes this many audits.",
+        ),
+    ] = 100,
+    max_worker_memory: Annotated[
+        float | None,
+        typer.Option(
+            "--max-worker-memory",
+            min=1,
+            help="With the *worker-pool* engine, replace a worker process once its peak memory exceeds this many MB.",
+            show_default=False,
+        ),
+    ] = None,
+    cache_dir: CacheDirOption = None,
+    no_cache: NoCacheOption = False,
+    refresh: RefreshOption = False,
+    backend: BackendOption = CrawlerBackend.REST,
+    record: RecordOption = None,
+    replay: ReplayOption = None,
+    incremental: Annotated[
+        bool,
+        typer.Option(
+            "--incremental",
+            help="Skip repositories whose last push, last update, modules and settings are unchanged since their last audit, "
+            "and report their previous results instead.",
+            show_default=False,
+        ),
+    ] = False,
+    max_age: Annotated[
+        float | None,
+        typer.Option(
+            "--max-age",
+            min=0,
+            help="With `--incremental`, re-audit repositories whose last audit is older than this many hours, even if they are unchanged.",
+            show_default=False,
+        ),
+    ] = None,
+    state_file: Annotated[
+        Path | None,
+        typer.Option(
+            "--state-file",
+            help="With `--incremental`, the file that stores each repository's last audit. Defaults to your user cache directory.",
+            show_default=False,
+        ),
+    ] = None,
+    additional_urls: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--url",
+            help="Another repository or organization url to audit, or '@<file>' to read urls from a file. "
+            "Can be provided multiple times. Urls are grouped by host, and each host shares one connection pool and rate limit budget.",
+            show_default=False,
+        ),
+    ] = None,
+    host_pats: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--host-pat",
+            callback=validate_host_pats,
+            help="A PAT to use for a specific host instead of <gh_pat>, in the format 'hostname=pat'. "
+            "Can be provided multiple times. Example: '--host-pat github.gatech.edu=<pat>'.",
+            show_default=False,
+        ),
+    ] = None,
+    history_db: HistoryDbOption = None,
+    trace: TraceOption = None,
+    report_format: Annotated[
+        ReportFormat | None,
+        typer.Option(
+            "--report",
+            help="Write a machine-readable record of each repository's audit as soon as it finishes: "
+            "the repository, modules, exit code, duration and RepoAuditor's output. "
+            "*ndjson* writes one JSON record per line, *json* a single document with a `results` array. "
+            "Records are written to `--report-file`, or to stdout in place of the human-readable output.",
+            show_default=False,
+        ),
+    ] = None,
+    report_file: Annotated[
+        Path | None,
+        typer.Option(
+            "--report-file",
+            help="With `--report`, the file records are written to. Defaults to stdout.",
+            show_default=False,
+        ),
+    ] = None,
+    report_max_output: Annotated[
+        int,
+        typer.Option(
+            "--report-max-output",
+            min=0,
+            help="With `--report`, the number of characters of RepoAuditor output kept in each record.",
+        ),
+    ] = DEFAULT_MAX_OUTPUT,
+    shard: Annotated[
+        Shard | None,
+        typer.Option(
+            "--shard",
+            parser=parse_shard,
+            metavar="I/N",
+            help="Split the repositories into N shards and only audit shard I, so N machines can audit a large organization together. "
+            "Every machine computes the same split. Combine the shards' `--report` files with `orgwarden merge`.",
+            show_default=False,
+        ),
+    ] = None,
+    shard_durations: Annotated[
+        Path | None,
+        typer.Option(
+            "--shard-durations",
+            help="With `--shard`, a report of a previous audit, e.g. one written by `orgwarden merge`, "
+            "whose durations are used to give each shard about the same total audit time. "
+            "Every shard must be given the same file.",
+            show_default=False,
+        ),
+    ] = None,
+    no_history: Annotated[
+        bool,
+        typer.Option(
+            "--no-history",
+            help="Do not record this run in the audit history database.",
+            show_default=False,
+        ),
+    ] = False,
+    resume: Annotated[
+        bool,
+        typer.Option(
+            "--resume",
+            help="Continue an interrupted run: repositories it already finished are not audited again, "
+            "and their journaled exit codes count towards this run's exit code. "
+            "Only resumes a run with the same urls, modules, settings, private repositories and shard.",
+            show_default=False,
+        ),
+    ] = False,
+    journal_file: Annotated[
+        Path | None,
+        typer.Option(
+            "--journal",
+            help="The file each finished repository is recorded to, so the run can be resumed with `--resume`. "
+            "It is deleted once the run finishes. Defaults to your user cache directory, "
+            "so give concurrent runs of the same audit different files.",
+            show_default=False,
+        ),
+    ] = None,
+    schedule_policy: Annotated[
+        SchedulePolicy,
+        typer.Option(
+            "--schedule",
+            help="The order repositories are audited in. *listing* audits them as they are listed, while the listing is still being fetched. "
+            "*longest-first* waits for the whole listing, then starts the audits expected to take longest first, "
+            "so no long audit is left running alone at the end. Expected durations come from the audit history, "
+            "or from each repository's size if it was never audited. "
+            "*oldest-result-first* waits for the whole listing, then audits the repositories with the oldest results first.",
+        ),
+    ] = SchedulePolicy.LISTING,
+    repo_timeout: Annotated[
+        float | None,
+        typer.Option(
+            "--repo-timeout",
+            min=1,
+            help="Stop a repository's audit once it runs for this many seconds, killing RepoAuditor and every process it started. "
+            f"The repository is reported as timed out with exit code {TIMEOUT_EXIT_CODE} and the audit moves on to the next one. "
+            "The *in-process* engine falls back to *subprocess* audits, which can be stopped.",
+            show_default=False,
+        ),
+    ] = None,
+    deadline: Annotated[
+        float | None,
+        typer.Option(
+            "--deadline",
+            min=1,
+            help="Stop the whole audit this many seconds after it starts. Audits still running are stopped and reported as timed out, "
+            "and repositories that were not started yet are left for `--resume`.",
+            show_default=False,
+        ),
+    ] = None,
 ) -> None:
     """
     Runs [RepoAuditor](https://github.com/gt-sse-center/RepoAuditor) against the specified organization or repository.
     """
+    start_trace(ctx, trace)
+    deadline_at = time.monotonic() + deadline if deadline is not None else None
 
-    try:
-        parsed_url = validate_url(url)
-    except ValueError as e:
-        tpf.print_invalid_url_msg(e)
-        raise typer.Exit(1)
+    target_urls, targets_by_host, pats = resolve_targets(
+        [url, *(additional_urls or [])], gh_pat, host_pats
+    )
+    audit_settings = resolve_audit_settings(settings_sequence)
+
+    # records written to stdout replace the human-readable output, so it stays parseable
+    quiet = report_format is not None and report_file is None
+
+    shard_plan = None
+    if shard is not None:
+        durations = {}
+        if shard_durations is not None:
+            try:
+                durations = durations_from_records(read_report(shard_durations))
+            except ReportError as e:
+                tpf.print_general_error(e)
+                raise typer.Exit(1)
+        shard_plan = ShardPlan(shard.count, durations)
+
+    fingerprint = run_fingerprint(
+        target_urls,
+        modules,
+        audit_settings,
+        include_all_private_repos,
+        included_private_repos,
+        str(shard) if shard else None,
+    )
+
+    cassette = open_cassette(record, replay)
+    with contextlib.ExitStack() as stack:
+        if cassette:
+            stack.enter_context(cassette)
+        report = None
+        if report_format is not None:
+            try:
+                report = stack.enter_context(
+                    ReportWriter(
+                        report_file, report_format, max_output=report_max_output
+                    )
+                )
+            except OSError as e:
+                tpf.print_general_error(e)
+                raise typer.Exit(1)
+        try:
+            journal = stack.enter_context(
+                AuditJournal(fingerprint, journal_file, resume=resume)
+            )
+        except OSError as e:
+            tpf.print_general_error(e)
+            raise typer.Exit(1)
+        if journal.mismatched:
+            tpf.print_journal_mismatch_warning(journal.path)
+        # one pooled client, and so one rate limit budget, per host
+        clients = {
+            hostname: stack.enter_context(
+                create_github_client(
+                    hostname, pats[hostname], cache_dir, no_cache, refresh, cassette
+                )
+            )
+            for hostname in targets_by_host
+        }
+        repo_hosts: dict[str, str] = {}  # repository url -> hostname
+        failed_targets = 0
 
-    repos: list[Repository] = []
+        def iter_target_repos(
+            target_url: str, parsed_url: ParsedURL
+        ) -> Iterator[Repository]:
+            hostname, client = parsed_url.hostname, clients[parsed_url.hostname]
+            if not parsed_url.repo_name:  # organization
+                yield from iter_org_repos(
+                    parsed_url.org_name,
+                    hostname,
+                    pats[hostname],
+                    set(included_private_repos),
+                    include_all_private_repos=include_all_private_repos,
+                    client=client,
+                    backend=backend,
+                )
+                return
 
-    if parsed_url.repo_name:  # repository
-        repos = [
-            Repository(
+            repo = Repository(
                 name=parsed_url.repo_name,
-                url=url,
+                url=target_url,
                 org=parsed_url.org_name,
             )
-        ]
+            if incremental:
+                # the push and update times used to skip unchanged repositories come from the API
+                metadata = fetch_repo(
+                    parsed_url.org_name,
+                    parsed_url.repo_name,
+                    hostname,
+                    pats[hostname],
+                    client=client,
+                )
+                repo = dataclasses.replace(
+                    repo,
+                    pushed_at=metadata.pushed_at,
+                    updated_at=metadata.updated_at,
+                )
+            yield repo
 
-    else:  # organization
-        try:
-            repos = fetch_org_repos(
-                parsed_url.org_name,
-                parsed_url.hostname,
-                gh_pat,
-                set(included_private_repos),
-                include_all_private_repos=include_all_private_repos,
+        def iter_all_repos() -> Iterator[Repository]:
+            nonlocal failed_targets
+            seen: set[str] = (
+                set()
+            )  # a repository can be both listed and named as a target
+            for hostname, targets in targets_by_host.items():
+                for target_url, parsed_url in targets:
+                    try:
+                        for repo in iter_target_repos(target_url, parsed_url):
+                            if repo.url in seen:
+                                continue  # already audited through another target
+                            seen.add(repo.url)
+                            if (
+                                shard is not None
+                                and shard_plan is not None
+                                and shard_plan.shard_of(repo) != shard.index
+                            ):
+                                continue  # audited by another shard
+                            if repo.url in journal.completed:
+                                continue  # finished before the run was interrupted
+                            repo_hosts[repo.url] = hostname
+                            yield repo
+                    except AuthError as e:  # skip the target, keep auditing the others
+                        tpf.print_auth_error(e.hostname)
+                        failed_targets += 1
+                    except Exception as e:
+                        tpf.print_general_error(e)
+                        failed_targets += 1
+
+        def until_deadline(repos: Iterator[Repository]) -> Iterator[Repository]:
+            # raised from the stream, the audits already running finish before the error is reported
+            for repo in repos:
+                if deadline_at is not None and time.monotonic() >= deadline_at:
+                    raise DeadlineError(
+                        "The deadline passed before every repository was audited."
+                    )
+                yield repo
+
+        # repositories stream into the audit stage as each page is parsed
+        repos = prefetch(iter_all_repos(), maxsize=REPO_QUEUE_SIZE)
+
+        # Audit repositories
+        worker_pool = None
+        if engine == AuditEngine.WORKER_POOL:
+            worker_pool = stack.enter_context(
+                AuditWorkerPool(
+                    jobs,
+                    max_tasks_per_worker=max_tasks_per_worker,
+                    max_worker_memory_mb=max_worker_memory,
+                )
             )
-        except AuthError as e:
-            tpf.print_auth_error(e.hostname)
-            raise typer.Exit(1)
+
+        batch_auditor = None
+        if engine == AuditEngine.BATCH:
+            batch_auditor = stack.enter_context(BatchAuditor(batch_size))
+
+        state_store = None
+        if incremental:
+            state_store = stack.enter_context(
+                AuditStateStore(
+                    state_file,
+                    max_age=max_age * 60 * 60 if max_age is not None else None,
+                )
+            )
+
+        audit_history = None
+        if not no_history:
+            try:
+                audit_history = stack.enter_context(AuditHistory(history_db))
+            except (OSError, sqlite3.Error) as e:
+                tpf.print_general_error(e)
+                raise typer.Exit(1)
+            run_id = audit_history.start_run(" ".join(target_urls), modules)
+
+        def fingerprint_of(repo: Repository) -> str | None:
+            return audit_fingerprint(
+                repo,
+                modules,
+                audit_settings.get(repo.name) if audit_settings else None,
+            )
+
+        def pat_for(repo: Repository) -> str:
+            return pats[repo_hosts.get(repo.url, next(iter(targets_by_host)))]
+
+        def acquire_rate_limit(repo: Repository) -> None:
+            # RepoAuditor spends the same token's budget, so audits wait out an exhausted or paused budget too
+            hostname = repo_hosts.get(repo.url, next(iter(targets_by_host)))
+            wait_start = time.perf_counter()
+            if clients[hostname].rate_limiter.acquire() > 0 and (
+                tracer := tracing.active_tracer()
+            ):
+                tracer.add_span(
+                    "rate limit wait (audit)",
+                    "rate-limit",
+                    wait_start,
+                    time.perf_counter(),
+                )
+
+        def audit_timeout() -> float | None:
+            # the time a repository's audit may take, the deadline cuts every audit short
+            if deadline_at is None:
+                return repo_timeout
+            remaining = max(deadline_at - time.monotonic(), 0)
+            return remaining if repo_timeout is None else min(repo_timeout, remaining)
+
+        def audit_one(repo: Repository) -> AuditResult:
+            if state_store is None:
+                return run_audit(repo)
+            fingerprint = fingerprint_of(repo)
+            previous_result = state_store.lookup(repo, fingerprint)
+            if previous_result is not None:
+                return previous_result
+            result = run_audit(repo)
+            state_store.record(result, fingerprint)
+            return result
+
+        def run_audit(repo: Repository) -> AuditResult:
+            gh_pat = pat_for(repo)
+            acquire_rate_limit(repo)
+            timeout = audit_timeout()
+            with tracing.span(
+                f"audit {repo.org}/{repo.name}", "audit", engine=engine.value
+            ):
+                if worker_pool:
+                    return worker_pool.audit(
+                        repo, gh_pat, audit_settings, modules, timeout=timeout
+                    )
+                if batch_auditor:
+                    return batch_auditor.audit(
+                        repo, gh_pat, audit_settings, modules, timeout=timeout
+                    )
+                # buffer output so concurrent or in-process audits don't interleave, and so it can be reported
+                if jobs > 1 or engine != AuditEngine.SUBPROCESS or report:
+                    return capture_audit(
+                        repo,
+                        gh_pat,
+                        audit_settings,
+                        modules,
+                        engine=engine,
+                        timeout=timeout,
+                    )
+                tpf.print_centered_message(f"Now Auditing: {repo.url}")
+                start = time.perf_counter()
+                try:
+                    exit_code = audit_repository(
+                        repo, gh_pat, audit_settings, modules, timeout=timeout
+                    )
+                except subprocess.TimeoutExpired as e:
+                    return timed_out_result(
+                        repo, time.perf_counter() - start, None, e.timeout
+                    )
+                return AuditResult(repo, exit_code, time.perf_counter() - start)
+
+        async def audit_one_async(repo: Repository) -> AuditResult:
+            fingerprint = fingerprint_of(repo) if state_store else None
+            if state_store:
+                previous_result = state_store.lookup(repo, fingerprint)
+                if previous_result is not None:
+                    return previous_result
+            # waiting for the rate limit may sleep, which must not block the event loop
+            await asyncio.to_thread(acquire_rate_limit, repo)
+            timeout = audit_timeout()
+            with tracing.span(
+                f"audit {repo.org}/{repo.name}", "audit", engine=engine.value
+            ):
+                result = await audit_repository_async(
+                    repo, pat_for(repo), audit_settings, modules, timeout=timeout
+                )
+            if state_store:
+                state_store.record(result, fingerprint)
+            return result
+
+        def print_result(result: AuditResult) -> None:
+            if result.reused:
+                tpf.print_centered_message(
+                    f"Unchanged Since Last Audit: {result.repo.url}"
+                )
+            elif result.timed_out and result.output is None:
+                tpf.print_centered_message(f"Timed Out: {result.repo.url}")
+            elif result.output is not None:
+                tpf.print_centered_message(f"Audited: {result.repo.url}")
+                typer.echo(result.output, nl=False)
+
+        listed: list[Repository] = []  # listing order of a scheduled run
+        scheduled: list[Repository] = []
+
+        def schedule_repos(repos: Iterator[Repository]) -> Iterator[Repository]:
+            listed.extend(repos)  # waits for the whole listing
+            stats = (
+                stats_from_history(audit_history.repo_stats(DURATION_HISTORY_DAYS))
+                if audit_history
+                else {}
+            )
+            scheduled.extend(schedule(listed, schedule_policy, stats))
+            yield from scheduled
+
+        if schedule_policy != SchedulePolicy.LISTING:
+            repos = schedule_repos(repos)
+        repos = until_deadline(repos)
+
+        if engine == AuditEngine.ASYNCIO:
+            audited = run_audits_async(repos, audit_one_async, jobs)
+        else:
+            audited = run_audits(repos, audit_one, jobs)
+
+        results: list[AuditResult] = []
+        final_exit_code = 0  # keep track of highest exit code i.e. worst error -> ensures the command fails if any repo fails audit
+        try:
+            for result in itertools.chain(journal.completed.values(), audited):
+                resumed = result.repo.url in journal.completed
+                if not quiet:  # otherwise the record holds the output instead
+                    if resumed:
+                        tpf.print_centered_message(
+                            f"Audited Before Resuming: {result.repo.url}"
+                        )
+                    else:
+                        print_result(result)
+                if report:
+                    report.write(result, modules, str(shard) if shard else None)
+                # the summary does not need the output, so it is not kept for every repository
+                results.append(dataclasses.replace(result, output=None))
+                final_exit_code = max(final_exit_code, result.exit_code)
+                if resumed:
+                    continue  # already journaled, and recorded by the interrupted run
+                if not result.timed_out:  # resuming audits it again
+                    journal.record(result)
+                if audit_history:
+                    audit_history.record(
+                        run_id,
+                        result,
+                        modules,
+                        audit_settings.get(result.repo.name)
+                        if audit_settings
+                        else None,
+                    )
         except Exception as e:
             tpf.print_general_error(e)
-            raise typer.Exit(1)
+            failed_targets += 1
+        if failed_targets:
+            final_exit_code = max(final_exit_code, 1)
+        else:  # a run that skipped targets keeps its journal, so resuming retries them
+            journal.discard()
+
+        if audit_history:
+            audit_history.finish_run(run_id, final_exit_code)
+
+    # check for unused settings & warn user, other shards may use them
+    if audit_settings and not failed_targets and not shard:
+        all_repo_names = {result.repo.name for result in results}
+        for repo_name in audit_settings.keys():
+            if repo_name not in all_repo_names:
+                tpf.print_unused_settings_warning(repo_name)
+
+    if not quiet:
+        tpf.print_audit_summary(results)
+        if scheduled:
+            # replay this run's durations in both orders, repositories not audited in this run took no time
+            durations = {
+                result.repo.url: result.duration
+                for result in results
+                if not result.reused
+            }
+            tpf.print_schedule_savings(
+                schedule_policy.value,
+                simulate_wall_time(
+                    (durations.get(repo.url, 0.0) for repo in listed), jobs
+                ),
+                simulate_wall_time(
+                    (durations.get(repo.url, 0.0) for repo in scheduled), jobs
+                ),
+            )
+    raise typer.Exit(final_exit_code)
+
 
-    # Add Repository-Specific Settings
-    audit_settings = None
-    if settings_sequence:
+@app.command()
+def serve(
+    url: Annotated[
+        str,
+        typer.Argument(
+            help="The url for a GitHub repository or organization to keep audited. "
+            "Use '@<file>' to read urls from a file, one per line.",
+            show_default=False,
+            callback=reject_empty_string,
+        ),
+    ],
+    gh_pat: Annotated[
+        str,
+        typer.Argument(
+            help="A GitHub Personal Access Token (PAT) - must have access to the specified repository or organization. "
+            "See [OrgWarden docs](https://github.com/gt-tech-ai/OrgWarden#setting-up-a-personal-access-token) for help setting up a PAT.",
+            show_default=False,
+            callback=reject_empty_string,
+        ),
+    ],
+    settings_sequence: Annotated[
+        list[RepoAuditSettings] | None,
+        typer.Argument(
+            parser=parse_settings_string,
+            help="Control which CLI flags are passed to RepoAuditor for specific repositories, as with `audit`. "
+            'Each settings string should follow the format: "repo_name: cli_flags".',
+            show_default=False,
+        ),
+    ] = None,
+    include_all_private_repos: Annotated[
+        bool,
+        typer.Option(
+            "--include-all-private-repos",
+            help="Include all of the specified organization's private repositories. "
+            "Note: your PAT must have access to your organization's private repositories.",
+            show_default=False,
+        ),
+    ] = False,
+    included_private_repos: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--include-private-repo",
+            help="The name of a private repository to be included. Can be provided multiple times.",
+            show_default=False,
+        ),
+    ] = None,
+    modules: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--module",
+            help="The RepoAuditor modules you would like to run. Defaults to all modules. Can be provided multiple times.",
+            show_default=False,
+        ),
+    ] = None,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "--jobs",
+            "-j",
+            min=1,
+            help="The number of repositories to audit concurrently.",
+        ),
+    ] = 1,
+    engine: Annotated[
+        AuditEngine,
+        typer.Option(
+            "--engine",
+            help="How RepoAuditor is executed, as with `audit`. "
+            "*worker-pool* and *batch* keep RepoAuditor imported between audits. *asyncio* is not supported.",
+        ),
+    ] = AuditEngine.SUBPROCESS,
+    batch_size: Annotated[
+        int,
+        typer.Option(
+            "--batch-size",
+            min=1,
+            help="With the *batch* engine, the number of repositories each RepoAuditor driver audits before it is replaced.",
+        ),
+    ] = DEFAULT_BATCH_SIZE,
+    max_tasks_per_worker: Annotated[
+        int,
+        typer.Option(
+            "--max-tasks-per-worker",
+            min=1,
+            help="With the *worker-pool* engine, replace a worker process after it completes this many audits.",
+        ),
+    ] = 100,
+    max_worker_memory: Annotated[
+        float | None,
+        typer.Option(
+            "--max-worker-memory",
+            min=1,
+            help="With the *worker-pool* engine, replace a worker process once its peak memory exceeds this many MB.",
+            show_default=False,
+        ),
+    ] = None,
+    cache_dir: CacheDirOption = None,
+    no_cache: NoCacheOption = False,
+    backend: BackendOption = CrawlerBackend.REST,
+    additional_urls: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--url",
+            help="Another repository or organization url to keep audited, or '@<file>' to read urls from a file. "
+            "Can be provided multiple times.",
+            show_default=False,
+        ),
+    ] = None,
+    host_pats: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--host-pat",
+            callback=validate_host_pats,
+            help="A PAT to use for a specific host instead of <gh_pat>, in the format 'hostname=pat'. Can be provided multiple times.",
+            show_default=False,
+        ),
+    ] = None,
+    history_db: HistoryDbOption = None,
+    no_history: Annotated[
+        bool,
+        typer.Option(
+            "--no-history",
+            help="Do not record audits in the audit history database.",
+            show_default=False,
+        ),
+    ] = False,
+    repo_timeout: Annotated[
+        float | None,
+        typer.Option(
+            "--repo-timeout",
+            min=1,
+            help="Stop a repository's audit once it runs for this many seconds, killing RepoAuditor and every process it started.",
+            show_default=False,
+        ),
+    ] = None,
+    interval: Annotated[
+        float,
+        typer.Option(
+            "--interval",
+            min=0,
+            help="List and re-audit every repository this many hours after the previous time. "
+            "Every repository is audited on start. 0 only re-audits repositories on webhook events.",
+        ),
+    ] = 24,
+    host: Annotated[
+        str,
+        typer.Option(
+            "--host",
+            help="The address the webhook and status endpoints listen on. "
+            "Defaults to local connections only, e.g. behind a reverse proxy or a `gh webhook forward`.",
+        ),
+    ] = "127.0.0.1",
+    port: Annotated[
+        int,
+        typer.Option(
+            "--port",
+            min=0,
+            max=65535,
+            help="The port the webhook and status endpoints listen on.",
+        ),
+    ] = DEFAULT_PORT,
+    webhook_secret: Annotated[
+        str | None,
+        typer.Option(
+            "--webhook-secret",
+            envvar="ORGWARDEN_WEBHOOK_SECRET",
+            help="The secret of the GitHub webhook. Deliveries whose `X-Hub-Signature-256` does not match are rejected.",
+            show_default=False,
+        ),
+    ] = None,
+    recent_results: Annotated[
+        int,
+        typer.Option(
+            "--recent-results",
+            min=1,
+            help="The number of most recent results listed by the status endpoint.",
+        ),
+    ] = RECENT_RESULTS,
+) -> None:
+    """
+    Keeps the specified organizations and repositories audited: audits every repository on start and every `--interval` hours,
+    and re-audits a single repository within seconds of a GitHub webhook reporting a push to it, or that it was created,
+    renamed, archived or otherwise changed. The repository listing, GitHub API connections and RepoAuditor workers stay warm in between.
+
+    Point an organization webhook with content type *application/json* at `/webhook`, and `GET /status` for the queue depth and most recent results.
+    """
+    if engine == AuditEngine.ASYNCIO:
+        raise typer.BadParameter(
+            "asyncio is not supported by serve.", param_hint="'--engine'"
+        )
+    target_urls, targets_by_host, pats = resolve_targets(
+        [url, *(additional_urls or [])], gh_pat, host_pats
+    )
+    audit_settings = resolve_audit_settings(settings_sequence)
+    scope = TargetScope(
+        (target for targets in targets_by_host.values() for target in targets),
+        set(included_private_repos or []),
+        include_all_private_repos,
+    )
+
+    with contextlib.ExitStack() as stack:
+        # one pooled client, and so one rate limit budget, per host for the daemon's whole life
+        clients = {
+            hostname: stack.enter_context(
+                create_github_client(
+                    hostname, pats[hostname], cache_dir, no_cache, False
+                )
+            )
+            for hostname in targets_by_host
+        }
+
+        worker_pool = None
+        if engine == AuditEngine.WORKER_POOL:
+            worker_pool = stack.enter_context(
+                AuditWorkerPool(
+                    jobs,
+                    max_tasks_per_worker=max_tasks_per_worker,
+                    max_worker_memory_mb=max_worker_memory,
+                )
+            )
+        batch_auditor = None
+        if engine == AuditEngine.BATCH:
+            batch_auditor = stack.enter_context(BatchAuditor(batch_size))
+
+        audit_history = None
+        if not no_history:
+            try:
+                audit_history = stack.enter_context(AuditHistory(history_db))
+            except (OSError, sqlite3.Error) as e:
+                tpf.print_general_error(e)
+                raise typer.Exit(1)
+            run_id = audit_history.start_run(" ".join(target_urls), modules)
+
+        def list_repos() -> Iterator[Repository]:
+            for hostname, targets in targets_by_host.items():
+                for target_url, parsed_url in targets:
+                    if parsed_url.repo_name:
+                        yield Repository(
+                            parsed_url.repo_name, target_url, parsed_url.org_name
+                        )
+                        continue
+                    try:  # skip the target until the next listing, keep the others
+                        yield from iter_org_repos(
+                            parsed_url.org_name,
+                            hostname,
+                            pats[hostname],
+                            set(included_private_repos or []),
+                            include_all_private_repos=include_all_private_repos,
+                            client=clients[hostname],
+                            backend=backend,
+                        )
+                    except AuthError as e:
+                        tpf.print_auth_error(e.hostname)
+                    except Exception as e:
+                        tpf.print_general_error(e)
+
+        def hostname_of(repo: Repository) -> str:
+            hostname = urlparse(repo.url).netloc
+            return hostname if hostname in clients else next(iter(clients))
+
+        def run_audit(repo: Repository) -> AuditResult:
+            hostname = hostname_of(repo)
+            # RepoAuditor spends the same token's budget
+            clients[hostname].rate_limiter.acquire()
+            if worker_pool:
+                return worker_pool.audit(
+                    repo, pats[hostname], audit_settings, modules, timeout=repo_timeout
+                )
+            if batch_auditor:
+                return batch_auditor.audit(
+                    repo, pats[hostname], audit_settings, modules, timeout=repo_timeout
+                )
+            return capture_audit(
+                repo,
+                pats[hostname],
+                audit_settings,
+                modules,
+                engine=engine,
+                timeout=repo_timeout,
+            )
+
+        worst_exit_code = 0
+
+        def on_result(result: AuditResult) -> None:
+            nonlocal worst_exit_code
+            worst_exit_code = max(worst_exit_code, result.exit_code)
+            if result.timed_out and result.output is None:
+                tpf.print_centered_message(f"Timed Out: {result.repo.url}")
+            else:
+                tpf.print_centered_message(f"Audited: {result.repo.url}")
+                typer.echo(result.output or "", nl=False)
+            if audit_history:
+                audit_history.record(
+                    run_id,
+                    result,
+                    modules,
+                    audit_settings.get(result.repo.name) if audit_settings else None,
+                )
+                if (
+                    not daemon.queue_depth
+                ):  # results queued by events are written right away
+                    audit_history.flush()
+
+        daemon = AuditDaemon(
+            list_repos,
+            run_audit,
+            scope,
+            jobs=jobs,
+            interval=interval * 60 * 60 if interval else None,
+            max_recent=recent_results,
+            on_result=on_result,
+            on_error=tpf.print_general_error,
+        )
         try:
-            audit_settings = get_audit_settings(settings_sequence)
-            # check for unused settings & warn user
-            all_repo_names = {repo.name for repo in repos}
-            for repo_name in audit_settings.keys():
-                if repo_name not in all_repo_names:
-                    tpf.print_unused_settings_warning(repo_name)
-        except Exception as e:
+            server = DaemonServer((host, port), daemon, webhook_secret)
+        except OSError as e:
             tpf.print_general_error(e)
             raise typer.Exit(1)
+        stack.callback(server.server_close)
+        if webhook_secret is None:
+            tpf.print_unsigned_webhooks_warning()
+        # stopping the daemon waits for the audits in progress, before the engines are shut down
+        stack.enter_context(daemon)
 
-    # Audit repositories
-    final_exit_code = 0  # keep track of highest exit code i.e. worst error -> ensures the command fails if any repo fails audit
-    for repo in repos:
-        tpf.print_centered_message(f"Now Auditing: {repo.url}")
-        exit_code = audit_repository(repo, gh_pat, audit_settings, modules)
-        final_exit_code = max(final_exit_code, exit_code)
+        server_host, server_port = server.server_address[:2]
+        base_url = f"http://{server_host}:{server_port}"
+        tpf.print_serving(f"{base_url}{WEBHOOK_PATH}", f"{base_url}{STATUS_PATH}")
+        # stop the same way on Ctrl-C and on the SIGTERM of a service manager
+        previous_handler = signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            tpf.print_centered_message("Stopping")
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+
+        if audit_history:
+            audit_history.finish_run(run_id, worst_exit_code)
+
+
+@app.command()
+def history(
+    view: Annotated[
+        HistoryView,
+        typer.Argument(
+            help="The query to run. "
+            "*recent* lists the latest results. "
+            "*slowest* lists the repositories with the longest average audit time. "
+            "*failing* lists the repositories whose latest audit failed, longest failing first. "
+            "*last-good* lists each repository's most recent passing result.",
+        ),
+    ] = HistoryView.RECENT,
+    org: Annotated[
+        str | None,
+        typer.Option(
+            "--org",
+            help="Only include repositories of this organization.",
+            show_default=False,
+        ),
+    ] = None,
+    repo: Annotated[
+        str | None,
+        typer.Option(
+            "--repo",
+            help="Only include repositories with this name. Used by *recent* and *last-good*.",
+            show_default=False,
+        ),
+    ] = None,
+    limit: Annotated[
+        int,
+        typer.Option(
+            "--limit",
+            "-n",
+            min=1,
+            help="The maximum number of rows listed by *recent* and *slowest*.",
+        ),
+    ] = 20,
+    days: Annotated[
+        float | None,
+        typer.Option(
+            "--days",
+            min=0,
+            help="For *slowest*, only consider audits from this many days (defaults to 30). "
+            "For *failing*, only list repositories that have not passed for at least this many days (defaults to 0).",
+            show_default=False,
+        ),
+    ] = None,
+    show_output: Annotated[
+        bool,
+        typer.Option(
+            "--output",
+            help="Print the captured RepoAuditor output of each result listed by *recent* and *last-good*.",
+            show_default=False,
+        ),
+    ] = False,
+    history_db: HistoryDbOption = None,
+) -> None:
+    """
+    Queries the history of previous `audit` runs.
+    """
+    if not (history_db or default_history_path()).exists():
+        typer.echo("No audits have been recorded yet.")
+        raise typer.Exit(0)
+
+    with AuditHistory(history_db) as audit_history:
+        if view == HistoryView.RECENT:
+            rows = audit_history.recent(limit, org, repo)
+        elif view == HistoryView.SLOWEST:
+            rows = audit_history.slowest(limit, 30 if days is None else days, org)
+        elif view == HistoryView.FAILING:
+            rows = audit_history.failing(0 if days is None else days, org)
+        else:
+            rows = audit_history.last_good(org, repo)
+    tpf.print_history(view, rows, show_output)
+
+
+def duplicate_record_message(
+    url: str, first: tuple[Path, str | None], second: tuple[Path, str | None]
+) -> str:
+    """
+    Describes a repository that appears in two records, given the report file and shard of each.
+    """
+    (first_path, first_shard), (second_path, second_shard) = first, second
+    if first_path == second_path:
+        message = f"{url} appears more than once in {first_path}."
+    else:
+        message = f"{url} appears in both {first_path} and {second_path}."
+    if first_shard and second_shard and first_shard != second_shard:
+        message += (
+            f" It was audited by both shard {first_shard} and shard {second_shard}. "
+            "Were all shards given the same `--shard-durations`?"
+        )
+    return message
+
+
+@app.command()
+def merge(
+    report_files: Annotated[
+        list[Path],
+        typer.Argument(
+            help="The `--report` files written by each shard of a sharded audit, in either format.",
+            show_default=False,
+        ),
+    ],
+    report_format: Annotated[
+        ReportFormat,
+        typer.Option(
+            "--report",
+            help="The format of the merged report. "
+            "*ndjson* writes one JSON record per line, *json* a single document with a `results` array.",
+        ),
+    ] = ReportFormat.JSON,
+    report_file: Annotated[
+        Path | None,
+        typer.Option(
+            "--report-file",
+            help="The file the merged report is written to. Defaults to stdout, in place of the summary.",
+            show_default=False,
+        ),
+    ] = None,
+) -> None:
+    """
+    Combines the reports of a sharded `audit` into one report and exits with the highest exit code of any repository.
+    Exits with code 1 if a report cannot be read, a repository appears more than once,
+    or the reports come from audits split into different numbers of shards.
+    """
+    results: list[AuditResult] = []
+    seen_urls: dict[str, tuple[Path, str | None]] = {}  # url -> report file and shard
+    seen_shards: set[str] = set()
+    shard_counts: set[str] = set()
+    final_exit_code = 0
+    try:
+        with ReportWriter(report_file, report_format) as merged:
+            for path in report_files:
+                for record in read_report(path):
+                    result = result_from_record(record)
+                    shard = record.get("shard")
+                    if result.repo.url in seen_urls:
+                        raise ReportError(
+                            duplicate_record_message(
+                                result.repo.url,
+                                seen_urls[result.repo.url],
+                                (path, shard),
+                            )
+                        )
+                    seen_urls[result.repo.url] = (path, shard)
+                    if shard:
+                        seen_shards.add(shard)
+                        shard_counts.add(shard.partition("/")[2])
+                    merged.write_record(record)
+                    results.append(dataclasses.replace(result, output=None))
+                    final_exit_code = max(final_exit_code, result.exit_code)
+        if len(shard_counts) > 1:
+            raise ReportError(
+                f"The reports come from audits split into different numbers of shards: {', '.join(sorted(shard_counts))}."
+            )
+    except (OSError, ReportError) as e:
+        tpf.print_general_error(e)
+        raise typer.Exit(1)
+
+    # a shard without any repositories writes an empty report, so missing shards are only a warning
+    for count in shard_counts:
+        for index in range(1, int(count) + 1):
+            if f"{index}/{count}" not in seen_shards:
+                tpf.print_missing_shard_warning(f"{index}/{count}")
+
+    if report_file is not None:
+        tpf.print_audit_summary(results)
     raise typer.Exit(final_exit_code)
 
 
@@ -1,17 +1,119 @@
+import asyncio
+import contextlib
+import functools
+import io
+import os
+import queue
+import shlex
+import signal
 import subprocess
+import sys
+import threading
+import time
+import traceback
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from enum import Enum
 from orgwarden.repo_crawler import Repository
 
 KNOWN_MODULES = ["GitHub", "GitHubCommunityStandards"]
+# argv prefix used to launch RepoAuditor without a shell
+REPO_AUDITOR_PROGRAM = ["uv", "run", "repo_auditor"]
+# exit code of an audit that was stopped for running too long, the same as GNU `timeout`'s
+TIMEOUT_EXIT_CODE = 124
 
+# RepoAuditor writes to the process-wide `sys.stdout` from its own worker threads,
+# so in-process audits must not overlap while their output is being redirected.
+_IN_PROCESS_LOCK = threading.Lock()
 
-def audit_repository(
+
+class AuditEngine(str, Enum):
+    """
+    Determines how RepoAuditor is executed for each repository.
+    """
+
+    SUBPROCESS = "subprocess"  # `uv run repo_auditor` in a new shell per repository
+    IN_PROCESS = "in-process"  # RepoAuditor is imported once and called directly
+    WORKER_POOL = (
+        "worker-pool"  # long-lived worker processes that each import RepoAuditor once
+    )
+    ASYNCIO = (
+        "asyncio"  # `uv run repo_auditor` children supervised by one asyncio event loop
+    )
+    BATCH = "batch"  # `uv run python` drivers that each run RepoAuditor for many repositories
+
+
+@dataclass(frozen=True)
+class AuditResult:
+    """
+    Represents the outcome of a single RepoAuditor run.
+
+    Attributes
+    __________
+    repo : Repository
+        The audited repository
+    exit_code : int
+        RepoAuditor's exit code
+    duration : float
+        Wall time of the audit in seconds
+    output : str | None
+        RepoAuditor's captured output, or None if the output was streamed to the terminal
+    reused : bool
+        Whether the result was reused from a previous run instead of running RepoAuditor
+    timed_out : bool
+        Whether RepoAuditor was stopped for running too long, in which case `exit_code` is `TIMEOUT_EXIT_CODE`
+    """
+
+    repo: Repository
+    exit_code: int
+    duration: float
+    output: str | None = None
+    reused: bool = False
+    timed_out: bool = False
+
+
+class DeadlineError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+def timed_out_result(
+    repo: Repository, duration: float, output: str | None, timeout: float
+) -> AuditResult:
+    """
+    Returns the result of an audit that was stopped after `timeout` seconds.
+    A captured `output` is kept, followed by a note that the audit timed out.
+    """
+    if output is not None:
+        output += f"\nRepoAuditor did not finish within {timeout:g} seconds and was stopped.\n"
+    return AuditResult(repo, TIMEOUT_EXIT_CODE, duration, output, timed_out=True)
+
+
+def kill_process_group(process: subprocess.Popen | asyncio.subprocess.Process) -> None:
+    """
+    Kills a child started with `start_new_session=True` together with every process it started,
+    e.g. the Python interpreter `uv run` starts RepoAuditor in.
+    """
+    if (
+        sys.platform == "win32"
+    ):  # pragma: no cover - Windows has no process groups to signal
+        process.kill()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:  # the whole group already exited
+        pass
+
+
+def build_repo_auditor_command(
     repo: Repository,
     gh_pat: str,
     audit_settings: dict[str, str] | None,
     modules: list[str] | None,
-) -> int:
+) -> str:
     """
-    Runs RepoAuditor against the specified repository and returns the resulting exit code.
+    Returns the shell command that runs RepoAuditor against the specified repository.
     """
     if not modules:
         modules = KNOWN_MODULES
@@ -25,9 +127,401 @@ def audit_repository(
     if audit_settings and repo.name in audit_settings:
         command += f" {audit_settings[repo.name]}"
 
+    return command
+
+
+def build_repo_auditor_args(
+    repo: Repository,
+    gh_pat: str,
+    audit_settings: dict[str, str] | None,
+    modules: list[str] | None,
+) -> list[str]:
+    """
+    Returns the argument vector passed to RepoAuditor for the specified repository, excluding the program name.
+    """
+    if not modules:
+        modules = KNOWN_MODULES
+
+    args: list[str] = []
+    for module in modules:
+        args += [
+            "--include",
+            module,
+            f"--{module}-url",
+            repo.url,
+            f"--{module}-pat",
+            gh_pat,
+        ]
+
+    if audit_settings and repo.name in audit_settings:
+        args += shlex.split(audit_settings[repo.name])
+
+    return args
+
+
+@functools.cache
+def load_repo_auditor_app() -> Callable | None:
+    """
+    Imports RepoAuditor's CLI application once per process.
+    Returns None if RepoAuditor cannot be imported into the current environment.
+    """
+    try:
+        from RepoAuditor.EntryPoint import app
+    except ImportError:
+        return None
+    return app
+
+
+def run_repo_auditor_in_process(args: list[str]) -> tuple[int, str]:
+    """
+    Calls RepoAuditor's entry point in the current interpreter with the provided argument vector.
+    Returns the exit code and the captured output.
+    """
+    app = load_repo_auditor_app()
+    if app is None:
+        raise ImportError("RepoAuditor cannot be imported in the current environment.")
+
+    output = io.StringIO()
+    with (
+        _IN_PROCESS_LOCK,
+        contextlib.redirect_stdout(output),
+        contextlib.redirect_stderr(output),
+    ):
+        try:
+            app(args=args, prog_name="repo_auditor")
+            exit_code = 0
+        except SystemExit as e:
+            if e.code is None:
+                exit_code = 0
+            elif isinstance(e.code, int):
+                exit_code = e.code
+            else:
+                output.write(f"{e.code}\n")
+                exit_code = 1
+        except Exception:
+            output.write(traceback.format_exc())
+            exit_code = 1
+
+    # match the exit status a child process would report, e.g. RepoAuditor's -1 becomes 255
+    return exit_code % 256, output.getvalue()
+
+
+def run_with_timeout(
+    command: str, timeout: float, *, capture: bool
+) -> tuple[int, str | None]:
+    """
+    Runs a shell command in its own process group and returns its exit code and, if `capture` is set,
+    its combined stdout and stderr.
+
+    The whole group is killed once `timeout` seconds pass or the caller is interrupted, so no grandchild
+    is left running. `subprocess.TimeoutExpired` is then raised with whatever output was captured.
+    """
+    process = subprocess.Popen(
+        command,
+        shell=True,
+        text=True,
+        stdout=subprocess.PIPE if capture else None,
+        stderr=subprocess.STDOUT if capture else None,
+        start_new_session=True,
+    )
+    try:
+        output, _ = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_process_group(process)
+        output, _ = process.communicate()
+        raise subprocess.TimeoutExpired(command, timeout, output) from None
+    except BaseException:
+        # a child in its own process group does not receive the terminal's Ctrl-C
+        kill_process_group(process)
+        process.wait()
+        raise
+    return process.returncode, output
+
+
+def audit_repository(
+    repo: Repository,
+    gh_pat: str,
+    audit_settings: dict[str, str] | None,
+    modules: list[str] | None,
+    timeout: float | None = None,
+) -> int:
+    """
+    Runs RepoAuditor against the specified repository and returns the resulting exit code.
+    Raises `subprocess.TimeoutExpired` if RepoAuditor was killed for running longer than `timeout` seconds.
+    """
+    command = build_repo_auditor_command(repo, gh_pat, audit_settings, modules)
+
+    if timeout is not None:
+        exit_code, _ = run_with_timeout(command, timeout, capture=False)
+        return exit_code
     audit_res = subprocess.run(
         command,
         shell=True,
+        check=False,
         text=True,
     )
     return audit_res.returncode
+
+
+def capture_audit(
+    repo: Repository,
+    gh_pat: str,
+    audit_settings: dict[str, str] | None,
+    modules: list[str] | None,
+    engine: AuditEngine = AuditEngine.SUBPROCESS,
+    timeout: float | None = None,
+) -> AuditResult:
+    """
+    Runs RepoAuditor against the specified repository and returns an `AuditResult`.
+    RepoAuditor's output is buffered rather than written to the terminal.
+    RepoAuditor is killed if it runs longer than `timeout` seconds.
+    Falls back to the subprocess engine if RepoAuditor cannot be imported in-process,
+    or if a `timeout` is given, since an in-process audit cannot be stopped.
+    """
+    if (
+        engine == AuditEngine.IN_PROCESS
+        and timeout is None
+        and load_repo_auditor_app() is not None
+    ):
+        args = build_repo_auditor_args(repo, gh_pat, audit_settings, modules)
+        start = time.perf_counter()
+        exit_code, output = run_repo_auditor_in_process(args)
+        return AuditResult(
+            repo=repo,
+            exit_code=exit_code,
+            duration=time.perf_counter() - start,
+            output=output,
+        )
+
+    command = build_repo_auditor_command(repo, gh_pat, audit_settings, modules)
+
+    start = time.perf_counter()
+    if timeout is not None:
+        try:
+            exit_code, output = run_with_timeout(command, timeout, capture=True)
+        except subprocess.TimeoutExpired as e:
+            return timed_out_result(
+                repo, time.perf_counter() - start, e.output or "", timeout
+            )
+        return AuditResult(repo, exit_code, time.perf_counter() - start, output)
+
+    audit_res = subprocess.run(
+        command,
+        shell=True,
+        check=False,
+        text=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    return AuditResult(
+        repo=repo,
+        exit_code=audit_res.returncode,
+        duration=time.perf_counter() - start,
+        output=audit_res.stdout,
+    )
+
+
+def prefetch[T](items: Iterable[T], maxsize: int) -> Iterator[T]:
+    """
+    Iterates `items` on a background thread, buffering up to `maxsize` items in a bounded queue.
+    This lets a slow producer (e.g. the repository crawler) run ahead of its consumer without holding every item in memory.
+    Exceptions raised by `items` are re-raised to the consumer.
+    """
+    if maxsize < 1:
+        raise ValueError("maxsize must be at least 1.")
+
+    buffer: queue.Queue[tuple[bool, object]] = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(message: tuple[bool, object]) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False  # the consumer stopped iterating
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put((False, item)):
+                    return
+        except BaseException as e:
+            put((True, e))
+        else:
+            put((True, None))
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            finished, value = buffer.get()
+            if finished:
+                if isinstance(value, BaseException):
+                    raise value
+                return
+            yield value  # type: ignore[misc]
+    finally:
+        stop.set()
+
+
+def run_audits(
+    repos: Iterable[Repository],
+    audit: Callable[[Repository], AuditResult],
+    jobs: int = 1,
+) -> Iterator[AuditResult]:
+    """
+    Calls `audit` for each repository, running up to `jobs` audits at once.
+    Repositories are pulled from `repos` only as audit slots free up, so `repos` may be a lazy stream.
+    Yields each `AuditResult` as soon as its audit finishes.
+    """
+    if jobs < 1:
+        raise ValueError("jobs must be at least 1.")
+
+    if jobs == 1:
+        for repo in repos:
+            yield audit(repo)
+        return
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        remaining = iter(repos)
+        pending: set[Future[AuditResult]] = set()
+        exhausted = False
+        repos_error: Exception | None = None
+        while True:
+            while not exhausted and len(pending) < jobs:
+                try:
+                    repo = next(remaining, None)
+                except Exception as e:
+                    # finish the audits already in flight before surfacing the error
+                    repos_error, repo = e, None
+                if repo is None:
+                    exhausted = True
+                else:
+                    pending.add(executor.submit(audit, repo))
+            if not pending:
+                if repos_error is not None:
+                    raise repos_error
+                return
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+
+
+async def audit_repository_async(
+    repo: Repository,
+    gh_pat: str,
+    audit_settings: dict[str, str] | None,
+    modules: list[str] | None,
+    timeout: float | None = None,
+) -> AuditResult:
+    """
+    Runs RepoAuditor against the specified repository as a child process of the running event loop and returns an `AuditResult`.
+    RepoAuditor's output is buffered rather than written to the terminal.
+    RepoAuditor's process group is killed if it runs longer than `timeout` seconds, or if the audit is cancelled.
+    """
+    args = build_repo_auditor_args(repo, gh_pat, audit_settings, modules)
+
+    start = time.perf_counter()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *REPO_AUDITOR_PROGRAM,
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True,
+        )
+    except OSError as e:
+        # match the exit status a shell reports for a missing command
+        return AuditResult(repo, 127, time.perf_counter() - start, f"{e}\n")
+
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except TimeoutError:
+        assert timeout is not None
+        kill_process_group(process)
+        await process.wait()
+        return timed_out_result(repo, time.perf_counter() - start, "", timeout)
+    except asyncio.CancelledError:
+        kill_process_group(process)
+        await process.wait()
+        raise
+    assert process.returncode is not None
+    return AuditResult(
+        repo=repo,
+        exit_code=process.returncode % 256,
+        duration=time.perf_counter() - start,
+        output=stdout.decode(errors="replace"),
+    )
+
+
+async def _audit_stream(
+    repos: Iterable[Repository],
+    audit: Callable[[Repository], Awaitable[AuditResult]],
+    jobs: int,
+) -> AsyncIterator[AuditResult]:
+    remaining = iter(repos)
+    # each slot is held from the moment a repository is pulled until its result is handed out
+    slots = asyncio.Semaphore(jobs)
+    pending: set[asyncio.Task[AuditResult]] = set()
+    exhausted = False
+    repos_error: Exception | None = None
+
+    try:
+        while True:
+            while not exhausted and not slots.locked():
+                await slots.acquire()
+                try:
+                    # `repos` may block while it waits for the crawler, so pull from it off the event loop
+                    repo = await asyncio.to_thread(next, remaining, None)
+                except Exception as e:
+                    # finish the audits already in flight before surfacing the error
+                    repos_error, repo = e, None
+                if repo is None:
+                    slots.release()
+                    exhausted = True
+                else:
+                    pending.add(asyncio.create_task(audit(repo)))
+            if not pending:
+                if repos_error is not None:
+                    raise repos_error
+                return
+            finished, _ = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in finished:
+                pending.discard(task)
+                slots.release()
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        # also retrieves the errors of finished audits that were never handed out
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def run_audits_async(
+    repos: Iterable[Repository],
+    audit: Callable[[Repository], Awaitable[AuditResult]],
+    jobs: int = 1,
+) -> Iterator[AuditResult]:
+    """
+    Awaits `audit` for each repository on a single event loop, running up to `jobs` audits at once.
+    Unlike `run_audits`, in-flight audits do not each need a thread, so `jobs` can be in the hundreds.
+    Repositories are pulled from `repos` only as audit slots free up, so `repos` may be a lazy stream.
+    Yields each `AuditResult` as soon as its audit finishes. Audits still running when iteration stops are cancelled.
+    """
+    if jobs < 1:
+        raise ValueError("jobs must be at least 1.")
+
+    loop = asyncio.new_event_loop()
+    stream = _audit_stream(repos, audit, jobs)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(anext(stream))
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(stream.aclose())
+        loop.close()
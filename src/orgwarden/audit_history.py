@@ -0,0 +1,304 @@
+import json
+import sqlite3
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Self
+from orgwarden.audit import AuditResult
+from orgwarden.http_cache import default_cache_dir
+
+# results buffered before they are written in a single transaction
+DEFAULT_BATCH_SIZE = 50
+SECONDS_PER_DAY = 24 * 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    target TEXT NOT NULL,
+    modules TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    exit_code INTEGER
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    org TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    url TEXT NOT NULL,
+    modules TEXT,
+    flags TEXT,
+    exit_code INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    output TEXT,
+    reused INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS results_by_repo ON results (org, repo, finished_at);
+CREATE INDEX IF NOT EXISTS results_by_exit_code ON results (org, repo, exit_code, finished_at);
+CREATE INDEX IF NOT EXISTS results_by_time ON results (finished_at);
+CREATE INDEX IF NOT EXISTS results_by_run ON results (run_id);
+"""
+
+
+class HistoryView(str, Enum):
+    """
+    The queries available through the `history` command.
+    """
+
+    RECENT = "recent"  # most recent results
+    SLOWEST = "slowest"  # repositories with the longest average audit time
+    FAILING = "failing"  # repositories whose latest audits have been failing for a number of days
+    LAST_GOOD = "last-good"  # each repository's most recent passing result
+
+
+def default_history_path() -> Path:
+    """
+    Returns the default location of the audit history database, next to the HTTP response cache.
+    """
+    return default_cache_dir().parent / "history.sqlite3"
+
+
+class AuditHistory:
+    """
+    A local SQLite database of every audit run and the result of each repository it audited.
+
+    Results passed to `record` are buffered and written `batch_size` at a time in a single transaction,
+    so recording results does not slow down concurrent audits. Buffered results are written by `flush`,
+    `finish_run` and `close`. Use as a context manager, or call `close` when finished.
+
+    Attributes
+    __________
+    path : Path
+        The SQLite database file
+    batch_size : int
+        Number of buffered results that triggers a write
+    """
+
+    def __init__(
+        self, path: Path | None = None, *, batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+
+        self.path = path or default_history_path()
+        self.batch_size = batch_size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        # WAL lets `history` read the database while an audit is writing to it
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        self._pending: list[tuple] = []
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def start_run(self, target: str, modules: list[str] | None) -> int:
+        """
+        Records the start of an audit of `target`, an organization or repository URL, and returns the run's id.
+        """
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO runs (target, modules, started_at) VALUES (?, ?, ?)",
+                (target, json.dumps(modules), time.time()),
+            )
+        assert cursor.lastrowid is not None
+        return cursor.lastrowid
+
+    def record(
+        self,
+        run_id: int,
+        result: AuditResult,
+        modules: list[str] | None,
+        flags: str | None,
+    ) -> None:
+        """
+        Buffers a repository's result, writing the buffer once it holds `batch_size` results.
+        """
+        finished_at = time.time()
+        row = (
+            run_id,
+            result.repo.org,
+            result.repo.name,
+            result.repo.url,
+            json.dumps(modules),
+            flags,
+            result.exit_code,
+            finished_at - result.duration,
+            finished_at,
+            result.duration,
+            result.output,
+            int(result.reused),
+        )
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._write_pending()
+
+    def flush(self) -> None:
+        """
+        Writes all buffered results.
+        """
+        with self._lock:
+            self._write_pending()
+
+    def finish_run(self, run_id: int, exit_code: int) -> None:
+        """
+        Writes all buffered results and records the end of the run.
+        """
+        with self._lock, self._connection:
+            self._write_pending()
+            self._connection.execute(
+                "UPDATE runs SET finished_at = ?, exit_code = ? WHERE id = ?",
+                (time.time(), exit_code, run_id),
+            )
+
+    def close(self) -> None:
+        """
+        Writes all buffered results and closes the database.
+        """
+        self.flush()
+        self._connection.close()
+
+    def _write_pending(self) -> None:
+        if not self._pending:
+            return
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO results (run_id, org, repo, url, modules, flags, exit_code, "
+                "started_at, finished_at, duration, output, reused) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+        self._pending.clear()
+
+    def recent(
+        self, limit: int, org: str | None = None, repo: str | None = None
+    ) -> list[sqlite3.Row]:
+        """
+        Returns the most recent results, newest first.
+        """
+        return self._query(
+            """
+            SELECT run_id, org, repo, exit_code, finished_at, duration, reused, output
+            FROM results
+            WHERE (:org IS NULL OR org = :org) AND (:repo IS NULL OR repo = :repo)
+            ORDER BY finished_at DESC
+            LIMIT :limit
+            """,
+            {"org": org, "repo": repo, "limit": limit},
+        )
+
+    def slowest(
+        self, limit: int, days: float, org: str | None = None
+    ) -> list[sqlite3.Row]:
+        """
+        Returns the repositories with the longest average audit time over the last `days` days, slowest first.
+        Reused results are not counted.
+        """
+        return self._query(
+            """
+            SELECT org, repo, COUNT(*) AS audits, AVG(duration) AS average_duration,
+                MAX(duration) AS max_duration
+            FROM results
+            WHERE finished_at >= :since AND NOT reused AND (:org IS NULL OR org = :org)
+            GROUP BY org, repo
+            ORDER BY average_duration DESC
+            LIMIT :limit
+            """,
+            {"since": time.time() - days * SECONDS_PER_DAY, "org": org, "limit": limit},
+        )
+
+    def repo_stats(self, days: float) -> list[sqlite3.Row]:
+        """
+        Returns each repository's average audit time over the last `days` days and the time of its last audit.
+        Reused results are not counted, since they were not audited in their run.
+        """
+        return self._query(
+            """
+            SELECT org, repo,
+                AVG(CASE WHEN finished_at >= :since THEN duration END) AS average_duration,
+                MAX(finished_at) AS last_audited
+            FROM results
+            WHERE NOT reused
+            GROUP BY org, repo
+            """,
+            {"since": time.time() - days * SECONDS_PER_DAY},
+        )
+
+    def failing(self, days: float, org: str | None = None) -> list[sqlite3.Row]:
+        """
+        Returns the repositories whose latest result failed and that have not passed for at least `days` days,
+        longest failing first.
+        """
+        return self._query(
+            """
+            WITH latest AS (
+                SELECT org, repo, MAX(finished_at) AS finished_at
+                FROM results
+                WHERE :org IS NULL OR org = :org
+                GROUP BY org, repo
+            ),
+            last_good AS (
+                SELECT org, repo, MAX(finished_at) AS finished_at
+                FROM results
+                WHERE exit_code = 0
+                GROUP BY org, repo
+            ),
+            failing AS (
+                SELECT r.org, r.repo, r.exit_code, last_good.finished_at AS last_good,
+                    (
+                        SELECT MIN(f.finished_at) FROM results AS f
+                        WHERE f.org = r.org AND f.repo = r.repo
+                            AND f.finished_at > COALESCE(last_good.finished_at, 0)
+                    ) AS failing_since
+                FROM latest
+                JOIN results AS r
+                    ON r.org = latest.org AND r.repo = latest.repo
+                    AND r.finished_at = latest.finished_at
+                LEFT JOIN last_good
+                    ON last_good.org = latest.org AND last_good.repo = latest.repo
+                WHERE r.exit_code != 0
+            )
+            SELECT * FROM failing
+            WHERE failing_since <= :cutoff
+            ORDER BY failing_since
+            """,
+            {"org": org, "cutoff": time.time() - days * SECONDS_PER_DAY},
+        )
+
+    def last_good(
+        self, org: str | None = None, repo: str | None = None
+    ) -> list[sqlite3.Row]:
+        """
+        Returns each repository's most recent passing result.
+        """
+        return self._query(
+            """
+            SELECT r.run_id, r.org, r.repo, r.finished_at, r.duration, r.output
+            FROM results AS r
+            JOIN (
+                SELECT org, repo, MAX(finished_at) AS finished_at
+                FROM results
+                WHERE exit_code = 0
+                    AND (:org IS NULL OR org = :org) AND (:repo IS NULL OR repo = :repo)
+                GROUP BY org, repo
+            ) AS good
+                ON r.org = good.org AND r.repo = good.repo AND r.finished_at = good.finished_at
+            ORDER BY r.org, r.repo
+            """,
+            {"org": org, "repo": repo},
+        )
+
+    def _query(self, sql: str, params: dict) -> list[sqlite3.Row]:
+        self.flush()
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
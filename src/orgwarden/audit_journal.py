@@ -0,0 +1,168 @@
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Self, TextIO
+from orgwarden.audit import AuditResult
+from orgwarden.http_cache import default_cache_dir
+from orgwarden.report import ReportError, result_from_record
+
+# incremented whenever the journal's lines change meaning, journals of another version are not resumed
+JOURNAL_VERSION = 1
+
+
+def run_fingerprint(
+    target_urls: list[str],
+    modules: list[str] | None,
+    audit_settings: dict[str, str] | None,
+    include_all_private_repos: bool,
+    included_private_repos: list[str],
+    shard: str | None = None,
+) -> str:
+    """
+    Returns a fingerprint of everything that determines which repositories an audit run covers and how they are audited:
+    its targets, modules, settings, included private repositories and shard.
+    """
+    data = {
+        "targets": target_urls,
+        "modules": sorted(modules) if modules else None,
+        "settings": audit_settings,
+        "include_all_private_repos": include_all_private_repos,
+        "included_private_repos": sorted(included_private_repos),
+        "shard": shard,
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def default_journal_path(fingerprint: str) -> Path:
+    """
+    Returns the default location of the journal of the run with `fingerprint`, next to the HTTP response cache.
+    """
+    return default_cache_dir().parent / "journals" / f"{fingerprint[:16]}.ndjson"
+
+
+class AuditJournal:
+    """
+    An append-only file of the repositories an audit run has finished, so an interrupted run can resume where it stopped.
+
+    The first line identifies the run by its fingerprint, and every following line holds one repository's exit code
+    and duration. Lines are flushed to disk as soon as they are recorded, so a run that is killed loses at most
+    the repository it was writing. Use as a context manager, or call `open` and `close`.
+
+    Attributes
+    __________
+    fingerprint : str
+        `run_fingerprint` of the run
+    path : Path
+        NDJSON file that holds the journal
+    resume : bool
+        Whether the results already in the journal are kept, rather than starting over
+    completed : dict[str, AuditResult]
+        Results read from the journal when resuming, by repository url
+    mismatched : bool
+        Whether resuming found a journal of a different run, which was discarded
+    """
+
+    def __init__(
+        self, fingerprint: str, path: Path | None = None, *, resume: bool = False
+    ):
+        self.fingerprint = fingerprint
+        self.path = path or default_journal_path(fingerprint)
+        self.resume = resume
+        self.completed: dict[str, AuditResult] = {}
+        self.mismatched = False
+        self._file: TextIO | None = None
+
+    def __enter__(self) -> Self:
+        self.open()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """
+        Reads the completed results when resuming, then starts the journal over with only those results.
+        """
+        if self.resume:
+            self.completed = self._load()
+        lines = [self._header(), *map(self._line, self.completed.values())]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # rewrite through a temporary file so an interrupted rewrite keeps the previous journal
+        fd, temp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        os.replace(temp_path, self.path)
+        self._file = self.path.open("a", encoding="utf-8")
+
+    def _load(self) -> dict[str, AuditResult]:
+        try:
+            with self.path.open(encoding="utf-8") as f:
+                header = f.readline()
+                try:
+                    header = json.loads(header)
+                except ValueError:
+                    header = None
+                if (
+                    not isinstance(header, dict)
+                    or header.get("version") != JOURNAL_VERSION
+                    or header.get("fingerprint") != self.fingerprint
+                ):
+                    self.mismatched = True
+                    return {}
+                completed = {}
+                for line in f:
+                    try:
+                        result = result_from_record(json.loads(line))
+                    except (ValueError, ReportError):  # e.g. a line cut off by a crash
+                        continue
+                    completed[result.repo.url] = dataclasses.replace(
+                        result, reused=True
+                    )
+                return completed
+        except FileNotFoundError:
+            return {}
+
+    def _header(self) -> str:
+        return (
+            json.dumps({"version": JOURNAL_VERSION, "fingerprint": self.fingerprint})
+            + "\n"
+        )
+
+    @staticmethod
+    def _line(result: AuditResult) -> str:
+        record = {
+            "org": result.repo.org,
+            "repo": result.repo.name,
+            "url": result.repo.url,
+            "exit_code": result.exit_code,
+            "duration": result.duration,
+        }
+        return json.dumps(record) + "\n"
+
+    def record(self, result: AuditResult) -> None:
+        """
+        Appends a finished repository's result and flushes it to disk.
+        """
+        if self._file is None:
+            raise RuntimeError("The journal is not open.")
+        self._file.write(self._line(result))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """
+        Closes the journal, keeping its file so the run can be resumed.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        """
+        Closes and deletes the journal, once its run has finished.
+        """
+        self.close()
+        self.path.unlink(missing_ok=True)
@@ -1,6 +1,7 @@
 import re
 import typer
 from dataclasses import dataclass
+from orgwarden import tracing
 
 
 @dataclass(frozen=True)
@@ -43,13 +44,14 @@ def get_audit_settings(settings_sequence: list[RepoAuditSettings]) -> dict[str,
 
     audit_settings: dict[str, str] = {}
 
-    for repo_settings in settings_sequence:
-        repo_name, cli_flags = repo_settings.repo_name, repo_settings.cli_flags
-        if repo_name in audit_settings:
-            raise ValueError(
-                f"Repository settings sequence contains multiple entries for {repo_name}."
-            )
-        if cli_flags:  # skip empty string
-            audit_settings[repo_name] = cli_flags
+    with tracing.span("get_audit_settings", "settings", entries=len(settings_sequence)):
+        for repo_settings in settings_sequence:
+            repo_name, cli_flags = repo_settings.repo_name, repo_settings.cli_flags
+            if repo_name in audit_settings:
+                raise ValueError(
+                    f"Repository settings sequence contains multiple entries for {repo_name}."
+                )
+            if cli_flags:  # skip empty string
+                audit_settings[repo_name] = cli_flags
 
     return audit_settings
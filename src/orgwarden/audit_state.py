@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Self
+from orgwarden.audit import AuditResult
+from orgwarden.http_cache import default_cache_dir
+from orgwarden.repository import Repository
+
+
+def default_state_path() -> Path:
+    """
+    Returns the default location of the incremental audit state, next to the HTTP response cache.
+    """
+    return default_cache_dir().parent / "audit-state.json"
+
+
+def audit_fingerprint(
+    repo: Repository,
+    modules: list[str] | None,
+    flags: str | None,
+) -> str | None:
+    """
+    Returns a fingerprint of everything that determines a repository's audit result:
+    its last push and update times, the audited modules, and its RepoAuditor flags.
+    Returns None if the repository's timestamps are unknown, in which case it cannot be skipped.
+    """
+    if repo.pushed_at is None and repo.updated_at is None:
+        return None
+    data = {
+        "url": repo.url,
+        "pushed_at": repo.pushed_at,
+        "updated_at": repo.updated_at,
+        "modules": sorted(modules) if modules else None,
+        "flags": flags,
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+class AuditStateStore:
+    """
+    Remembers the fingerprint and result of each repository's last audit, so unchanged repositories can be skipped.
+
+    Entries are kept in memory and written to `path` by `save`, or when used as a context manager.
+
+    Attributes
+    __________
+    path : Path
+        JSON file that holds the audit state
+    max_age : float | None
+        Seconds after which a stored result is no longer reused, or None to reuse results indefinitely
+    """
+
+    def __init__(self, path: Path | None = None, *, max_age: float | None = None):
+        if max_age is not None and max_age < 0:
+            raise ValueError("max_age cannot be negative.")
+
+        self.path = path or default_state_path()
+        self.max_age = max_age
+        self._entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> Self:
+        self.load()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.save()
+
+    def load(self) -> None:
+        """
+        Reads the stored entries from `path`. A missing or unreadable file is treated as empty.
+        """
+        try:
+            with self.path.open(encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        with self._lock:
+            self._entries = entries if isinstance(entries, dict) else {}
+
+    def save(self) -> None:
+        """
+        Writes all entries to `path`.
+        """
+        with self._lock:
+            data = json.dumps(self._entries)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first so an interrupted run never leaves a partial file
+        fd, temp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
+
+    def lookup(self, repo: Repository, fingerprint: str | None) -> AuditResult | None:
+        """
+        Returns the repository's previous result if its fingerprint is unchanged and the result is not older than `max_age`.
+        """
+        if fingerprint is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(repo.url)
+        if not isinstance(entry, dict) or entry.get("fingerprint") != fingerprint:
+            return None
+        if (
+            self.max_age is not None
+            and time.time() - entry.get("audited_at", 0) > self.max_age
+        ):
+            return None
+        return AuditResult(
+            repo=repo,
+            exit_code=entry.get("exit_code", 1),
+            duration=entry.get("duration", 0.0),
+            reused=True,
+        )
+
+    def record(self, result: AuditResult, fingerprint: str | None) -> None:
+        """
+        Stores a fresh result under its repository's fingerprint. Reused results keep their original audit time,
+        and timed out results are not stored, so the repository is audited again.
+        """
+        if fingerprint is None or result.reused or result.timed_out:
+            return
+        with self._lock:
+            self._entries[result.repo.url] = {
+                "fingerprint": fingerprint,
+                "exit_code": result.exit_code,
+                "duration": result.duration,
+                "audited_at": time.time(),
+            }
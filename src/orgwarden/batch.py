@@ -0,0 +1,214 @@
+import json
+import queue
+import subprocess
+import threading
+import time
+from typing import Self
+from orgwarden.audit import (
+    AuditResult,
+    build_repo_auditor_args,
+    kill_process_group,
+    timed_out_result,
+)
+from orgwarden.repository import Repository
+
+DEFAULT_BATCH_SIZE = 20
+# argv prefix of the interpreter RepoAuditor is installed in, the one `uv run repo_auditor` uses
+REPO_AUDITOR_PYTHON = ["uv", "run", "python"]
+
+# Runs in RepoAuditor's interpreter, which need not have OrgWarden installed, so it only uses the standard library.
+# Reads one JSON argument vector per line and answers each with a JSON line of [exit code, output].
+# File descriptors 1 and 2 are pointed at a temporary file during each audit, so the output of RepoAuditor and of
+# any process it starts is kept per repository and can never corrupt the answers, which use a duplicate of stdout.
+BATCH_DRIVER_SCRIPT = r"""
+import json, os, sys, tempfile, traceback
+from RepoAuditor.EntryPoint import app
+
+tasks = os.fdopen(os.dup(0), "r")
+answers = os.fdopen(os.dup(1), "w")
+os.dup2(os.open(os.devnull, os.O_RDONLY), 0)
+saved_stdout, saved_stderr = os.dup(1), os.dup(2)
+for line in tasks:
+    with tempfile.TemporaryFile("w+", errors="replace") as output:
+        os.dup2(output.fileno(), 1)
+        os.dup2(output.fileno(), 2)
+        try:
+            app(args=json.loads(line), prog_name="repo_auditor")
+            exit_code = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                exit_code = e.code or 0
+            else:
+                print(e.code)
+                exit_code = 1
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved_stdout, 1)
+            os.dup2(saved_stderr, 2)
+        output.seek(0)
+        answers.write(json.dumps([exit_code % 256, output.read()]) + "\n")
+        answers.flush()
+"""
+
+
+class BatchDriver:
+    """
+    One RepoAuditor interpreter that audits up to `batch_size` repositories, one after another.
+
+    The driver runs in its own process group, which is killed as a whole if an audit times out.
+
+    Attributes
+    __________
+    batch_size : int
+        Number of audits after which the driver exits
+    audits : int
+        Number of audits the driver has run
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self.audits = 0
+        self._process = subprocess.Popen(
+            [*REPO_AUDITOR_PYTHON, "-c", BATCH_DRIVER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            start_new_session=True,
+        )
+        # answers are read on a thread so waiting for one can time out
+        self._answers: queue.Queue[str | None] = queue.Queue()
+        threading.Thread(target=self._read_answers, daemon=True).start()
+
+    def _read_answers(self) -> None:
+        assert self._process.stdout is not None
+        for line in self._process.stdout:
+            self._answers.put(line)
+        self._answers.put(None)  # the driver exited
+
+    @property
+    def alive(self) -> bool:
+        return self._process.poll() is None and self.audits < self.batch_size
+
+    def run(self, args: list[str], timeout: float | None) -> tuple[int, str] | None:
+        """
+        Runs RepoAuditor with the provided argument vector and returns the exit code and captured output,
+        or None if it did not finish within `timeout` seconds, in which case the driver is killed.
+        """
+        assert self._process.stdin is not None
+        self.audits += 1
+        try:
+            self._process.stdin.write(json.dumps(args) + "\n")
+            self._process.stdin.flush()
+            answer = self._answers.get(timeout=timeout)
+        except queue.Empty:
+            self.kill()
+            return None
+        except BrokenPipeError:
+            answer = None
+        except BaseException:
+            # e.g. Ctrl-C, which a driver in its own process group does not receive
+            self.kill()
+            raise
+        if answer is None:
+            self.kill()
+            return (
+                1,
+                f"The RepoAuditor batch driver exited unexpectedly (exit code {self._process.returncode}).\n",
+            )
+        exit_code, output = json.loads(answer)
+        if self.audits >= self.batch_size:
+            self.close()
+        return exit_code, output
+
+    def close(self) -> None:
+        """
+        Lets the driver exit once it finishes its current audit, and waits for it.
+        """
+        assert self._process.stdin is not None
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._process.wait()
+
+    def kill(self) -> None:
+        """
+        Kills the driver and every process it started.
+        """
+        kill_process_group(self._process)
+        self._process.wait()
+
+
+class BatchAuditor:
+    """
+    Audits repositories through `BatchDriver`s, so RepoAuditor's interpreter start-up and imports are paid
+    once per `batch_size` repositories instead of once per repository.
+
+    Each thread that calls `audit` gets its own driver, so `--jobs` drivers run at once, and a driver is
+    replaced once it has run `batch_size` audits, timed out or crashed.
+    Use as a context manager, or call `close` when finished.
+
+    Attributes
+    __________
+    batch_size : int
+        Number of repositories each driver audits
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+
+        self.batch_size = batch_size
+        self._drivers: dict[int, BatchDriver] = {}  # thread id -> driver
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def audit(
+        self,
+        repo: Repository,
+        gh_pat: str,
+        audit_settings: dict[str, str] | None,
+        modules: list[str] | None,
+        timeout: float | None = None,
+    ) -> AuditResult:
+        """
+        Runs RepoAuditor against the specified repository on the calling thread's driver and returns an `AuditResult`.
+        The driver is killed if the audit does not finish within `timeout` seconds.
+        """
+        args = build_repo_auditor_args(repo, gh_pat, audit_settings, modules)
+        thread_id = threading.get_ident()
+        start = time.perf_counter()
+        with self._lock:
+            driver = self._drivers.get(thread_id)
+            if driver is None or not driver.alive:
+                try:
+                    driver = self._drivers[thread_id] = BatchDriver(self.batch_size)
+                except OSError as e:
+                    # match the exit status a shell reports for a missing command
+                    return AuditResult(repo, 127, time.perf_counter() - start, f"{e}\n")
+
+        answer = driver.run(args, timeout)
+        if answer is None:
+            assert timeout is not None
+            return timed_out_result(repo, time.perf_counter() - start, "", timeout)
+        exit_code, output = answer
+        return AuditResult(repo, exit_code, time.perf_counter() - start, output)
+
+    def close(self) -> None:
+        """
+        Lets every driver finish its current audit and exit.
+        """
+        with self._lock:
+            drivers = list(self._drivers.values())
+            self._drivers.clear()
+        for driver in drivers:
+            driver.close()
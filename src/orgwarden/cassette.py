@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zlib
+from enum import Enum
+from http import HTTPStatus
+from pathlib import Path
+from typing import Self
+from urllib.parse import urlencode
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_VERSION = 1
+INDEX_FILE = "index.json"
+BODIES_FILE = "bodies.bin"
+
+
+class CassetteMode(str, Enum):
+    """
+    Determines whether a `Cassette` saves or serves GitHub API responses.
+    """
+
+    RECORD = "record"  # requests go to GitHub and every response is saved
+    REPLAY = (
+        "replay"  # responses are served from the cassette, nothing is sent to GitHub
+    )
+
+
+class CassetteError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class Cassette:
+    """
+    A directory of recorded GitHub API request/response pairs, used to replay a crawl offline.
+
+    Each response's status, url and headers are kept in an index keyed by the request's method, url,
+    query parameters and body, while the bodies are compressed and appended to a single data file.
+    Responses to a repeated request are replayed in the order they were recorded, and the last one is
+    served again once they run out. Tokens are never written to the cassette.
+    A single `Cassette` is safe to share between threads and clients.
+    Use as a context manager, or call `close` when finished, which writes the index of a recording.
+
+    Attributes
+    __________
+    directory : Path
+        Directory that holds the index and data files
+    mode : CassetteMode
+        Whether responses are recorded or replayed
+    """
+
+    def __init__(self, directory: Path, mode: CassetteMode):
+        self.directory = directory
+        self.mode = mode
+        self._interactions: dict[str, list[dict]] = {}
+        self._replayed: dict[str, int] = {}  # key -> number of responses served
+        self._lock = threading.Lock()
+
+        if mode == CassetteMode.RECORD:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # the index of an earlier recording would point into the truncated data file
+            (self.directory / INDEX_FILE).unlink(missing_ok=True)
+            self._bodies = (self.directory / BODIES_FILE).open("wb")
+            self._size = 0
+        else:
+            try:
+                with (self.directory / INDEX_FILE).open(encoding="utf-8") as f:
+                    index = json.load(f)
+                self._bodies = (self.directory / BODIES_FILE).open("rb")
+            except (OSError, ValueError) as e:
+                raise CassetteError(f"{self.directory} is not a readable cassette: {e}")
+            if (
+                not isinstance(index, dict)
+                or index.get("version") != CASSETTE_VERSION
+                or not isinstance(index.get("interactions"), dict)
+            ):
+                self._bodies.close()
+                raise CassetteError(
+                    f"{self.directory} was recorded by an unsupported version of OrgWarden."
+                )
+            self._interactions = index["interactions"]
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == CassetteMode.REPLAY
+
+    @staticmethod
+    def key(
+        method: str, url: str, params: dict | None = None, body: object = None
+    ) -> str:
+        """
+        Returns the key of a request. Query parameters are sorted so their order does not matter.
+        """
+        key = f"{method} {url}"
+        if params:
+            key += f"?{urlencode(sorted(params.items()))}"
+        if body is not None:
+            digest = hashlib.sha256(json.dumps(body, sort_keys=True).encode())
+            key += f" {digest.hexdigest()}"
+        return key
+
+    def record(self, key: str, res: requests.Response) -> None:
+        """
+        Saves the response to the request identified by `key`.
+        """
+        body = zlib.compress(res.content)
+        with self._lock:
+            offset = self._size
+            self._bodies.write(body)
+            self._size += len(body)
+            self._interactions.setdefault(key, []).append(
+                {
+                    "status": res.status_code,
+                    "url": res.url,
+                    "headers": dict(res.headers),
+                    "offset": offset,
+                    "length": len(body),
+                }
+            )
+
+    def replay(self, key: str) -> requests.Response:
+        """
+        Returns the next recorded response to the request identified by `key`.
+        Raises a `CassetteError` if the request was never recorded.
+        """
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                raise CassetteError(
+                    f"No response to '{key}' was recorded in {self.directory}."
+                )
+            position = self._replayed.get(key, 0)
+            self._replayed[key] = position + 1
+            interaction = interactions[min(position, len(interactions) - 1)]
+            self._bodies.seek(interaction["offset"])
+            body = self._bodies.read(interaction["length"])
+
+        res = requests.Response()
+        res.status_code = interaction["status"]
+        res.reason = _reason(interaction["status"])
+        res.url = interaction["url"]
+        res.headers = CaseInsensitiveDict(interaction["headers"])
+        # bodies are stored decoded, so the recorded transfer encoding no longer applies
+        res.headers.pop("Content-Encoding", None)
+        res._content = zlib.decompress(body)
+        res.encoding = "utf-8"
+        res.from_cassette = True  # type: ignore[attr-defined]
+        return res
+
+    def close(self) -> None:
+        """
+        Closes the data file. When recording, also writes the index.
+        """
+        if self._bodies.closed:
+            return
+        self._bodies.close()
+        if self.mode != CassetteMode.RECORD:
+            return
+        with self._lock:
+            data = json.dumps(
+                {"version": CASSETTE_VERSION, "interactions": self._interactions}
+            )
+        # write to a temporary file first so an interrupted recording never leaves a partial index
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_path, self.directory / INDEX_FILE)
+
+
+def _reason(status: int) -> str:
+    try:
+        return HTTPStatus(status).phrase
+    except ValueError:
+        return ""
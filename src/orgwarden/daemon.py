@@ -0,0 +1,441 @@
+import hashlib
+import hmac
+import http.server
+import json
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from datetime import UTC, datetime
+from typing import Self
+from orgwarden.audit import AuditResult
+from orgwarden.repo_crawler import APIError, repository_from_entry
+from orgwarden.repository import Repository
+from orgwarden.url_tools import ParsedURL, validate_url
+
+DEFAULT_PORT = 8787
+RECENT_RESULTS = 50  # results listed by the status endpoint
+WEBHOOK_PATH = "/webhook"
+STATUS_PATH = "/status"
+MAX_WEBHOOK_BODY = 25 * 1024 * 1024  # GitHub caps webhook payloads at 25 MB
+# webhook events that re-audit their repository, every other event is acknowledged and ignored
+AUDITED_EVENTS = {"push", "repository"}
+
+
+def verify_signature(secret: str, body: bytes, signature: str | None) -> bool:
+    """
+    Returns whether `signature`, the `X-Hub-Signature-256` header of a webhook delivery, matches `body` signed with `secret`.
+    """
+    if not signature:
+        return False
+    expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def format_time(timestamp: float | None) -> str | None:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, UTC).isoformat(timespec="seconds")
+
+
+class TargetScope:
+    """
+    Decides which repositories named by webhook events are audited: the repositories of the organization targets
+    that their listing includes, and the repository targets themselves.
+    Names are compared case-insensitively, as GitHub does.
+
+    Attributes
+    __________
+    specific_included_private_repos : set[str]
+        Names of private repositories included in the organization targets
+    include_all_private_repos : bool
+        Whether every private repository of the organization targets is included
+    """
+
+    def __init__(
+        self,
+        targets: Iterable[tuple[str, ParsedURL]],
+        specific_included_private_repos: set[str],
+        include_all_private_repos: bool,
+    ):
+        self.specific_included_private_repos = specific_included_private_repos
+        self.include_all_private_repos = include_all_private_repos
+        self._orgs: dict[tuple[str, str], str] = {}  # (hostname, org) -> org target
+        self._repos: dict[tuple[str, str, str], Repository] = {}
+        for url, parsed_url in targets:
+            hostname, org = (
+                parsed_url.hostname.casefold(),
+                parsed_url.org_name.casefold(),
+            )
+            if parsed_url.repo_name:
+                self._repos[(hostname, org, parsed_url.repo_name.casefold())] = (
+                    Repository(parsed_url.repo_name, url, parsed_url.org_name)
+                )
+            else:
+                self._orgs[(hostname, org)] = parsed_url.org_name
+
+    def repository(self, repo_entry: dict) -> Repository | None:
+        """
+        Returns the `Repository` described by the `repository` entry of a webhook event,
+        or None if it is not one of the targets' repositories or the entry is malformed.
+        """
+        try:
+            parsed_url = validate_url(repo_entry["html_url"])
+            if not parsed_url.repo_name:
+                return None
+            hostname = parsed_url.hostname.casefold()
+            org = parsed_url.org_name.casefold()
+            repo = self._repos.get((hostname, org, parsed_url.repo_name.casefold()))
+            if repo is not None:
+                return repo
+            org_target = self._orgs.get((hostname, org))
+            if org_target is None:
+                return None
+            return repository_from_entry(
+                repo_entry,
+                org_target,
+                self.specific_included_private_repos,
+                self.include_all_private_repos,
+            )
+        except (KeyError, TypeError, ValueError, APIError):
+            return None
+
+
+class AuditDaemon:
+    """
+    Keeps an inventory of repositories and audits them on `jobs` threads: every repository once it is listed,
+    again every `interval` seconds, and single repositories as soon as a webhook event reports a change.
+
+    Repositories queued by events are audited ahead of those queued by the schedule. A repository is queued at most
+    once at a time, and is never audited by two threads at once. `on_result` is called with one result at a time.
+    Use as a context manager, or call `start` and `stop`.
+
+    Attributes
+    __________
+    list_repos : Callable[[], Iterable[Repository]]
+        Lists every repository the daemon audits
+    audit : Callable[[Repository], AuditResult]
+        Audits one repository
+    scope : TargetScope
+        Decides which repositories named by webhook events are audited
+    jobs : int
+        Number of repositories audited concurrently
+    interval : float | None
+        Seconds between listing and auditing every repository, or None to only do so on start
+    inventory : dict[str, Repository]
+        The repositories the daemon audits, by url
+    recent : deque[dict]
+        Summaries of the most recent results, newest first
+    audited : int
+        Number of audits that finished
+    last_refresh : float | None
+        Unix time the inventory was last listed
+    next_refresh : float | None
+        Unix time the inventory is listed next
+    """
+
+    def __init__(
+        self,
+        list_repos: Callable[[], Iterable[Repository]],
+        audit: Callable[[Repository], AuditResult],
+        scope: TargetScope,
+        *,
+        jobs: int = 1,
+        interval: float | None = None,
+        max_recent: int = RECENT_RESULTS,
+        on_result: Callable[[AuditResult], None] | None = None,
+        on_error: Callable[[Exception], None] | None = None,
+    ):
+        if jobs < 1:
+            raise ValueError("jobs must be at least 1.")
+        if interval is not None and interval <= 0:
+            raise ValueError("interval must be positive.")
+
+        self.list_repos = list_repos
+        self.audit = audit
+        self.scope = scope
+        self.jobs = jobs
+        self.interval = interval
+        self.inventory: dict[str, Repository] = {}
+        self.recent: deque[dict] = deque(maxlen=max_recent)
+        self.audited = 0
+        self.last_refresh: float | None = None
+        self.next_refresh: float | None = None
+        self._on_result = on_result
+        self._on_error = on_error
+        # queued repositories by url, dicts keep them in the order they were queued
+        self._urgent: dict[str, Repository] = {}
+        self._scheduled: dict[str, Repository] = {}
+        self._in_progress: dict[str, Repository] = {}
+        self._condition = threading.Condition()
+        self._result_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._workers: list[threading.Thread] = []
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def queue_depth(self) -> int:
+        with self._condition:
+            return len(self._urgent) + len(self._scheduled)
+
+    def start(self) -> None:
+        """
+        Starts the audit threads, and the thread that lists and queues every repository now and every `interval` seconds.
+        """
+        for _ in range(self.jobs):
+            worker = threading.Thread(target=self._work, daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        # not joined by `stop`, a listing in progress is abandoned
+        threading.Thread(target=self._refresh_periodically, daemon=True).start()
+
+    def stop(self) -> None:
+        """
+        Drops the queued repositories and waits for the audits in progress to finish.
+        """
+        with self._condition:
+            self._stop_event.set()
+            self._urgent.clear()
+            self._scheduled.clear()
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join()
+        self._workers.clear()
+
+    def enqueue(self, repo: Repository, *, urgent: bool = False) -> bool:
+        """
+        Queues a repository's audit, ahead of the scheduled ones if `urgent`.
+        Returns False if the repository was already queued, or the daemon is stopping.
+        A repository being audited is queued again, since the running audit may predate the change.
+        """
+        with self._condition:
+            if self._stop_event.is_set() or repo.url in self._urgent:
+                return False
+            if urgent:
+                self._scheduled.pop(repo.url, None)
+                self._urgent[repo.url] = repo
+            elif repo.url in self._scheduled:
+                return False
+            else:
+                self._scheduled[repo.url] = repo
+            self._condition.notify()
+            return True
+
+    def refresh(self) -> None:
+        """
+        Lists the repositories again, replaces the inventory with them and queues every one of them.
+        """
+        repos = list(self.list_repos())
+        with self._condition:
+            self.inventory = {repo.url: repo for repo in repos}
+            self.last_refresh = time.time()
+        for repo in repos:
+            self.enqueue(repo)
+
+    def handle_event(self, event: str, payload: dict) -> list[Repository]:
+        """
+        Updates the inventory for a GitHub webhook event, e.g. a push or a repository that was created, renamed or
+        archived, and queues the repository it changed ahead of the scheduled audits. Returns the queued repositories.
+        Deleted repositories, and repositories that left the targets, e.g. by becoming private, are dropped instead.
+        Events about other repositories, and other kinds of events, are ignored.
+        """
+        repo_entry = payload.get("repository")
+        if event not in AUDITED_EVENTS or not isinstance(repo_entry, dict):
+            return []
+        action = payload.get("action") if event == "repository" else None
+        repo = self.scope.repository(repo_entry)
+        with self._condition:
+            if action == "renamed":
+                old_repo = self.scope.repository(self._renamed_from(payload))
+                if old_repo is not None:
+                    self._drop(old_repo.url)
+            if repo is None or action == "deleted":
+                self._drop(repo.url if repo else repo_entry.get("html_url", ""))
+                return []
+            self.inventory[repo.url] = repo
+        return [repo] if self.enqueue(repo, urgent=True) else []
+
+    @staticmethod
+    def _renamed_from(payload: dict) -> dict:
+        """
+        Returns the repository entry of a `renamed` event as it was before the rename.
+        """
+        repo_entry = payload["repository"]
+        try:
+            old_name = payload["changes"]["repository"]["name"]["from"]
+            html_url = repo_entry["html_url"].rsplit("/", 1)[0] + "/" + old_name
+        except (KeyError, TypeError, AttributeError):
+            return {}
+        return {**repo_entry, "name": old_name, "html_url": html_url}
+
+    def _drop(self, url: str) -> None:
+        # the caller holds the condition
+        self.inventory.pop(url, None)
+        self._urgent.pop(url, None)
+        self._scheduled.pop(url, None)
+
+    def status(self) -> dict:
+        """
+        Returns the size of the queue and inventory, the audits in progress and the most recent results.
+        """
+        with self._condition:
+            return {
+                "queue_depth": len(self._urgent) + len(self._scheduled),
+                "urgent": len(self._urgent),
+                "in_progress": list(self._in_progress),
+                "repositories": len(self.inventory),
+                "audited": self.audited,
+                "last_refresh": format_time(self.last_refresh),
+                "next_refresh": format_time(self.next_refresh),
+                "recent_results": list(self.recent),
+            }
+
+    def _next_repo(self) -> Repository | None:
+        # the caller holds the condition
+        for queued in (self._urgent, self._scheduled):
+            for url, repo in queued.items():
+                if url not in self._in_progress:
+                    del queued[url]
+                    self._in_progress[url] = repo
+                    return repo
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while (
+                    not self._stop_event.is_set()
+                    and (repo := self._next_repo()) is None
+                ):
+                    self._condition.wait()
+                if self._stop_event.is_set():
+                    return
+
+            start = time.perf_counter()
+            try:
+                result = self.audit(repo)
+            except Exception as e:  # keep the worker alive for the next repository
+                result = AuditResult(repo, 1, time.perf_counter() - start, f"{e}\n")
+            with self._condition:
+                del self._in_progress[repo.url]
+                self.audited += 1
+                self.recent.appendleft(
+                    {
+                        "org": repo.org,
+                        "repo": repo.name,
+                        "url": repo.url,
+                        "exit_code": result.exit_code,
+                        "passed": result.exit_code == 0,
+                        "duration": round(result.duration, 3),
+                        "timed_out": result.timed_out,
+                        "finished_at": format_time(time.time()),
+                    }
+                )
+                self._condition.notify_all()  # the repository may have been queued again meanwhile
+            if self._on_result is not None:
+                with self._result_lock:
+                    self._on_result(result)
+
+    def _refresh_periodically(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                self.refresh()
+            except Exception as e:  # keep the previous inventory until the next refresh
+                if self._on_error is not None and not self._stop_event.is_set():
+                    self._on_error(e)
+            if self.interval is None:
+                return
+            wait = max(started + self.interval - time.monotonic(), 0)
+            self.next_refresh = time.time() + wait
+            if self._stop_event.wait(wait):
+                return
+
+
+class DaemonServer(http.server.ThreadingHTTPServer):
+    """
+    Serves an `AuditDaemon`'s endpoints: GitHub webhook deliveries are posted to `WEBHOOK_PATH`,
+    and `STATUS_PATH` returns `AuditDaemon.status` as JSON.
+
+    Attributes
+    __________
+    audit_daemon : AuditDaemon
+        The daemon events are passed to
+    secret : str | None
+        The webhook's secret, deliveries without a matching signature are rejected. None accepts every delivery
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, address: tuple[str, int], audit_daemon: AuditDaemon, secret: str | None
+    ):
+        self.audit_daemon = audit_daemon
+        self.secret = secret
+        super().__init__(address, _RequestHandler)
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+    server: DaemonServer
+
+    def do_GET(self) -> None:
+        if self.path.partition("?")[0] != STATUS_PATH:
+            self._send_json(404, {"error": "Not found."})
+            return
+        self._send_json(200, self.server.audit_daemon.status())
+
+    def do_POST(self) -> None:
+        if self.path.partition("?")[0] != WEBHOOK_PATH:
+            self._send_json(404, {"error": "Not found."})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {"error": "Invalid Content-Length."})
+            return
+        if length > MAX_WEBHOOK_BODY:
+            self._send_json(413, {"error": "The payload is too large."})
+            return
+        body = self.rfile.read(length)
+
+        secret = self.server.secret
+        if secret is not None and not verify_signature(
+            secret, body, self.headers.get("X-Hub-Signature-256")
+        ):
+            self._send_json(401, {"error": "Invalid signature."})
+            return
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
+            self._send_json(
+                400,
+                {
+                    "error": "Payloads must be JSON, set the content type to application/json."
+                },
+            )
+            return
+
+        event = self.headers.get("X-GitHub-Event", "")
+        queued = self.server.audit_daemon.handle_event(event, payload)
+        self._send_json(202, {"event": event, "queued": [repo.url for repo in queued]})
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # deliveries are not logged, the audits they queue are
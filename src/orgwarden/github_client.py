@@ -0,0 +1,239 @@
+import time
+from collections.abc import Callable
+from typing import Self
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from orgwarden.cassette import Cassette
+from orgwarden.http_cache import ResponseCache
+from orgwarden.rate_limit import RateLimiter, is_rate_limited, shared_rate_limiter
+from orgwarden import tracing
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 10.0  # seconds
+DEFAULT_READ_TIMEOUT = 30.0  # seconds
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5  # sleeps 0.5s, 1s, 2s, ... between retries
+DEFAULT_RATE_LIMIT_RETRIES = 3
+RETRY_STATUS_CODES = frozenset({500, 502, 503, 504})
+
+
+def api_base_url(hostname: str) -> str:
+    """
+    Returns the REST API base URL for a GitHub or GitHub Enterprise Server hostname.
+    """
+    if "github.com" in hostname or "www.github.com" in hostname:
+        return "https://api.github.com"
+    return f"https://{hostname}/api/v3"
+
+
+def graphql_url(hostname: str) -> str:
+    """
+    Returns the GraphQL API endpoint for a GitHub or GitHub Enterprise Server hostname.
+    """
+    if "github.com" in hostname or "www.github.com" in hostname:
+        return "https://api.github.com/graphql"
+    return f"https://{hostname}/api/graphql"
+
+
+class GitHubClient:
+    """
+    A GitHub REST API client backed by a pooled, keep-alive `requests.Session`.
+
+    Requests are retried with exponential backoff on connection errors and 5xx responses.
+    Every request is scheduled through a `RateLimiter`, shared by default with all other clients using
+    the same token, and rate-limited responses are retried once the limit resets.
+    If a `ResponseCache` is provided, requests are made conditional on previously cached responses.
+    If a `Cassette` is provided, every response is recorded to it, or, when replaying, served from it
+    without sending any request, waiting for the rate limit or reading the cache.
+    Every GitHub API call made by OrgWarden should go through a `GitHubClient`.
+    Use as a context manager, or call `close` when finished.
+
+    Attributes
+    __________
+    hostname : str
+        Hostname of the GitHub instance, e.g. 'github.com'
+    base_url : str
+        REST API base URL that request paths are appended to
+    graphql_url : str
+        GraphQL API endpoint
+    timeout : tuple[float, float]
+        Connect and read timeouts in seconds
+    session : requests.Session
+        The underlying pooled session
+    cache : ResponseCache | None
+        On-disk cache used for conditional requests, if any
+    cassette : Cassette | None
+        Cassette that responses are recorded to or replayed from, if any
+    rate_limiter : RateLimiter
+        Tracks the token's API budget and delays requests as it runs out
+    max_rate_limit_retries : int
+        Number of times a rate-limited request is retried before its response is returned
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        gh_pat: str,
+        *,
+        base_url: str | None = None,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        cache: ResponseCache | None = None,
+        rate_limiter: RateLimiter | None = None,
+        max_rate_limit_retries: int = DEFAULT_RATE_LIMIT_RETRIES,
+        cassette: Cassette | None = None,
+    ):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1.")
+        if max_retries < 0:
+            raise ValueError("max_retries cannot be negative.")
+        if max_rate_limit_retries < 0:
+            raise ValueError("max_rate_limit_retries cannot be negative.")
+
+        self.hostname = hostname
+        self.base_url = (base_url or api_base_url(hostname)).rstrip("/")
+        self.graphql_url = (
+            f"{self.base_url}/graphql" if base_url else graphql_url(hostname)
+        )
+        self.timeout = (connect_timeout, read_timeout)
+        self.cache = cache
+        self.cassette = cassette
+        self.rate_limiter = rate_limiter or shared_rate_limiter(hostname, gh_pat)
+        self.max_rate_limit_retries = max_rate_limit_retries
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            # OrgWarden only POSTs read-only GraphQL queries, so those are safe to retry too
+            allowed_methods=frozenset({"GET", "HEAD", "POST"}),
+            raise_on_status=False,  # hand the final 5xx response back to the caller
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+                "Authorization": f"Bearer {gh_pat}",
+            }
+        )
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def get(self, path: str, params: dict | None = None) -> requests.Response:
+        """
+        Sends a GET request for `path`, relative to `base_url`.
+        """
+        url = f"{self.base_url}{path}"
+        if self.cassette is None:
+            return self._get(path, url, params)
+
+        key = self.cassette.key("GET", url, params)
+        if self.cassette.replaying:
+            with tracing.span(f"GET {path}", "api", replayed=True):
+                return self.cassette.replay(key)
+        res = self._get(path, url, params)
+        self.cassette.record(key, res)
+        return res
+
+    def _get(self, path: str, url: str, params: dict | None) -> requests.Response:
+        if self.cache is None:
+            return self._send(
+                lambda: self.session.get(url, params=params, timeout=self.timeout),
+                name=f"GET {path}",
+            )
+
+        full_url = requests.Request("GET", url, params=params).prepare().url
+        assert full_url is not None
+        key = self.cache.key(full_url, self.session.headers.get("Authorization"))
+        entry = self.cache.load(key)
+
+        res = self._send(
+            lambda: self.session.get(
+                url,
+                params=params,
+                headers=self.cache.conditional_headers(entry) if entry else None,
+                timeout=self.timeout,
+            ),
+            name=f"GET {path}",
+        )
+        if entry and res.status_code == 304:
+            return self.cache.revalidated(key, entry, res)
+        self.cache.store(key, res)
+        return res
+
+    def graphql(self, query: str, variables: dict | None = None) -> requests.Response:
+        """
+        Sends a GraphQL query to `graphql_url`.
+        """
+        body = {"query": query, "variables": variables or {}}
+        key = None
+        if self.cassette is not None:
+            key = self.cassette.key("POST", self.graphql_url, body=body)
+            if self.cassette.replaying:
+                with tracing.span("POST graphql", "api", replayed=True):
+                    return self.cassette.replay(key)
+
+        res = self._send(
+            lambda: self.session.post(
+                self.graphql_url, json=body, timeout=self.timeout
+            ),
+            resource="graphql",
+            name="POST graphql",
+        )
+        if key is not None:
+            self.cassette.record(key, res)
+        return res
+
+    def _send(
+        self,
+        request: Callable[[], requests.Response],
+        resource: str = "core",
+        name: str = "request",
+    ) -> requests.Response:
+        attempt = 0
+        while True:
+            wait_start = time.perf_counter()
+            if self.rate_limiter.acquire(resource) > 0 and (
+                tracer := tracing.active_tracer()
+            ):
+                tracer.add_span(
+                    f"rate limit wait ({resource})",
+                    "rate-limit",
+                    wait_start,
+                    time.perf_counter(),
+                )
+            with tracing.span(name, "api", attempt=attempt):
+                res = request()
+            self.rate_limiter.update(res.headers)
+            if not is_rate_limited(res) or attempt >= self.max_rate_limit_retries:
+                return res
+            delay = self.rate_limiter.retry_delay(res)
+            if delay > self.rate_limiter.max_wait:
+                return res
+            # pause every request sharing this budget, not just this one
+            self.rate_limiter.pause(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        """
+        Closes all pooled connections.
+        """
+        self.session.close()
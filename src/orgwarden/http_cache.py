@@ -0,0 +1,206 @@
+import contextlib
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_TTL = 7 * 24 * 60 * 60  # seconds
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024  # bytes
+# an oversized cache is evicted down to this fraction of its maximum size, so the next scan is many stores away
+EVICTION_TARGET = 0.9
+
+# headers that describe the cached body rather than the 304 response that revalidated it
+_BODY_HEADERS = frozenset(
+    {"content-length", "content-encoding", "content-type", "transfer-encoding"}
+)
+
+
+def default_cache_dir() -> Path:
+    """
+    Returns the platform's user cache directory for OrgWarden's HTTP responses.
+    """
+    if sys.platform == "win32":  # pragma: no cover
+        base = Path(os.environ.get("LOCALAPPDATA", Path.home() / "AppData" / "Local"))
+    elif sys.platform == "darwin":  # pragma: no cover
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    return base / "orgwarden" / "http"
+
+
+class ResponseCache:
+    """
+    A persistent on-disk cache of GitHub API responses used to send conditional requests.
+
+    Each entry stores a response's body, headers, `ETag` and `Last-Modified` values, keyed by the
+    request URL and the token that made it. Later requests for the same URL send `If-None-Match` /
+    `If-Modified-Since`, and a `304 Not Modified` reply is served from the cached body. GitHub does
+    not count 304 responses against the rate limit.
+
+    Entries that have not been used for `ttl` seconds are discarded. Once the cache exceeds
+    `max_size` bytes, the least recently used entries are evicted. The directory is only scanned on the
+    first store and whenever the running total of stored bytes exceeds `max_size`, not on every store.
+    With `refresh`, cached entries are never used for conditional requests, but fresh responses are still stored.
+
+    Attributes
+    __________
+    directory : Path
+        Directory that holds the cache entries
+    ttl : float
+        Seconds an entry is kept after it was last stored or revalidated
+    max_size : int
+        Maximum total size of all entries in bytes
+    refresh : bool
+        Whether to bypass cached entries and re-download every response
+    """
+
+    def __init__(
+        self,
+        directory: Path | None = None,
+        *,
+        ttl: float = DEFAULT_TTL,
+        max_size: int = DEFAULT_MAX_SIZE,
+        refresh: bool = False,
+    ):
+        self.directory = directory or default_cache_dir()
+        self.ttl = ttl
+        self.max_size = max_size
+        self.refresh = refresh
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # total size of the entries as of the last scan plus what was stored since, None until the first scan
+        self._size: int | None = None
+        self._size_lock = threading.Lock()
+
+    def key(self, url: str, authorization: str | None) -> str:
+        """
+        Returns the cache key for a request. Responses are never shared between tokens.
+        """
+        return hashlib.sha256(f"{authorization or ''}\n{url}".encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def load(self, key: str) -> dict | None:
+        """
+        Returns the cached entry for `key`, or None if there is no usable entry.
+        """
+        if self.refresh:
+            return None
+        path = self._path(key)
+        try:
+            stat = path.stat()
+            if time.time() - stat.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            with path.open(encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def conditional_headers(self, entry: dict) -> dict[str, str]:
+        """
+        Returns the headers that make a request conditional on the cached entry.
+        """
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, key: str, res: requests.Response) -> None:
+        """
+        Stores a successful response if it carries an `ETag` or `Last-Modified` validator.
+        """
+        if res.status_code != 200:
+            return
+        etag, last_modified = res.headers.get("ETag"), res.headers.get("Last-Modified")
+        if not (etag or last_modified):
+            return
+
+        entry = {
+            "url": res.url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": dict(res.headers),
+            "body": res.text,
+        }
+        path = self._path(key)
+        try:
+            replaced_size = path.stat().st_size
+        except FileNotFoundError:
+            replaced_size = 0
+        # write to a temporary file first so concurrent readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+
+        with self._size_lock:
+            if self._size is not None:
+                self._size += size - replaced_size
+            over_size = self._size is None or self._size > self.max_size
+        if over_size:
+            self.evict()
+
+    def revalidated(
+        self, key: str, entry: dict, res: requests.Response
+    ) -> requests.Response:
+        """
+        Returns a 200 response rebuilt from the cached entry after the server replied `304 Not Modified`.
+        Headers from the 304 reply (e.g. rate-limit values) replace the cached ones.
+        """
+        headers = CaseInsensitiveDict(entry["headers"])
+        for name, value in res.headers.items():
+            if name.lower() not in _BODY_HEADERS:
+                headers[name] = value
+
+        cached = requests.Response()
+        cached.status_code = 200
+        cached.url = entry["url"]
+        cached.headers = headers
+        cached._content = entry["body"].encode("utf-8")
+        cached.encoding = "utf-8"
+        cached.request = res.request
+        cached.from_cache = True  # type: ignore[attr-defined]
+
+        # mark as recently used and restart its ttl
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(self._path(key))
+        return cached
+
+    def evict(self) -> None:
+        """
+        Removes expired entries. If the cache exceeds `max_size`, then removes the least recently used entries
+        until it fits within `EVICTION_TARGET` of `max_size`.
+        """
+        entries = []
+        now = time.time()
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # removed by a concurrent eviction
+                continue
+            if now - stat.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        if total_size > self.max_size:
+            target_size = self.max_size * EVICTION_TARGET
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total_size <= target_size:
+                    break
+                path.unlink(missing_ok=True)
+                total_size -= size
+        with self._size_lock:
+            self._size = total_size
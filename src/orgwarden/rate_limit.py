@@ -0,0 +1,176 @@
+import hashlib
+import threading
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+import requests
+
+DEFAULT_RESERVE = (
+    0.1  # fraction of the budget below which requests are paced until the reset
+)
+DEFAULT_MAX_WAIT = 60 * 60  # seconds, GitHub's primary rate limit window
+# GitHub asks clients to wait at least a minute after a secondary rate limit without `Retry-After`
+SECONDARY_RATE_LIMIT_WAIT = 60.0  # seconds
+DEFAULT_RESOURCE = "core"
+
+
+def is_rate_limited(res: requests.Response) -> bool:
+    """
+    Returns whether a GitHub API response was rejected by the primary or secondary rate limit,
+    as opposed to an authentication or permission failure.
+    """
+    if res.status_code == 429:
+        return True
+    if res.status_code != 403:
+        return False
+    if res.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in res.headers:
+        return True
+    try:
+        body = res.json()
+    except ValueError:
+        return False
+    message = body.get("message", "") if isinstance(body, dict) else ""
+    return "rate limit" in str(message).lower()
+
+
+@dataclass
+class _Bucket:
+    limit: int
+    remaining: int
+    reset_at: float  # epoch seconds at which `remaining` is refilled to `limit`
+
+
+class RateLimiter:
+    """
+    A token bucket that tracks a token's GitHub API budget from the `X-RateLimit-*` response headers.
+
+    Every request takes a token from the bucket of its rate limit resource (e.g. `core` or `graphql`).
+    Once fewer than `reserve` of a bucket's tokens remain, requests are spaced evenly until its reset,
+    and an empty bucket blocks until the reset time instead of letting requests fail. A rate-limited
+    response pauses every request for its `Retry-After` period, or until its reset time.
+    A single `RateLimiter` is safe to share between threads.
+
+    Attributes
+    __________
+    reserve : float
+        Fraction of a bucket's budget below which requests are paced
+    max_wait : float
+        Longest pause in seconds that is waited out when a request is rate limited
+    """
+
+    def __init__(
+        self,
+        *,
+        reserve: float = DEFAULT_RESERVE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if not 0 <= reserve < 1:
+            raise ValueError("reserve must be between 0 and 1.")
+        if max_wait < 0:
+            raise ValueError("max_wait cannot be negative.")
+
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._buckets: dict[str, _Bucket] = {}
+        self._blocked_until = 0.0
+        self._next_slot: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def remaining(self, resource: str = DEFAULT_RESOURCE) -> int | None:
+        """
+        Returns the number of requests left in the resource's budget, or None if it is not known yet.
+        """
+        with self._lock:
+            bucket = self._buckets.get(resource)
+            return bucket.remaining if bucket else None
+
+    def acquire(self, resource: str = DEFAULT_RESOURCE) -> float:
+        """
+        Takes a token for one request against `resource`, sleeping first if the budget is exhausted,
+        nearly exhausted, or paused by a rate-limited response. Returns the number of seconds slept.
+        """
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._blocked_until, self._next_slot.get(resource, 0.0))
+            bucket = self._buckets.get(resource)
+            if bucket is not None:
+                if start >= bucket.reset_at:
+                    bucket.remaining = bucket.limit
+                if bucket.remaining <= 0:
+                    # wait for the reset; the next response reports the new window
+                    start = max(start, bucket.reset_at)
+                    bucket.remaining = bucket.limit
+                elif bucket.remaining < self.reserve * bucket.limit:
+                    # spread the rest of the budget over the time left in the window
+                    interval = (bucket.reset_at - start) / bucket.remaining
+                    self._next_slot[resource] = start + interval
+                bucket.remaining -= 1
+            delay = start - now
+
+        if delay > 0:
+            self._sleep(delay)
+        return max(delay, 0.0)
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """
+        Records the budget reported by a response's `X-RateLimit-*` headers.
+        """
+        try:
+            limit = int(headers["X-RateLimit-Limit"])
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset_at = float(headers["X-RateLimit-Reset"])
+        except (KeyError, ValueError):
+            return
+        resource = headers.get("X-RateLimit-Resource", DEFAULT_RESOURCE)
+
+        with self._lock:
+            bucket = self._buckets.get(resource)
+            if bucket is not None and bucket.reset_at == reset_at:
+                # concurrent responses arrive out of order, the lowest count is the newest
+                bucket.remaining = min(bucket.remaining, remaining)
+            elif bucket is None or reset_at > bucket.reset_at:
+                self._buckets[resource] = _Bucket(limit, remaining, reset_at)
+
+    def retry_delay(self, res: requests.Response) -> float:
+        """
+        Returns how many seconds to wait before retrying a rate-limited response.
+        """
+        retry_after = res.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+        if res.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                return max(float(res.headers["X-RateLimit-Reset"]) - self._clock(), 0.0)
+            except (KeyError, ValueError):
+                pass
+        return SECONDARY_RATE_LIMIT_WAIT
+
+    def pause(self, seconds: float) -> None:
+        """
+        Blocks every request, for all resources, for the next `seconds` seconds.
+        """
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+
+_SHARED_LIMITERS: dict[tuple[str, str], RateLimiter] = {}
+_SHARED_LIMITERS_LOCK = threading.Lock()
+
+
+def shared_rate_limiter(hostname: str, gh_pat: str) -> RateLimiter:
+    """
+    Returns the process-wide `RateLimiter` for a token on a GitHub instance.
+    GitHub tracks rate limits per token, so every client and worker using the same token shares one budget.
+    """
+    key = (hostname, hashlib.sha256(gh_pat.encode()).hexdigest())
+    with _SHARED_LIMITERS_LOCK:
+        if key not in _SHARED_LIMITERS:
+            _SHARED_LIMITERS[key] = RateLimiter()
+        return _SHARED_LIMITERS[key]
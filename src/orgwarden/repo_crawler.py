@@ -1,6 +1,45 @@
+import contextlib
+import itertools
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import UTC, datetime
+from enum import Enum
+from urllib.parse import parse_qs, urlparse
 import requests
+from orgwarden import tracing
+from orgwarden.github_client import GitHubClient
+from orgwarden.rate_limit import is_rate_limited
 from orgwarden.repository import Repository
 
+PER_PAGE = 100  # max value
+MAX_CONCURRENT_PAGE_REQUESTS = 8
+# `type` filter of the REST listing: every repository that is not a fork, whatever its visibility
+REST_LISTING_TYPE = "sources"
+# named private repositories up to which they are fetched one by one instead of listing all private repositories
+MAX_DIRECT_PRIVATE_REPO_FETCHES = 10
+
+# Requests only the fields OrgWarden uses. Forks, and private repositories unless $privacy is null, are excluded server-side.
+ORG_REPOS_GRAPHQL_QUERY = """
+query($org: String!, $perPage: Int!, $cursor: String, $privacy: RepositoryPrivacy) {
+  organization(login: $org) {
+    repositories(first: $perPage, after: $cursor, isFork: false, privacy: $privacy, orderBy: {field: NAME, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { name url isPrivate isFork pushedAt updatedAt diskUsage }
+    }
+  }
+}
+"""
+
+
+class CrawlerBackend(str, Enum):
+    """
+    The GitHub API used to enumerate an organization's repositories.
+    """
+
+    REST = "rest"  # paginated `/orgs/{org}/repos`, ~100 fields per repository
+    GRAPHQL = "graphql"  # `organization.repositories` connection, only the fields OrgWarden needs
+
 
 class APIError(Exception):
     def __init__(self, message: str):
@@ -12,6 +51,12 @@ JSON_SCHEMA_ERROR = APIError(
 )
 
 
+class RateLimitError(APIError):
+    def __init__(self, hostname: str, message: str):
+        self.hostname = hostname
+        super().__init__(f"GitHub API rate limit exceeded for {hostname}: {message}")
+
+
 class AuthError(Exception):
     def __init__(self, hostname: str, message: str):
         self.hostname = hostname
@@ -19,90 +64,468 @@ class AuthError(Exception):
         super().__init__(hostname, message)
 
 
-def fetch_org_repos(
+def last_page_number(link_header: str | None) -> int | None:
+    """
+    Returns the page number of the `rel="last"` link in a GitHub API `Link` header, or None if there is no such link.
+    """
+    if not link_header:
+        return None
+    for link in requests.utils.parse_header_links(link_header):
+        if link.get("rel") != "last":
+            continue
+        page = parse_qs(urlparse(link.get("url", "")).query).get("page")
+        if page and page[0].isdigit():
+            return int(page[0])
+    return None
+
+
+def _raise_for_status(res: requests.Response, hostname: str, resource: str) -> None:
+    """
+    Raises the matching error if a GitHub API response was not successful.
+    """
+    if is_rate_limited(res):
+        raise RateLimitError(hostname, message=res.json())
+    if res.status_code == 401 or res.status_code == 403:
+        raise AuthError(hostname, message=res.json())
+    if res.status_code != 200:
+        raise APIError(f"Error fetching {resource}: {res.json()}")
+
+
+def _is_included(
+    name: str,
+    private: bool,
+    fork: bool,
+    specific_included_private_repos: set[str],
+    include_all_private_repos: bool,
+) -> bool:
+    """
+    Returns whether a repository is listed: forks and the `.github` repository never are,
+    private repositories only if all or this one are included.
+    """
+    if name == ".github" or fork:
+        return False
+    return (
+        not private
+        or include_all_private_repos
+        or name in specific_included_private_repos
+    )
+
+
+def _included_repos(
+    page: list,
     org_name: str,
-    hostname: str,
-    gh_pat: str,
-    specific_included_private_repos: set[str] | None = None,
-    *,
+    specific_included_private_repos: set[str],
     include_all_private_repos: bool,
 ) -> list[Repository]:
     """
-    Returns a `Repository` list containing the specified organization's public, non-forked repositories.
-    Raises an `AuthError` if OrgWarden lacks authorization with GitHub API.
-    Raises an `APIError` if an other error occurs while fetching repositories, or the JSON response does not match expected schema.
+    Validates a page of REST API response entries and returns the included `Repository` objects.
     """
-    specific_included_private_repos = specific_included_private_repos or set()
+    repos = []
+    for repo_entry in page:
+        repo = repository_from_entry(
+            repo_entry,
+            org_name,
+            specific_included_private_repos,
+            include_all_private_repos,
+        )
+        if repo is not None:
+            repos.append(repo)
+    return repos
 
-    if not org_name:
-        raise ValueError("org_name is an empty string.")
-    if not hostname:
-        raise ValueError("hostname is an empty string.")
 
-    BASE_URL = (
-        "https://api.github.com"
-        if "github.com" in hostname or "www.github.com" in hostname
-        else f"https://{hostname}/api/v3"
-    )
-    HEADERS = {
-        "Accept": "application/vnd.github+json",
-        "X-GitHub-Api-Version": "2022-11-28",
-        "Authorization": f"Bearer {gh_pat}",
-    }
+def repository_from_entry(
+    repo_entry: dict,
+    org_name: str,
+    specific_included_private_repos: set[str],
+    include_all_private_repos: bool,
+) -> Repository | None:
+    """
+    Returns the `Repository` described by a REST API repository entry, such as the `repository` of a webhook event,
+    or None if a listing of the organization's repositories does not include it.
+    Raises an `APIError` if the entry does not match expected JSON schema.
+    """
+    if not isinstance(repo_entry, dict):
+        raise JSON_SCHEMA_ERROR
+    if (
+        "private" not in repo_entry
+        or "name" not in repo_entry
+        or "fork" not in repo_entry
+    ):
+        raise JSON_SCHEMA_ERROR
+    if not _is_included(
+        repo_entry["name"],
+        repo_entry["private"],
+        repo_entry["fork"],
+        specific_included_private_repos,
+        include_all_private_repos,
+    ):
+        return None
+    return _repository(repo_entry, org_name)
 
-    org_repo_entries: list[dict] = []  # unfiltered api response
 
-    page_num = 1
-    while True:
-        res = requests.get(
-            f"{BASE_URL}/orgs/{org_name}/repos",
+def _iter_org_repo_pages(
+    client: GitHubClient,
+    org_name: str,
+    hostname: str,
+    specific_included_private_repos: set[str],
+    include_all_private_repos: bool,
+    max_concurrent_requests: int,
+) -> Iterator[list[Repository]]:
+    """
+    Yields the included repositories of each page of the organization's repositories, in page order.
+    Each page is validated and filtered by the thread that fetched it, so the decoded API response
+    is released before the page is queued, and at most `max_concurrent_requests` filtered pages are held.
+    """
+
+    def fetch_page(page_num: int) -> tuple[list[Repository], int, str | None]:
+        """
+        Returns the page's included repos, its number of entries and its `Link` header.
+        """
+        res = client.get(
+            f"/orgs/{org_name}/repos",
             params={
+                "type": REST_LISTING_TYPE,
                 "page": page_num,
-                "per_page": 100,  # max value
+                "per_page": PER_PAGE,
             },
-            headers=HEADERS,
         )
 
-        if res.status_code == 401 or res.status_code == 403:
-            raise AuthError(hostname, message=res.json())
-        if res.status_code != 200:
-            raise APIError(f"Error fetching repos for {org_name}: {res.json()}")
+        _raise_for_status(res, hostname, f"repos for {org_name}")
 
-        data = res.json()
+        with tracing.span(f"decode page {page_num}", "decode"):
+            data = res.json()
         if not isinstance(data, list):
             raise JSON_SCHEMA_ERROR
-        if not data:  # end of paginated results
-            break
+        with tracing.span(f"filter page {page_num}", "filter", entries=len(data)):
+            repos = _included_repos(
+                data,
+                org_name,
+                specific_included_private_repos,
+                include_all_private_repos,
+            )
+        return repos, len(data), res.headers.get("Link")
 
-        page_num += 1
-        org_repo_entries += data
+    first_page, first_page_size, link_header = fetch_page(1)
+    yield first_page
+    last_page = last_page_number(link_header)
 
-    # Build filtered list of Repositories
-    repositories: list[Repository] = []
-    for repo_entry in org_repo_entries:
-        if not isinstance(repo_entry, dict):
+    if last_page is not None:
+        if last_page <= 1:
+            return
+        with ThreadPoolExecutor(
+            max_workers=min(max_concurrent_requests, last_page - 1)
+        ) as executor:
+            # keep at most `max_concurrent_requests` pages in flight and yield them in page order
+            window: deque[Future[tuple[list[Repository], int, str | None]]] = deque()
+            next_page = 2
+            try:
+                while next_page <= last_page or window:
+                    while (
+                        next_page <= last_page and len(window) < max_concurrent_requests
+                    ):
+                        window.append(executor.submit(fetch_page, next_page))
+                        next_page += 1
+                    repos, _, _ = window.popleft().result()
+                    yield repos
+            finally:
+                for future in window:  # consumer stopped early or a page failed
+                    future.cancel()
+    elif first_page_size:
+        # no `rel="last"` link to plan from, walk pages until one comes back empty, since the server
+        # may cap `per_page` below what was requested
+        page_num = 2
+        while True:
+            repos, page_size, _ = fetch_page(page_num)
+            if not page_size:  # end of paginated results
+                return
+            page_num += 1
+            yield repos
+
+
+def _iter_org_repo_pages_graphql(
+    client: GitHubClient,
+    org_name: str,
+    hostname: str,
+    specific_included_private_repos: set[str],
+    include_all_private_repos: bool,
+) -> Iterator[list[Repository]]:
+    """
+    Yields the included repositories of each page of the organization's repositories, fetched via GraphQL cursor pagination.
+    Unless all private repositories are included, only public repositories are listed if at most
+    `MAX_DIRECT_PRIVATE_REPO_FETCHES` private repositories are named, and the named ones are fetched
+    directly and yielded as a final page.
+    """
+    direct_fetches: set[str] = set()
+    privacy = None
+    if (
+        not include_all_private_repos
+        and len(specific_included_private_repos) <= MAX_DIRECT_PRIVATE_REPO_FETCHES
+    ):
+        direct_fetches, privacy = specific_included_private_repos, "PUBLIC"
+
+    cursor = None
+    while True:
+        res = client.graphql(
+            ORG_REPOS_GRAPHQL_QUERY,
+            {
+                "org": org_name,
+                "perPage": PER_PAGE,
+                "cursor": cursor,
+                "privacy": privacy,
+            },
+        )
+
+        _raise_for_status(res, hostname, f"repos for {org_name}")
+
+        with tracing.span("decode page", "decode"):
+            body = res.json()
+        if not isinstance(body, dict):
+            raise JSON_SCHEMA_ERROR
+        if body.get("errors"):
+            raise APIError(f"Error fetching repos for {org_name}: {body['errors']}")
+        try:
+            connection = body["data"]["organization"]["repositories"]
+            nodes, page_info = connection["nodes"], connection["pageInfo"]
+            has_next_page, cursor = page_info["hasNextPage"], page_info["endCursor"]
+        except (KeyError, TypeError):
             raise JSON_SCHEMA_ERROR
+        if not isinstance(nodes, list):
+            raise JSON_SCHEMA_ERROR
+
+        page: list[Repository] = []
+        with tracing.span("filter page", "filter", entries=len(nodes)):
+            for node in nodes:
+                if not isinstance(node, dict) or not all(
+                    field in node for field in ("name", "url", "isPrivate", "isFork")
+                ):
+                    raise JSON_SCHEMA_ERROR
+                if not _is_included(
+                    node["name"],
+                    node["isPrivate"],
+                    node["isFork"],
+                    specific_included_private_repos,
+                    include_all_private_repos,
+                ):
+                    continue
+                page.append(
+                    Repository(
+                        name=node["name"],
+                        url=node["url"],
+                        org=org_name,
+                        pushed_at=node.get("pushedAt"),
+                        updated_at=node.get("updatedAt"),
+                        size=node.get("diskUsage"),
+                    )
+                )
+        # the suspended generator would otherwise keep the decoded response alive until the next page
+        del res, body, connection, nodes
+        yield page
+
+        if not has_next_page:
+            break
+
+    if direct_fetches:
+        yield _fetch_private_repos(client, org_name, hostname, direct_fetches)
+
+
+def _fetch_private_repos(
+    client: GitHubClient,
+    org_name: str,
+    hostname: str,
+    repo_names: set[str],
+) -> list[Repository]:
+    """
+    Fetches each named repository directly, and returns those that exist and are private, non-forked repositories.
+    """
+    repos = []
+    for repo_name in sorted(repo_names):
+        res = client.get(f"/repos/{org_name}/{repo_name}")
         if (
-            "private" not in repo_entry
-            or "name" not in repo_entry
-            or "fork" not in repo_entry
-        ):
+            res.status_code == 404
+        ):  # a name that is not one of the org's repositories is not listed
+            continue
+        data = _repo_entry(res, hostname, org_name, repo_name)
+        if "private" not in data or "fork" not in data:
             raise JSON_SCHEMA_ERROR
-        repo_name = repo_entry["name"]
-        if repo_name == ".github":
+        if not data["private"]:  # public repositories were listed already
             continue
-        if repo_entry["fork"]:
+        if data["fork"] or data["name"] == ".github":
             continue
-        # Include private repo if we're including all or repo is in private list
-        if repo_entry["private"]:
-            if (
-                not include_all_private_repos
-                and repo_name not in specific_included_private_repos
-            ):
-                continue
-
-        repositories.append(
-            Repository(name=repo_name, url=repo_entry["html_url"], org=org_name)
+        repos.append(_repository(data, org_name))
+    return repos
+
+
+def _repo_entry(
+    res: requests.Response, hostname: str, org_name: str, repo_name: str
+) -> dict:
+    """
+    Returns the validated entry of a `/repos/{org}/{repo}` response.
+    """
+    _raise_for_status(res, hostname, f"{org_name}/{repo_name}")
+    data = res.json()
+    if not isinstance(data, dict) or "name" not in data or "html_url" not in data:
+        raise JSON_SCHEMA_ERROR
+    return data
+
+
+def _repository(repo_entry: dict, org_name: str) -> Repository:
+    """
+    Returns the `Repository` described by a REST API repository entry.
+    """
+    pushed_at = repo_entry.get("pushed_at")
+    if isinstance(pushed_at, int):  # push events give Unix times instead
+        pushed_at = datetime.fromtimestamp(pushed_at, UTC).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"
+        )
+    return Repository(
+        name=repo_entry["name"],
+        url=repo_entry["html_url"],
+        org=org_name,
+        pushed_at=pushed_at,
+        updated_at=repo_entry.get("updated_at"),
+        size=repo_entry.get("size"),
+    )
+
+
+def _iter_repos(
+    pages: Iterable[list[Repository]],
+    on_close: Callable[[], None] | None,
+) -> Iterator[Repository]:
+    """
+    Yields the repositories of each page. Calls `on_close` once iteration finishes or is abandoned.
+    """
+    try:
+        for page in pages:
+            yield from page
+    finally:
+        if on_close is not None:
+            on_close()
+
+
+def iter_org_repos(
+    org_name: str,
+    hostname: str,
+    gh_pat: str,
+    specific_included_private_repos: set[str] | None = None,
+    *,
+    include_all_private_repos: bool,
+    max_concurrent_requests: int = MAX_CONCURRENT_PAGE_REQUESTS,
+    client: GitHubClient | None = None,
+    backend: CrawlerBackend = CrawlerBackend.REST,
+) -> Iterator[Repository]:
+    """
+    Returns an iterator over the specified organization's public, non-forked repositories.
+    Each page is validated, filtered and reduced to `Repository` objects as soon as it arrives, and its decoded
+    API response is dropped, so memory use does not grow with the size of the organization's API responses
+    and repositories are yielded before the crawl finishes.
+    The first page is fetched before this function returns, so authorization and API errors on it are raised immediately;
+    errors on later pages are raised during iteration.
+    After the first page, the remaining pages listed in the `Link` header are fetched concurrently,
+    up to `max_concurrent_requests` at a time, and yielded in page order.
+    Requests are sent through `client`, or through a new `GitHubClient` for `hostname` if none is provided.
+    Forks are excluded by the API rather than transferred and discarded.
+    With the GraphQL `backend`, repositories are fetched with cursor pagination and only the fields OrgWarden needs,
+    and a few named private repositories are fetched directly instead of listing every private repository.
+    Raises an `AuthError` if OrgWarden lacks authorization with GitHub API.
+    Raises a `RateLimitError` if the rate limit does not reset within the client's `RateLimiter.max_wait`.
+    Raises an `APIError` if an other error occurs while fetching repositories, or the JSON response does not match expected schema.
+    """
+    specific_included_private_repos = specific_included_private_repos or set()
+
+    if not org_name:
+        raise ValueError("org_name is an empty string.")
+    if not hostname:
+        raise ValueError("hostname is an empty string.")
+    if max_concurrent_requests < 1:
+        raise ValueError("max_concurrent_requests must be at least 1.")
+
+    owned_client = GitHubClient(hostname, gh_pat) if client is None else None
+    active_client = client or owned_client
+    assert active_client is not None
+    try:
+        if backend == CrawlerBackend.GRAPHQL:
+            pages = _iter_org_repo_pages_graphql(
+                active_client,
+                org_name,
+                hostname,
+                specific_included_private_repos,
+                include_all_private_repos,
+            )
+        else:
+            pages = _iter_org_repo_pages(
+                active_client,
+                org_name,
+                hostname,
+                specific_included_private_repos,
+                include_all_private_repos,
+                max_concurrent_requests,
+            )
+        first_page = next(pages)
+    except BaseException:
+        if owned_client is not None:
+            owned_client.close()
+        raise
+
+    return _iter_repos(
+        itertools.chain([first_page], pages),
+        on_close=owned_client.close if owned_client is not None else None,
+    )
+
+
+def fetch_org_repos(
+    org_name: str,
+    hostname: str,
+    gh_pat: str,
+    specific_included_private_repos: set[str] | None = None,
+    *,
+    include_all_private_repos: bool,
+    max_concurrent_requests: int = MAX_CONCURRENT_PAGE_REQUESTS,
+    client: GitHubClient | None = None,
+    backend: CrawlerBackend = CrawlerBackend.REST,
+) -> list[Repository]:
+    """
+    Returns a `Repository` list containing the specified organization's public, non-forked repositories.
+    See `iter_org_repos` for details.
+    Raises an `AuthError` if OrgWarden lacks authorization with GitHub API.
+    Raises a `RateLimitError` if the rate limit does not reset within the client's `RateLimiter.max_wait`.
+    Raises an `APIError` if an other error occurs while fetching repositories, or the JSON response does not match expected schema.
+    """
+    return list(
+        iter_org_repos(
+            org_name,
+            hostname,
+            gh_pat,
+            specific_included_private_repos,
+            include_all_private_repos=include_all_private_repos,
+            max_concurrent_requests=max_concurrent_requests,
+            client=client,
+            backend=backend,
         )
+    )
+
+
+def fetch_repo(
+    org_name: str,
+    repo_name: str,
+    hostname: str,
+    gh_pat: str,
+    *,
+    client: GitHubClient | None = None,
+) -> Repository:
+    """
+    Returns the specified repository, including its last push and update times.
+    Requests are sent through `client`, or through a new `GitHubClient` for `hostname` if none is provided.
+    Raises an `AuthError` if OrgWarden lacks authorization with GitHub API.
+    Raises an `APIError` if an other error occurs while fetching the repository, or the JSON response does not match expected schema.
+    """
+    if not org_name:
+        raise ValueError("org_name is an empty string.")
+    if not repo_name:
+        raise ValueError("repo_name is an empty string.")
+
+    with contextlib.ExitStack() as stack:
+        if client is None:
+            client = stack.enter_context(GitHubClient(hostname, gh_pat))
+        res = client.get(f"/repos/{org_name}/{repo_name}")
 
-    return repositories
+    return _repository(_repo_entry(res, hostname, org_name, repo_name), org_name)
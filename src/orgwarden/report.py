@@ -0,0 +1,190 @@
+import json
+import sys
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from enum import Enum
+from pathlib import Path
+from typing import Self, TextIO
+from orgwarden.audit import KNOWN_MODULES, AuditResult
+from orgwarden.repository import Repository
+
+# incremented whenever a field is removed or changes meaning, adding fields keeps the version
+REPORT_SCHEMA_VERSION = 1
+DEFAULT_MAX_OUTPUT = 64 * 1024  # characters of RepoAuditor output kept per record
+
+
+class ReportFormat(str, Enum):
+    """
+    The layout of a machine-readable audit report.
+    """
+
+    NDJSON = "ndjson"  # one JSON record per line
+    JSON = "json"  # a single JSON document whose `results` array holds the records
+
+
+class ReportError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+def report_record(
+    result: AuditResult,
+    modules: list[str] | None,
+    max_output: int,
+    shard: str | None = None,
+) -> dict:
+    """
+    Returns the report record of an audit result. RepoAuditor's output is cut to its first `max_output` characters.
+    `shard` is the 'I/N' shard of a sharded audit.
+    """
+    output = result.output
+    truncated = output is not None and len(output) > max_output
+    return {
+        "schema_version": REPORT_SCHEMA_VERSION,
+        "shard": shard,
+        "org": result.repo.org,
+        "repo": result.repo.name,
+        "url": result.repo.url,
+        "modules": list(modules or KNOWN_MODULES),
+        "exit_code": result.exit_code,
+        "passed": result.exit_code == 0,
+        "duration": round(result.duration, 3),
+        "reused": result.reused,
+        "timed_out": result.timed_out,
+        "output": output[:max_output] if truncated else output,
+        "output_truncated": truncated,
+        "finished_at": datetime.now(UTC).isoformat(timespec="seconds"),
+    }
+
+
+class ReportWriter:
+    """
+    Streams one record per audit result to a file or stdout, in the order results finish.
+
+    Records are written and flushed as soon as they are added and never kept in memory,
+    so a report can be consumed while the audit is still running.
+    With the JSON format, the document is only complete once the writer is closed.
+    Use as a context manager, or call `close` when finished.
+
+    Attributes
+    __________
+    path : Path | None
+        File the report is written to, or None for stdout
+    format : ReportFormat
+        Layout of the report
+    max_output : int
+        Number of characters of RepoAuditor output kept per record
+    """
+
+    def __init__(
+        self,
+        path: Path | None,
+        format: ReportFormat,
+        *,
+        max_output: int = DEFAULT_MAX_OUTPUT,
+    ):
+        if max_output < 0:
+            raise ValueError("max_output cannot be negative.")
+
+        self.path = path
+        self.format = format
+        self.max_output = max_output
+        self._records = 0
+        self._closed = False
+        if path is None:
+            self._stream: TextIO = sys.stdout
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._stream = path.open("w", encoding="utf-8")
+        if format == ReportFormat.JSON:
+            self._stream.write(
+                f'{{"schema_version": {REPORT_SCHEMA_VERSION}, "results": ['
+            )
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(
+        self, result: AuditResult, modules: list[str] | None, shard: str | None = None
+    ) -> None:
+        """
+        Writes the record of an audit result.
+        """
+        self.write_record(report_record(result, modules, self.max_output, shard))
+
+    def write_record(self, record: dict) -> None:
+        """
+        Writes a record as is, e.g. one read from another report.
+        """
+        data = json.dumps(record)
+        if self.format == ReportFormat.JSON:
+            data = f"{',' if self._records else ''}\n{data}"
+        else:
+            data += "\n"
+        self._stream.write(data)
+        self._stream.flush()
+        self._records += 1
+
+    def close(self) -> None:
+        """
+        Finishes the report, and closes its file unless it is written to stdout.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self.format == ReportFormat.JSON:
+            self._stream.write("\n]}\n")
+        self._stream.flush()
+        if self.path is not None:
+            self._stream.close()
+
+
+def read_report(path: Path) -> Iterator[dict]:
+    """
+    Yields the records of a report written in either format.
+    NDJSON reports are read one line at a time. Raises a `ReportError` if the file is not a readable report.
+    """
+    try:
+        with path.open(encoding="utf-8") as f:
+            first_line = f.readline()
+            try:
+                first_record = json.loads(first_line) if first_line.strip() else None
+            except (
+                ValueError
+            ):  # the opening line of a JSON document is not valid JSON on its own
+                first_record = None
+                document = json.loads(first_line + f.read())
+            else:
+                document = first_record
+            if isinstance(document, dict) and "results" in document:
+                if not isinstance(document["results"], list):
+                    raise ValueError("'results' is not an array")
+                yield from document["results"]
+                return
+            if first_record is not None:
+                yield first_record
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    except (OSError, ValueError) as e:
+        raise ReportError(f"{path} is not a readable report: {e}")
+
+
+def result_from_record(record: dict) -> AuditResult:
+    """
+    Returns the audit result described by a report record. Raises a `ReportError` if the record is malformed.
+    """
+    try:
+        return AuditResult(
+            repo=Repository(name=record["repo"], url=record["url"], org=record["org"]),
+            exit_code=int(record["exit_code"]),
+            duration=float(record["duration"]),
+            output=record.get("output"),
+            reused=bool(record.get("reused", False)),
+            timed_out=bool(record.get("timed_out", False)),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise ReportError(f"Malformed report record: {e!r}")
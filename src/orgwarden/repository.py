@@ -1,10 +1,11 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Repository:
     """
     Represents a GitHub repository.
+    Uses `__slots__` rather than a per-instance `__dict__`, since an organization listing can hold tens of thousands.
 
     Attributes
     __________
@@ -14,8 +15,18 @@ class Repository:
         Repository URL
     org : str
         GitHub organization to which the repo belongs
+    pushed_at : str | None
+        ISO 8601 time of the last push, if known
+    updated_at : str | None
+        ISO 8601 time the repository was last updated, if known
+    size : int | None
+        Size of the repository in KB as reported by GitHub, if known
     """
 
     name: str
     url: str
     org: str
+    # metadata from the org listing, not part of a repository's identity
+    pushed_at: str | None = field(default=None, compare=False)
+    updated_at: str | None = field(default=None, compare=False)
+    size: int | None = field(default=None, compare=False)
@@ -0,0 +1,145 @@
+import heapq
+import sqlite3
+import statistics
+from collections.abc import Iterable
+from dataclasses import dataclass
+from enum import Enum
+from orgwarden.repository import Repository
+from orgwarden.sharding import repo_key
+
+# days of audit history a repository's expected duration is averaged over
+DURATION_HISTORY_DAYS = 30
+# audit seconds per KB of repository assumed when no repository has both a past duration and a size
+DEFAULT_SECONDS_PER_KB = 0.001
+
+
+class SchedulePolicy(str, Enum):
+    """
+    The order in which repositories are audited.
+    """
+
+    LISTING = (
+        "listing"  # as listed, auditing starts while the listing is still being fetched
+    )
+    LONGEST_FIRST = (
+        "longest-first"  # longest estimated audit first, so no long audit starts last
+    )
+    OLDEST_RESULT_FIRST = "oldest-result-first"  # least recently audited first, never audited before all others
+
+
+@dataclass(frozen=True)
+class RepoStats:
+    """
+    What earlier runs recorded about a repository.
+
+    Attributes
+    __________
+    duration : float | None
+        Average audit time in seconds, or None if the repository was never audited
+    last_audited : float | None
+        Unix time of the repository's last audit, or None if it was never audited
+    """
+
+    duration: float | None
+    last_audited: float | None
+
+
+class DurationEstimator:
+    """
+    Estimates how long each repository's audit will take.
+
+    A repository's average duration from earlier runs is used when there is one. Otherwise the estimate is
+    proportional to the repository's size, at the seconds per KB seen across repositories with both a duration
+    and a size. Repositories with neither are estimated at the median estimate of the others.
+
+    Attributes
+    __________
+    stats : dict[str, RepoStats]
+        What earlier runs recorded about each repository, by `repo_key`
+    """
+
+    def __init__(self, stats: dict[str, RepoStats], repos: Iterable[Repository]):
+        self.stats = stats
+        total_duration = total_size = 0.0
+        for repo in repos:
+            duration = self._duration(repo)
+            if duration is not None and repo.size:
+                total_duration += duration
+                total_size += repo.size
+        self.seconds_per_kb = (
+            total_duration / total_size if total_size else DEFAULT_SECONDS_PER_KB
+        )
+
+    def _duration(self, repo: Repository) -> float | None:
+        stats = self.stats.get(repo_key(repo.org, repo.name))
+        return stats.duration if stats else None
+
+    def estimate(self, repo: Repository) -> float | None:
+        """
+        Returns the estimated audit time of `repo` in seconds, or None if nothing is known about it.
+        """
+        duration = self._duration(repo)
+        if duration is not None:
+            return duration
+        if repo.size is not None:
+            return repo.size * self.seconds_per_kb
+        return None
+
+    def estimates(self, repos: list[Repository]) -> list[float]:
+        """
+        Returns the estimated audit time of each repository in seconds.
+        """
+        estimates = [self.estimate(repo) for repo in repos]
+        known = [estimate for estimate in estimates if estimate is not None]
+        default = statistics.median(known) if known else 0.0
+        return [default if estimate is None else estimate for estimate in estimates]
+
+
+def stats_from_history(rows: Iterable[sqlite3.Row | dict]) -> dict[str, RepoStats]:
+    """
+    Returns the stats of each repository in rows returned by `AuditHistory.repo_stats`, by `repo_key`.
+    """
+    return {
+        repo_key(row["org"], row["repo"]): RepoStats(
+            row["average_duration"], row["last_audited"]
+        )
+        for row in rows
+    }
+
+
+def schedule(
+    repos: list[Repository],
+    policy: SchedulePolicy,
+    stats: dict[str, RepoStats],
+) -> list[Repository]:
+    """
+    Returns `repos` in the order `policy` audits them. Ties keep their listing order.
+    """
+    if policy == SchedulePolicy.LONGEST_FIRST:
+        estimates = DurationEstimator(stats, repos).estimates(repos)
+        order = sorted(range(len(repos)), key=lambda i: -estimates[i])
+        return [repos[i] for i in order]
+    if policy == SchedulePolicy.OLDEST_RESULT_FIRST:
+
+        def last_audited(repo: Repository) -> float:
+            repo_stats = stats.get(repo_key(repo.org, repo.name))
+            if repo_stats is None or repo_stats.last_audited is None:
+                return float("-inf")
+            return repo_stats.last_audited
+
+        return sorted(repos, key=last_audited)
+    return list(repos)
+
+
+def simulate_wall_time(durations: Iterable[float], jobs: int) -> float:
+    """
+    Returns the wall time of running audits of `durations` seconds in the given order on `jobs` slots,
+    each audit starting on the first slot to become free.
+    """
+    if jobs < 1:
+        raise ValueError("jobs must be at least 1.")
+
+    slots = [0.0] * jobs  # time each slot becomes free
+    for duration in durations:
+        heapq.heappush(slots, heapq.heappop(slots) + duration)
+    return max(slots)
@@ -0,0 +1,116 @@
+import hashlib
+import heapq
+from collections.abc import Iterable
+from dataclasses import dataclass
+import typer
+from orgwarden.repository import Repository
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    One of the slices an audit's repositories are split into, so several machines can each audit one.
+
+    Attributes
+    __________
+    index : int
+        Number of the slice, from 1 to `count`
+    count : int
+        Number of slices
+    """
+
+    index: int
+    count: int
+
+    def __post_init__(self):
+        if self.count < 1:
+            raise ValueError("The shard count must be at least 1.")
+        if not 1 <= self.index <= self.count:
+            raise ValueError(
+                f"The shard index must be between 1 and {self.count}, got {self.index}."
+            )
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def parse_shard(value: str) -> Shard:
+    index, _, count = value.partition("/")
+    try:
+        return Shard(int(index), int(count))
+    except ValueError as e:
+        raise typer.BadParameter(
+            f"'{value}' is not a valid shard, expected 'I/N' with 1 <= I <= N, e.g. '2/4'. {e}"
+        )
+
+
+def repo_key(org: str, name: str) -> str:
+    """
+    Returns the key a repository is assigned to a shard by. GitHub names are case-insensitive.
+    """
+    return f"{org}/{name}".lower()
+
+
+def hash_shard(key: str, count: int) -> int:
+    """
+    Returns the shard of `key`, from 1 to `count`. A cryptographic hash spreads keys evenly
+    even when names share long prefixes, and gives every machine the same answer.
+    """
+    digest = hashlib.sha256(key.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+class ShardPlan:
+    """
+    Assigns repositories to `count` shards.
+
+    Repositories with a known duration are spread with the longest-processing-time rule, each going to the
+    least loaded shard, so every shard gets about the same total audit time. Other repositories, such as ones
+    created since the durations were recorded, are assigned by `hash_shard`. Assignments only depend on
+    `count` and `durations`, so every machine computes the same plan as long as they are given the same durations.
+
+    Attributes
+    __________
+    count : int
+        Number of shards
+    durations : dict[str, float]
+        Past audit duration in seconds of each repository, by `repo_key`
+    """
+
+    def __init__(self, count: int, durations: dict[str, float] | None = None):
+        if count < 1:
+            raise ValueError("count must be at least 1.")
+
+        self.count = count
+        self.durations = durations or {}
+        self._assigned: dict[str, int] = {}
+        # (load, shard) of every shard, the least loaded shard and then the lowest index is popped first
+        loads = [(0.0, index) for index in range(1, count + 1)]
+        for key in sorted(self.durations, key=lambda k: (-self.durations[k], k)):
+            load, index = heapq.heappop(loads)
+            self._assigned[key] = index
+            heapq.heappush(loads, (load + self.durations[key], index))
+
+    def shard_of(self, repo: Repository) -> int:
+        """
+        Returns the shard `repo` belongs to, from 1 to `count`.
+        """
+        key = repo_key(repo.org, repo.name)
+        index = self._assigned.get(key)
+        return index if index is not None else hash_shard(key, self.count)
+
+
+def durations_from_records(records: Iterable[dict]) -> dict[str, float]:
+    """
+    Returns the duration of each repository in a report's records, by `repo_key`.
+    Later records of the same repository replace earlier ones.
+    """
+    durations = {}
+    for record in records:
+        try:
+            durations[repo_key(record["org"], record["repo"])] = float(
+                record["duration"]
+            )
+        except (KeyError, TypeError, ValueError):
+            continue
+    return durations
@@ -0,0 +1,167 @@
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class PhaseSummary:
+    """
+    The combined timing of every span recorded for one phase.
+
+    Attributes
+    __________
+    phase : str
+        Name of the phase, e.g. 'api' or 'audit'
+    count : int
+        Number of spans
+    total : float
+        Sum of the spans' durations in seconds. Concurrent spans are all counted, so this can exceed the wall time
+    longest : float
+        Duration of the longest span in seconds
+    """
+
+    phase: str
+    count: int
+    total: float
+    longest: float
+
+
+class Tracer:
+    """
+    Collects timed spans and writes them as Chrome trace-event JSON, which can be opened in
+    `chrome://tracing` or https://ui.perfetto.dev.
+
+    Spans are recorded on the thread that ran them. Spans recorded from an asyncio task are grouped by task,
+    so concurrent audits on one event loop get a row each. A single `Tracer` is safe to share between threads.
+
+    Attributes
+    __________
+    start : float
+        `time.perf_counter` value that span timestamps are relative to
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self._events: list[dict] = []
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, phase: str, start: float, end: float, **args) -> None:
+        """
+        Records a span that ran from `start` to `end`, both `time.perf_counter` values.
+        """
+        event = {
+            "name": name,
+            "cat": phase,
+            "ph": "X",  # complete event
+            "ts": (start - self.start) * 1e6,  # microseconds
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": _track_id(),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._events.append(event)
+
+    @property
+    def events(self) -> list[dict]:
+        with self._lock:
+            return list(self._events)
+
+    def summary(self) -> list[PhaseSummary]:
+        """
+        Returns the timing of each phase, in the order the phases were first seen.
+        """
+        phases: dict[str, list[float]] = {}
+        for event in self.events:
+            phases.setdefault(event["cat"], []).append(event["dur"] / 1e6)
+        return [
+            PhaseSummary(phase, len(durations), sum(durations), max(durations))
+            for phase, durations in phases.items()
+        ]
+
+    def write(self, path: Path) -> None:
+        """
+        Writes the recorded spans to `path` in the Chrome trace-event format.
+        """
+        events = self.events
+        metadata = {
+            "name": "process_name",
+            "ph": "M",
+            "pid": os.getpid(),
+            "args": {"name": "orgwarden"},
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(
+                {"traceEvents": [metadata, *events], "displayTimeUnit": "ms"},
+                f,
+            )
+
+
+def _track_id() -> int:
+    """
+    Returns the id of the current asyncio task, or of the current thread outside of a task.
+    """
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:  # no running event loop
+        task = None
+    return id(task) if task is not None else threading.get_ident()
+
+
+_tracer: Tracer | None = None
+
+
+def start_tracing() -> Tracer:
+    """
+    Starts recording spans process-wide and returns the `Tracer` they are recorded to.
+    """
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing() -> None:
+    """
+    Stops recording spans.
+    """
+    global _tracer
+    _tracer = None
+
+
+def active_tracer() -> Tracer | None:
+    """
+    Returns the `Tracer` spans are being recorded to, or None if tracing is off.
+    """
+    return _tracer
+
+
+@contextlib.contextmanager
+def _recorded_span(tracer: Tracer, name: str, phase: str, args: dict) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracer.add_span(name, phase, start, time.perf_counter(), **args)
+
+
+# returned while tracing is off, so instrumented code pays for one global lookup per span
+_NO_SPAN = contextlib.nullcontext()
+
+
+def span(name: str, phase: str, **args) -> contextlib.AbstractContextManager:
+    """
+    Returns a context manager that records the time spent in its block as a span of `phase`,
+    or does nothing if tracing is off.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NO_SPAN
+    return _recorded_span(tracer, name, phase, args)
@@ -1,7 +1,13 @@
+import sqlite3
+from datetime import datetime
+from pathlib import Path
 import typer
+from orgwarden.audit import AuditResult
+from orgwarden.audit_history import HistoryView
+from orgwarden.tracing import PhaseSummary
 
 
-def print_centered_message(message_with_spaces: str):
+def print_centered_message(message_with_spaces: str, err: bool = False):
     REPO_AUDITOR_OUTPUT_LENGTH = 180
     BAR_CHAR = "─"
     message_with_spaces = f" {message_with_spaces} "
@@ -10,7 +16,8 @@ def print_centered_message(message_with_spaces: str):
         typer.style(
             f"{BAR_CHAR * side_bar_length}{message_with_spaces}{BAR_CHAR * side_bar_length}",
             fg=typer.colors.CYAN,
-        )
+        ),
+        err=err,
     )
 
 
@@ -53,3 +60,202 @@ def print_unused_settings_warning(repo_name: str):
         ),
         err=True,
     )
+
+
+def print_missing_shard_warning(shard: str):
+    typer.echo(
+        typer.style(
+            f"No results from shard {shard} were merged.",
+            fg=typer.colors.YELLOW,
+        ),
+        err=True,
+    )
+
+
+def print_journal_mismatch_warning(path: Path):
+    typer.echo(
+        typer.style(
+            f"The journal at {path} is from a different run, starting over.",
+            fg=typer.colors.YELLOW,
+        ),
+        err=True,
+    )
+
+
+def print_unsigned_webhooks_warning():
+    typer.echo(
+        typer.style(
+            "No webhook secret was provided, so webhook deliveries are accepted without verifying their signature.",
+            fg=typer.colors.YELLOW,
+        ),
+        err=True,
+    )
+
+
+def print_serving(webhook_url: str, status_url: str):
+    print_centered_message(f"Serving Webhooks at {webhook_url}")
+    typer.echo(f"Status: {status_url}")
+    typer.echo("Press Ctrl-C to stop.")
+
+
+def print_audit_summary(results: list[AuditResult]):
+    print_centered_message("Audit Summary")
+    if not results:
+        typer.echo("No repositories were audited.")
+        return
+
+    table = []
+    for result in results:
+        # reused results were not audited in this run
+        if result.reused:
+            wall_time = "reused"
+        elif result.timed_out:
+            wall_time = "timed out"
+        else:
+            wall_time = f"{result.duration:.1f}s"
+        table.append(
+            [
+                f"{result.repo.org}/{result.repo.name}",
+                str(result.exit_code),
+                wall_time,
+            ]
+        )
+    print_table(
+        ["Repository", "Exit Code", "Wall Time"],
+        table,
+        row_colors=[
+            typer.colors.GREEN if result.exit_code == 0 else typer.colors.RED
+            for result in results
+        ],
+    )
+
+
+def format_timestamp(timestamp: float | None) -> str:
+    if timestamp is None:
+        return "never"
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+def print_table(
+    headers: list[str],
+    rows: list[list[str]],
+    err: bool = False,
+    row_colors: list[str] | None = None,
+):
+    widths = [
+        max(len(header), *(len(row[i]) for row in rows))
+        for i, header in enumerate(headers)
+    ]
+    typer.echo(
+        "  ".join(f"{header:<{width}}" for header, width in zip(headers, widths)),
+        err=err,
+    )
+    for i, row in enumerate(rows):
+        line = "  ".join(f"{cell:<{width}}" for cell, width in zip(row, widths))
+        if row_colors is not None:
+            line = typer.style(line, fg=row_colors[i])
+        typer.echo(line, err=err)
+
+
+def print_history(view: HistoryView, rows: list[sqlite3.Row], show_output: bool):
+    print_centered_message(f"Audit History: {view.value}")
+    if not rows:
+        typer.echo("No matching audits were found.")
+        return
+
+    if view == HistoryView.RECENT:
+        headers = ["Run", "Repository", "Exit Code", "Finished", "Wall Time"]
+        table = [
+            [
+                str(row["run_id"]),
+                f"{row['org']}/{row['repo']}",
+                str(row["exit_code"]),
+                format_timestamp(row["finished_at"]),
+                "reused" if row["reused"] else f"{row['duration']:.1f}s",
+            ]
+            for row in rows
+        ]
+    elif view == HistoryView.SLOWEST:
+        headers = ["Repository", "Audits", "Average", "Slowest"]
+        table = [
+            [
+                f"{row['org']}/{row['repo']}",
+                str(row["audits"]),
+                f"{row['average_duration']:.1f}s",
+                f"{row['max_duration']:.1f}s",
+            ]
+            for row in rows
+        ]
+    elif view == HistoryView.FAILING:
+        headers = ["Repository", "Exit Code", "Failing Since", "Last Good"]
+        table = [
+            [
+                f"{row['org']}/{row['repo']}",
+                str(row["exit_code"]),
+                format_timestamp(row["failing_since"]),
+                format_timestamp(row["last_good"]),
+            ]
+            for row in rows
+        ]
+    else:
+        headers = ["Run", "Repository", "Finished", "Wall Time"]
+        table = [
+            [
+                str(row["run_id"]),
+                f"{row['org']}/{row['repo']}",
+                format_timestamp(row["finished_at"]),
+                f"{row['duration']:.1f}s",
+            ]
+            for row in rows
+        ]
+    print_table(headers, table)
+
+    # only the per-result views select the captured output; `in` on a row checks its values, not its columns
+    if show_output and "output" in rows[0].keys():  # noqa: SIM118
+        for row in rows:
+            print_centered_message(
+                f"Output: {row['org']}/{row['repo']} (run {row['run_id']})"
+            )
+            if row["output"] is None:
+                typer.echo("No output was captured.")
+            else:
+                typer.echo(row["output"], nl=False)
+
+
+def print_schedule_savings(policy: str, listing_time: float, scheduled_time: float):
+    # both times replay this run's audit durations, so they are estimates rather than measurements
+    saved = listing_time - scheduled_time
+    typer.echo(
+        f"Auditing {policy} took an estimated {scheduled_time:.1f}s "
+        f"instead of {listing_time:.1f}s in listing order, "
+        + (f"saving {saved:.1f}s." if saved >= 0 else f"losing {-saved:.1f}s.")
+    )
+
+
+def print_trace_summary(
+    phases: list[PhaseSummary], wall_time: float, path: Path | None
+):
+    # written to stderr, so it never mixes with report records written to stdout
+    print_centered_message("Trace Summary", err=True)
+    if phases:
+        print_table(
+            ["Phase", "Spans", "Total", "Mean", "Longest"],
+            [
+                [
+                    phase.phase,
+                    str(phase.count),
+                    f"{phase.total:.3f}s",
+                    f"{phase.total / phase.count:.3f}s",
+                    f"{phase.longest:.3f}s",
+                ]
+                for phase in phases
+            ],
+            err=True,
+        )
+    else:
+        typer.echo("No spans were recorded.", err=True)
+    # concurrent spans overlap, so phase totals can add up to more than the wall time
+    message = f"Wall time: {wall_time:.3f}s."
+    if path is not None:
+        message += f" Trace written to {path}"
+    typer.echo(message, err=True)
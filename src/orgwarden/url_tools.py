@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from pathlib import Path
 from urllib.parse import urlparse
 
 
@@ -33,3 +34,34 @@ def validate_url(url: str) -> ParsedURL:
         org_name=split_path[0],
         repo_name=split_path[1] if len(split_path) == 2 else None,
     )
+
+
+def read_url_file(path: Path) -> list[str]:
+    """
+    Returns the urls listed in a file, one per line.
+    Blank lines and lines starting with '#' are ignored.
+    """
+    urls = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            urls.append(line)
+    return urls
+
+
+def group_urls_by_hostname(urls: list[str]) -> dict[str, list[tuple[str, ParsedURL]]]:
+    """
+    Validates the provided urls and groups them by hostname, preserving their order.
+    Trailing slashes are removed, and duplicate urls are dropped.
+    Raises a ValueError if any url is invalid.
+    """
+    groups: dict[str, list[tuple[str, ParsedURL]]] = {}
+    seen: set[str] = set()
+    for url in urls:
+        parsed_url = validate_url(url)
+        url = url.rstrip("/")
+        if url in seen:
+            continue
+        seen.add(url)
+        groups.setdefault(parsed_url.hostname, []).append((url, parsed_url))
+    return groups
@@ -0,0 +1,362 @@
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from multiprocessing.sharedctypes import Synchronized
+from typing import Self
+from orgwarden.audit import (
+    AuditResult,
+    build_repo_auditor_args,
+    load_repo_auditor_app,
+    run_repo_auditor_in_process,
+    timed_out_result,
+)
+from orgwarden.repository import Repository
+
+# seconds between worker liveness checks while waiting for results
+_POLL_INTERVAL = 0.5
+# value of a worker's `current_task` while it is idle
+_NO_TASK = -1
+
+
+def peak_memory_mb() -> float | None:
+    """
+    Returns the peak resident memory of the current process in MB, or None if it cannot be measured on this platform.
+    """
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _worker_main(
+    task_queue: multiprocessing.Queue,
+    result_queue: multiprocessing.Queue,
+    current_task: Synchronized,
+    runner: Callable[[list[str]], tuple[int, str]],
+    initializer: Callable[[], object] | None,
+    max_tasks: int | None,
+    max_memory_mb: float | None,
+) -> None:
+    """
+    Worker process loop. Runs `initializer` once, then takes tasks from `task_queue` until it receives
+    `None` or reaches its task or memory limit.
+    The id of the task being run is published through `current_task` so the pool can report it if the worker crashes.
+    """
+    pid = os.getpid()
+    if initializer is not None:
+        initializer()
+
+    completed_tasks = 0
+    while True:
+        task = task_queue.get()
+        if task is None:  # shutdown sentinel
+            return
+        task_id, args = task
+        current_task.value = task_id
+        exit_code, output = runner(args)
+        completed_tasks += 1
+
+        memory_mb = peak_memory_mb()
+        recycle = (max_tasks is not None and completed_tasks >= max_tasks) or (
+            max_memory_mb is not None
+            and memory_mb is not None
+            and memory_mb > max_memory_mb
+        )
+        result_queue.put((pid, task_id, exit_code, output, recycle))
+        current_task.value = _NO_TASK
+        if recycle:
+            return
+
+
+class AuditWorkerPool:
+    """
+    A pool of long-lived worker processes that each import RepoAuditor once and audit many repositories.
+
+    Workers take repositories from a shared queue and send back exit codes and captured output.
+    Repositories are only handed to that queue while a worker is free to run them, so a repository
+    that is still waiting can be withdrawn when its audit times out or the pool shuts down.
+    A worker is replaced after completing `max_tasks_per_worker` audits, or once its peak memory
+    exceeds `max_worker_memory_mb`, so leaks in audit modules cannot build up over a long run.
+    A worker that dies mid-audit is replaced and its repository is reported with exit code 1.
+    A worker whose audit runs past its timeout is killed and replaced.
+
+    Use as a context manager, or call `start` and `shutdown` explicitly.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        *,
+        max_tasks_per_worker: int | None = None,
+        max_worker_memory_mb: float | None = None,
+        runner: Callable[[list[str]], tuple[int, str]] = run_repo_auditor_in_process,
+        initializer: Callable[[], object] | None = load_repo_auditor_app,
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        if max_tasks_per_worker is not None and max_tasks_per_worker < 1:
+            raise ValueError("max_tasks_per_worker must be at least 1.")
+
+        self.workers = workers
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.max_worker_memory_mb = max_worker_memory_mb
+        self._runner = runner
+        self._initializer = initializer
+
+        # spawn (rather than fork) so workers never inherit the parent's threads or locks
+        self._context = multiprocessing.get_context("spawn")
+        self._task_queue = self._context.Queue()
+        self._result_queue = self._context.Queue()
+        self._processes: dict[int, multiprocessing.process.BaseProcess] = {}
+        self._current_tasks: dict[
+            int, Synchronized
+        ] = {}  # pid -> id of the task being run
+        self._futures: dict[int, Future[tuple[int, str]]] = {}
+        # tasks waiting for a free worker, in submission order
+        self._pending: deque[tuple[int, list[str]]] = deque()
+        # tasks handed to the task queue that have not finished yet
+        self._dispatched: set[int] = set()
+        # dispatched tasks whose futures were abandoned, whose workers are killed once they start them
+        self._abandoned: set[int] = set()
+        self._task_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._collector: threading.Thread | None = None
+        self._running = False
+        self.recycled_workers = 0
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.shutdown()
+
+    def start(self) -> None:
+        """
+        Starts the worker processes.
+        """
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            for _ in range(self.workers):
+                self._start_worker()
+        self._collector = threading.Thread(target=self._collect_results, daemon=True)
+        self._collector.start()
+
+    def shutdown(self) -> None:
+        """
+        Stops all worker processes once they finish their current audits.
+        Repositories that were submitted but never started are reported with exit code 1.
+        """
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            while self._pending:
+                task_id, _ = self._pending.popleft()
+                self._resolve(
+                    task_id, (1, "The worker pool shut down before this audit ran.\n")
+                )
+            for _ in self._processes:
+                self._task_queue.put(None)
+
+        if self._collector:
+            self._collector.join()
+        for process in list(self._processes.values()):
+            process.join()
+
+        with self._lock:
+            for future in self._futures.values():
+                future.set_result(
+                    (1, "The worker pool shut down before this audit ran.\n")
+                )
+            self._futures.clear()
+            self._dispatched.clear()
+            self._abandoned.clear()
+            self._processes.clear()
+            self._current_tasks.clear()
+
+    def submit(self, args: list[str]) -> Future[tuple[int, str]]:
+        """
+        Queues a RepoAuditor run with the provided argument vector.
+        Returns a `Future` that resolves to the exit code and captured output.
+        """
+        future: Future[tuple[int, str]] = Future()
+        with self._lock:
+            if not self._running:
+                raise RuntimeError("The worker pool is not running.")
+            task_id = next(self._task_ids)
+            self._futures[task_id] = future
+            self._pending.append((task_id, args))
+            self._dispatch()
+        return future
+
+    def audit(
+        self,
+        repo: Repository,
+        gh_pat: str,
+        audit_settings: dict[str, str] | None,
+        modules: list[str] | None,
+        timeout: float | None = None,
+    ) -> AuditResult:
+        """
+        Runs RepoAuditor against the specified repository on a warm worker and returns an `AuditResult`.
+        The worker is killed if the audit does not finish within `timeout` seconds.
+        """
+        args = build_repo_auditor_args(repo, gh_pat, audit_settings, modules)
+        start = time.perf_counter()
+        future = self.submit(args)
+        try:
+            exit_code, output = future.result(timeout)
+        except TimeoutError:
+            if self._kill_task(future):
+                assert timeout is not None
+                return timed_out_result(repo, time.perf_counter() - start, "", timeout)
+            exit_code, output = future.result()  # finished in the meantime
+        return AuditResult(
+            repo=repo,
+            exit_code=exit_code,
+            duration=time.perf_counter() - start,
+            output=output,
+        )
+
+    def _kill_task(self, future: Future[tuple[int, str]]) -> bool:
+        """
+        Abandons the task of `future`. A task still waiting for a worker is withdrawn, and the worker running
+        a started task is killed and then replaced like a crashed worker.
+        Returns False if the task already finished.
+        """
+        with self._lock:
+            task_id = next(
+                (task_id for task_id, f in self._futures.items() if f is future), None
+            )
+            if task_id is None:
+                return False
+            del self._futures[task_id]
+            if task_id in self._dispatched:
+                self._abandoned.add(task_id)
+                self._kill_abandoned()
+            else:
+                self._pending = deque(
+                    task for task in self._pending if task[0] != task_id
+                )
+        return True
+
+    def _kill_abandoned(self) -> None:
+        # a dispatched task may not have been taken by a worker yet, so this is checked again on every poll
+        for pid, current_task in self._current_tasks.items():
+            if current_task.value in self._abandoned:
+                self._processes[pid].kill()
+
+    def _dispatch(self) -> None:
+        # hand over at most one task per worker, so every task in the task queue is started right away
+        while (
+            self._running
+            and self._pending
+            and len(self._dispatched) < len(self._processes)
+        ):
+            task_id, args = self._pending.popleft()
+            self._dispatched.add(task_id)
+            self._task_queue.put((task_id, args))
+
+    def _start_worker(self) -> None:
+        current_task = self._context.Value("q", _NO_TASK)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(
+                self._task_queue,
+                self._result_queue,
+                current_task,
+                self._runner,
+                self._initializer,
+                self.max_tasks_per_worker,
+                self.max_worker_memory_mb,
+            ),
+            daemon=True,
+        )
+        process.start()
+        assert process.pid is not None
+        self._processes[process.pid] = process
+        self._current_tasks[process.pid] = current_task
+
+    def _resolve(self, task_id: int, result: tuple[int, str]) -> None:
+        self._dispatched.discard(task_id)
+        self._abandoned.discard(task_id)
+        future = self._futures.pop(task_id, None)
+        if future is not None:
+            future.set_result(result)
+
+    def _collect_results(self) -> None:
+        while True:
+            try:
+                message = self._result_queue.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                message = None
+
+            with self._lock:
+                if message is not None:
+                    self._handle_message(message)
+                self._kill_abandoned()
+                self._replace_dead_workers()
+                self._dispatch()
+                if not self._running and not self._processes_alive():
+                    self._drain_messages()
+                    return
+
+    def _drain_messages(self) -> None:
+        while True:
+            try:
+                self._handle_message(self._result_queue.get_nowait())
+            except queue.Empty:
+                return
+
+    def _handle_message(self, message: tuple) -> None:
+        pid, task_id, exit_code, output, recycle = message
+        self._resolve(task_id, (exit_code, output))
+        if recycle:
+            self._current_tasks.pop(pid, None)
+            process = self._processes.pop(pid, None)
+            if process is not None:
+                process.join()
+            self.recycled_workers += 1
+            if self._running:
+                self._start_worker()
+
+    def _replace_dead_workers(self) -> None:
+        if all(process.is_alive() for process in self._processes.values()):
+            return
+
+        # a worker flushes its messages before exiting, so handle them before deciding whether it crashed
+        self._drain_messages()
+
+        for pid, process in list(self._processes.items()):
+            if process.is_alive() or not self._running:
+                continue
+            # a worker exits on its own only after reporting a recycle, which removes it from
+            # `_processes`, so a dead worker still listed here crashed
+            del self._processes[pid]
+            task_id = self._current_tasks.pop(pid).value
+            if task_id != _NO_TASK:
+                self._resolve(
+                    task_id,
+                    (
+                        1,
+                        f"Audit worker exited unexpectedly (exit code {process.exitcode}).\n",
+                    ),
+                )
+            self._start_worker()
+
+    def _processes_alive(self) -> bool:
+        return any(process.is_alive() for process in self._processes.values())
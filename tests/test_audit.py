@@ -1,5 +1,24 @@
+import asyncio
+import subprocess
+import threading
 from subprocess import CompletedProcess
-from orgwarden.audit import audit_repository, KNOWN_MODULES
+import sys
+from orgwarden import audit
+from orgwarden.audit import (
+    TIMEOUT_EXIT_CODE,
+    AuditEngine,
+    AuditResult,
+    audit_repository,
+    build_repo_auditor_args,
+    capture_audit,
+    load_repo_auditor_app,
+    audit_repository_async,
+    prefetch,
+    run_audits,
+    run_audits_async,
+    KNOWN_MODULES,
+)
+import pytest
 from pytest import MonkeyPatch
 from types import SimpleNamespace
 
@@ -8,15 +27,21 @@ from tests.constants import GITHUB_PAT, ORGWARDEN_REPO, ORGWARDEN_URL
 
 # RepoAuditor is run via cli
 repo_auditor_IMPORT_PATH = "subprocess.run"
+load_repo_auditor_app_IMPORT_PATH = "orgwarden.audit.load_repo_auditor_app"
+REPO_AUDITOR_PROGRAM_IMPORT_PATH = "orgwarden.audit.REPO_AUDITOR_PROGRAM"
+build_repo_auditor_command_IMPORT_PATH = "orgwarden.audit.build_repo_auditor_command"
 
 
 def test_repo_auditor_called_correctly(monkeypatch: MonkeyPatch):
     mock_repo_auditor_called = False
 
-    def mock_repo_auditor(cmd: str, shell: bool, text: bool) -> CompletedProcess[str]:
+    def mock_repo_auditor(
+        cmd: str, shell: bool, check: bool, text: bool
+    ) -> CompletedProcess[str]:
         nonlocal mock_repo_auditor_called
         mock_repo_auditor_called = True
         assert shell, text
+        assert not check
         assert "uv run repo_auditor" in cmd
         for module in KNOWN_MODULES:
             assert f"--include {module}" in cmd
@@ -66,3 +91,401 @@ def test_repo_specifc_cli_flags(monkeypatch: MonkeyPatch):
         REPO, gh_pat=GITHUB_PAT, audit_settings=FLAGS_DICT, modules=None
     )
     assert exit_code == 0
+
+
+def test_capture_audit_buffers_output(monkeypatch: MonkeyPatch):
+    def mock_repo_auditor(cmd: str, *args, **kwargs):
+        assert "uv run repo_auditor" in cmd
+        assert kwargs["stdout"] == subprocess.PIPE
+        assert kwargs["stderr"] == subprocess.STDOUT
+        return SimpleNamespace(returncode=2, stdout="audit output")
+
+    monkeypatch.setattr(repo_auditor_IMPORT_PATH, mock_repo_auditor)
+    result = capture_audit(
+        ORGWARDEN_REPO, GITHUB_PAT, audit_settings=None, modules=None
+    )
+    assert result.repo == ORGWARDEN_REPO
+    assert result.exit_code == 2
+    assert result.output == "audit output"
+    assert result.duration >= 0
+
+
+class TestRunAudits:
+    REPOS = [Repository(f"repo{i}", f"url{i}", "org") for i in range(6)]
+
+    def test_sequential_preserves_order(self):
+        results = list(
+            run_audits(self.REPOS, lambda repo: AuditResult(repo, 0, 0.0), jobs=1)
+        )
+        assert [result.repo for result in results] == self.REPOS
+
+    def test_runs_concurrently(self):
+        JOBS = 3
+        barrier = threading.Barrier(JOBS, timeout=5)
+
+        def audit(repo: Repository) -> AuditResult:
+            barrier.wait()  # only passes if JOBS audits are in flight at once
+            return AuditResult(repo, int(repo.name[-1]), 0.0)
+
+        results = list(run_audits(self.REPOS, audit, jobs=JOBS))
+        assert {result.repo for result in results} == set(self.REPOS)
+        assert max(result.exit_code for result in results) == 5
+
+    def test_rejects_invalid_jobs(self):
+        with pytest.raises(ValueError, match="at least 1"):
+            _ = list(run_audits(self.REPOS, lambda repo: AuditResult(repo, 0, 0.0), 0))
+
+    def test_pulls_repos_lazily(self):
+        JOBS = 2
+        pulled: list[Repository] = []
+
+        def repos():
+            for repo in self.REPOS:
+                pulled.append(repo)
+                yield repo
+
+        results = run_audits(repos(), lambda repo: AuditResult(repo, 0, 0.0), JOBS)
+        _ = next(results)
+        assert len(pulled) <= JOBS + 1
+        assert len(list(results)) == len(self.REPOS) - 1
+
+    def test_finishes_pending_audits_before_raising_repos_error(self):
+        def repos():
+            yield from self.REPOS[:3]
+            raise RuntimeError("crawl failed")
+
+        results: list[AuditResult] = []
+        with pytest.raises(RuntimeError, match="crawl failed"):
+            for result in run_audits(
+                repos(), lambda repo: AuditResult(repo, 0, 0.0), jobs=2
+            ):
+                results.append(result)
+        assert {result.repo for result in results} == set(self.REPOS[:3])
+
+
+class TestPrefetch:
+    def test_preserves_order(self):
+        assert list(prefetch(range(50), maxsize=4)) == list(range(50))
+
+    def test_producer_runs_ahead_up_to_maxsize(self):
+        MAXSIZE = 3
+        produced = threading.Semaphore(0)
+        consumed = threading.Event()
+
+        def items():
+            for i in range(10):
+                produced.release()
+                if i > MAXSIZE:
+                    consumed.wait()
+                yield i
+
+        stream = prefetch(items(), maxsize=MAXSIZE)
+        assert next(stream) == 0
+        # the producer fills the queue without waiting for the consumer
+        for _ in range(MAXSIZE + 1):
+            assert produced.acquire(timeout=5)
+        consumed.set()
+        assert list(stream) == list(range(1, 10))
+
+    def test_reraises_producer_errors(self):
+        def items():
+            yield 1
+            raise RuntimeError("producer failed")
+
+        stream = prefetch(items(), maxsize=2)
+        assert next(stream) == 1
+        with pytest.raises(RuntimeError, match="producer failed"):
+            _ = next(stream)
+
+    def test_stops_producer_when_consumer_stops(self):
+        finished = threading.Event()
+
+        def items():
+            try:
+                for i in range(1000):
+                    yield i
+            finally:
+                finished.set()
+
+        stream = prefetch(items(), maxsize=1)
+        assert next(stream) == 0
+        stream.close()
+        assert finished.wait(timeout=5)
+
+    def test_rejects_invalid_maxsize(self):
+        with pytest.raises(ValueError, match="at least 1"):
+            _ = list(prefetch([], maxsize=0))
+
+
+def test_build_repo_auditor_args():
+    REPO = Repository(name="test_repo", url="test_url", org="test_org")
+    args = build_repo_auditor_args(
+        REPO,
+        GITHUB_PAT,
+        audit_settings={"test_repo": '--flag-1 --flag-2 "quoted value"'},
+        modules=["module1"],
+    )
+    assert args == [
+        "--include",
+        "module1",
+        "--module1-url",
+        "test_url",
+        "--module1-pat",
+        GITHUB_PAT,
+        "--flag-1",
+        "--flag-2",
+        "quoted value",
+    ]
+
+
+class TestInProcessEngine:
+    def test_calls_entry_point_with_args(self, monkeypatch: MonkeyPatch):
+        received_args = None
+
+        def mock_app(args: list[str], prog_name: str):
+            nonlocal received_args
+            received_args = args
+            print("in-process output")
+            raise SystemExit(-1)
+
+        monkeypatch.setattr(load_repo_auditor_app_IMPORT_PATH, lambda: mock_app)
+        monkeypatch.setattr(
+            repo_auditor_IMPORT_PATH,
+            lambda *args, **kwargs: pytest.fail("subprocess should not be used"),
+        )
+        result = capture_audit(
+            ORGWARDEN_REPO, GITHUB_PAT, None, None, engine=AuditEngine.IN_PROCESS
+        )
+        assert received_args == build_repo_auditor_args(
+            ORGWARDEN_REPO, GITHUB_PAT, None, None
+        )
+        assert result.exit_code == 255  # matches the exit status of a child process
+        assert result.output == "in-process output\n"
+
+    def test_exit_codes(self, monkeypatch: MonkeyPatch):
+        def raise_(exception: BaseException):
+            raise exception
+
+        TEST_CASES = [  # app behavior, expected exit code, expected output
+            (lambda: None, 0, ""),
+            (lambda: raise_(SystemExit()), 0, ""),
+            (lambda: raise_(SystemExit(2)), 2, ""),
+            (lambda: raise_(SystemExit("usage error")), 1, "usage error"),
+            (lambda: raise_(RuntimeError("crashed")), 1, "RuntimeError: crashed"),
+        ]
+        for behavior, expected_exit_code, expected_output in TEST_CASES:
+            monkeypatch.setattr(
+                load_repo_auditor_app_IMPORT_PATH,
+                lambda: lambda *args, **kwargs: behavior(),
+            )
+            result = capture_audit(
+                ORGWARDEN_REPO, GITHUB_PAT, None, None, engine=AuditEngine.IN_PROCESS
+            )
+            assert result.exit_code == expected_exit_code
+            assert expected_output in result.output
+
+    def test_falls_back_to_subprocess(self, monkeypatch: MonkeyPatch):
+        monkeypatch.setattr(load_repo_auditor_app_IMPORT_PATH, lambda: None)
+        monkeypatch.setattr(
+            repo_auditor_IMPORT_PATH,
+            lambda *args, **kwargs: SimpleNamespace(returncode=0, stdout="subprocess"),
+        )
+        result = capture_audit(
+            ORGWARDEN_REPO, GITHUB_PAT, None, None, engine=AuditEngine.IN_PROCESS
+        )
+        assert result.output == "subprocess"
+
+        with pytest.raises(ImportError, match="cannot be imported"):
+            _ = audit.run_repo_auditor_in_process([])
+
+    def test_load_repo_auditor_app(self, monkeypatch: MonkeyPatch):
+        load_repo_auditor_app.cache_clear()
+        assert callable(load_repo_auditor_app())
+
+        load_repo_auditor_app.cache_clear()
+        monkeypatch.setitem(sys.modules, "RepoAuditor.EntryPoint", None)
+        assert load_repo_auditor_app() is None
+        load_repo_auditor_app.cache_clear()
+
+
+class TestAsyncioEngine:
+    REPOS = [Repository(f"repo{i}", f"url{i}", "org") for i in range(20)]
+
+    def test_audit_repository_async(self, monkeypatch: MonkeyPatch):
+        # print the received arguments and exit with the number of arguments
+        monkeypatch.setattr(
+            REPO_AUDITOR_PROGRAM_IMPORT_PATH,
+            [
+                sys.executable,
+                "-c",
+                "import sys; print(' '.join(sys.argv[1:])); sys.exit(len(sys.argv) - 1)",
+            ],
+        )
+        result = asyncio.run(
+            audit_repository_async(ORGWARDEN_REPO, GITHUB_PAT, None, ["GitHub"])
+        )
+        assert result.repo == ORGWARDEN_REPO
+        assert result.exit_code == 6
+        assert result.output == (
+            f"--include GitHub --GitHub-url {ORGWARDEN_URL} --GitHub-pat {GITHUB_PAT}\n"
+        )
+        assert result.duration > 0
+
+    def test_missing_program(self, monkeypatch: MonkeyPatch):
+        monkeypatch.setattr(
+            REPO_AUDITOR_PROGRAM_IMPORT_PATH, ["orgwarden-missing-program"]
+        )
+        result = asyncio.run(
+            audit_repository_async(ORGWARDEN_REPO, GITHUB_PAT, None, None)
+        )
+        assert result.exit_code == 127
+        assert result.output
+
+    def test_runs_concurrently_on_one_loop(self):
+        JOBS = 8
+        in_flight = max_in_flight = 0
+        threads: set[int] = set()
+
+        async def audit(repo: Repository) -> AuditResult:
+            nonlocal in_flight, max_in_flight
+            threads.add(threading.get_ident())
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return AuditResult(repo, int(repo.name[4:]) % 3, 0.0)
+
+        results = list(run_audits_async(self.REPOS, audit, jobs=JOBS))
+        assert {result.repo for result in results} == set(self.REPOS)
+        assert max_in_flight == JOBS
+        assert len(threads) == 1
+
+    def test_pulls_repos_lazily(self):
+        JOBS = 2
+        pulled: list[Repository] = []
+
+        def repos():
+            for repo in self.REPOS:
+                pulled.append(repo)
+                yield repo
+
+        async def audit(repo: Repository) -> AuditResult:
+            return AuditResult(repo, 0, 0.0)
+
+        results = run_audits_async(repos(), audit, JOBS)
+        _ = next(results)
+        assert len(pulled) <= JOBS + 1
+        assert len(list(results)) == len(self.REPOS) - 1
+
+    def test_errors(self):
+        def repos():
+            yield from self.REPOS[:3]
+            raise RuntimeError("crawl failed")
+
+        async def audit(repo: Repository) -> AuditResult:
+            return AuditResult(repo, 0, 0.0)
+
+        results: list[AuditResult] = []
+        with pytest.raises(RuntimeError, match="crawl failed"):
+            for result in run_audits_async(repos(), audit, jobs=2):
+                results.append(result)
+        assert len(results) == 3
+
+        async def failing_audit(repo: Repository) -> AuditResult:
+            raise ValueError("audit failed")
+
+        with pytest.raises(ValueError, match="audit failed"):
+            _ = list(run_audits_async(self.REPOS, failing_audit, jobs=2))
+        with pytest.raises(ValueError, match="at least 1"):
+            _ = list(run_audits_async(self.REPOS, audit, jobs=0))
+
+    def test_cancels_audits_when_stopped_early(self):
+        cancelled = 0
+
+        async def audit(repo: Repository) -> AuditResult:
+            nonlocal cancelled
+            if repo.name != "repo0":
+                try:
+                    await asyncio.sleep(60)
+                except asyncio.CancelledError:
+                    cancelled += 1
+                    raise
+            return AuditResult(repo, 0, 0.0)
+
+        results = run_audits_async(self.REPOS, audit, jobs=4)
+        assert next(results).repo.name == "repo0"
+        results.close()
+        assert cancelled == 3  # the audits still in flight alongside repo0
+
+
+def is_running(pid: int) -> bool:
+    """
+    Returns whether a process exists and is not a zombie waiting to be reaped.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rpartition(")")[2].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="reads /proc")
+class TestTimeouts:
+    def test_finishes_within_timeout(self, monkeypatch: MonkeyPatch):
+        monkeypatch.setattr(
+            build_repo_auditor_command_IMPORT_PATH,
+            lambda *args: "echo audited; exit 3",
+        )
+        assert audit_repository(ORGWARDEN_REPO, GITHUB_PAT, None, None, 30) == 3
+        result = capture_audit(ORGWARDEN_REPO, GITHUB_PAT, None, None, timeout=30)
+        assert result == AuditResult(ORGWARDEN_REPO, 3, result.duration, "audited\n")
+
+    def test_kills_process_group(self, monkeypatch: MonkeyPatch, tmp_path):
+        PID_FILE = tmp_path / "pid"
+        # a grandchild that would outlive a shell killed on its own
+        monkeypatch.setattr(
+            build_repo_auditor_command_IMPORT_PATH,
+            lambda *args: f"echo started; sleep 60 & echo $! > {PID_FILE}; wait",
+        )
+        result = capture_audit(ORGWARDEN_REPO, GITHUB_PAT, None, None, timeout=0.5)
+        assert result.timed_out
+        assert result.exit_code == TIMEOUT_EXIT_CODE
+        assert result.duration < 30
+        assert result.output is not None
+        assert result.output.startswith("started\n")
+        assert "did not finish within 0.5 seconds" in result.output
+        grandchild = int(PID_FILE.read_text())
+        assert not is_running(grandchild)
+
+        with pytest.raises(subprocess.TimeoutExpired):
+            _ = audit_repository(ORGWARDEN_REPO, GITHUB_PAT, None, None, 0.5)
+
+    def test_in_process_engine_falls_back(self, monkeypatch: MonkeyPatch):
+        monkeypatch.setattr(
+            load_repo_auditor_app_IMPORT_PATH,
+            lambda: pytest.fail("in-process audits cannot be stopped"),
+        )
+        monkeypatch.setattr(
+            build_repo_auditor_command_IMPORT_PATH, lambda *args: "echo subprocess"
+        )
+        result = capture_audit(
+            ORGWARDEN_REPO,
+            GITHUB_PAT,
+            None,
+            None,
+            engine=AuditEngine.IN_PROCESS,
+            timeout=30,
+        )
+        assert result.output == "subprocess\n"
+
+    def test_asyncio_engine(self, monkeypatch: MonkeyPatch):
+        # RepoAuditor's arguments become the script's unused positional parameters
+        monkeypatch.setattr(
+            REPO_AUDITOR_PROGRAM_IMPORT_PATH, ["sh", "-c", "sleep 60 & wait", "sh"]
+        )
+        result = asyncio.run(
+            audit_repository_async(ORGWARDEN_REPO, GITHUB_PAT, None, None, 0.5)
+        )
+        assert result.timed_out
+        assert result.exit_code == TIMEOUT_EXIT_CODE
+        assert result.duration < 30
@@ -0,0 +1,169 @@
+import sqlite3
+import threading
+from pathlib import Path
+import pytest
+from pytest import MonkeyPatch
+from orgwarden.audit import AuditResult
+from orgwarden.audit_history import (
+    SECONDS_PER_DAY,
+    AuditHistory,
+    default_history_path,
+)
+from orgwarden.repository import Repository
+
+REPOS = [Repository(f"repo{i}", f"url{i}", "org") for i in range(3)]
+
+
+class FakeTime:
+    def __init__(self, monkeypatch: MonkeyPatch):
+        self.now = 1_000_000_000.0
+        monkeypatch.setattr("time.time", lambda: self.now)
+
+    def advance_days(self, days: float) -> None:
+        self.now += days * SECONDS_PER_DAY
+
+
+def count_results(path: Path) -> int:
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def test_default_history_path(monkeypatch: MonkeyPatch, tmp_path: Path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_history_path() == tmp_path / "orgwarden" / "history.sqlite3"
+
+
+def test_rejects_invalid_batch_size(tmp_path: Path):
+    with pytest.raises(ValueError, match="batch_size"):
+        _ = AuditHistory(tmp_path / "history.sqlite3", batch_size=0)
+
+
+def test_batches_writes(tmp_path: Path):
+    DB = tmp_path / "history.sqlite3"
+    with AuditHistory(DB, batch_size=2) as history:
+        run_id = history.start_run("https://github.com/org", ["GitHub"])
+        history.record(run_id, AuditResult(REPOS[0], 0, 1.0), ["GitHub"], None)
+        assert count_results(DB) == 0  # still buffered
+        history.record(run_id, AuditResult(REPOS[1], 0, 1.0), ["GitHub"], "--flag")
+        assert count_results(DB) == 2
+        history.record(run_id, AuditResult(REPOS[2], 1, 1.0), ["GitHub"], None)
+        history.finish_run(run_id, 1)
+        assert count_results(DB) == 3
+
+    with sqlite3.connect(DB) as connection:
+        run = connection.execute("SELECT target, exit_code FROM runs").fetchone()
+        flags = connection.execute(
+            "SELECT flags FROM results WHERE repo = 'repo1'"
+        ).fetchone()
+    assert run == ("https://github.com/org", 1)
+    assert flags == ("--flag",)
+
+
+def test_concurrent_records(tmp_path: Path):
+    DB = tmp_path / "history.sqlite3"
+    with AuditHistory(DB, batch_size=7) as history:
+        run_id = history.start_run("org", None)
+
+        def record_results():
+            for _ in range(50):
+                history.record(run_id, AuditResult(REPOS[0], 0, 0.1), None, None)
+
+        threads = [threading.Thread(target=record_results) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert count_results(DB) == 200
+
+
+def test_recent_and_last_good(tmp_path: Path, monkeypatch: MonkeyPatch):
+    clock = FakeTime(monkeypatch)
+    with AuditHistory(tmp_path / "history.sqlite3") as history:
+        run_id = history.start_run("org", None)
+        history.record(run_id, AuditResult(REPOS[0], 0, 1.0, output="good"), None, None)
+        clock.advance_days(1)
+        history.record(run_id, AuditResult(REPOS[0], 1, 2.0, output="bad"), None, None)
+        clock.advance_days(1)
+        history.record(run_id, AuditResult(REPOS[1], 0, 3.0, reused=True), None, None)
+
+        recent = history.recent(limit=2)
+        assert [(row["repo"], row["exit_code"]) for row in recent] == [
+            ("repo1", 0),
+            ("repo0", 1),
+        ]
+        assert [row["output"] for row in history.recent(10, repo="repo0")] == [
+            "bad",
+            "good",
+        ]
+        assert history.recent(10, org="other_org") == []
+
+        last_good = history.last_good()
+        assert [(row["repo"], row["output"]) for row in last_good] == [
+            ("repo0", "good"),
+            ("repo1", None),
+        ]
+        assert [row["repo"] for row in history.last_good(repo="repo1")] == ["repo1"]
+
+
+def test_slowest(tmp_path: Path, monkeypatch: MonkeyPatch):
+    clock = FakeTime(monkeypatch)
+    with AuditHistory(tmp_path / "history.sqlite3") as history:
+        run_id = history.start_run("org", None)
+        history.record(run_id, AuditResult(REPOS[2], 0, 100.0), None, None)
+        clock.advance_days(10)
+        history.record(run_id, AuditResult(REPOS[0], 0, 1.0), None, None)
+        history.record(run_id, AuditResult(REPOS[0], 0, 3.0), None, None)
+        history.record(run_id, AuditResult(REPOS[1], 0, 5.0), None, None)
+        history.record(run_id, AuditResult(REPOS[1], 0, 50.0, reused=True), None, None)
+
+        rows = history.slowest(limit=10, days=7)
+        assert [
+            (row["repo"], row["audits"], row["average_duration"]) for row in rows
+        ] == [("repo1", 1, 5.0), ("repo0", 2, 2.0)]
+        assert len(history.slowest(limit=1, days=30)) == 1
+        assert history.slowest(limit=10, days=30)[0]["repo"] == "repo2"
+
+
+def test_repo_stats(tmp_path: Path, monkeypatch: MonkeyPatch):
+    clock = FakeTime(monkeypatch)
+    with AuditHistory(tmp_path / "history.sqlite3") as history:
+        run_id = history.start_run("org", None)
+        history.record(run_id, AuditResult(REPOS[0], 0, 100.0), None, None)
+        history.record(run_id, AuditResult(REPOS[1], 0, 9.0), None, None)
+        clock.advance_days(10)
+        history.record(run_id, AuditResult(REPOS[0], 0, 1.0), None, None)
+        history.record(run_id, AuditResult(REPOS[0], 0, 3.0), None, None)
+        history.record(run_id, AuditResult(REPOS[2], 0, 0.0, reused=True), None, None)
+
+        rows = {row["repo"]: row for row in history.repo_stats(days=7)}
+        assert rows.keys() == {"repo0", "repo1"}
+        assert rows["repo0"]["average_duration"] == 2.0
+        assert rows["repo0"]["last_audited"] == clock.now
+        # audited too long ago for its duration to count
+        assert rows["repo1"]["average_duration"] is None
+        assert rows["repo1"]["last_audited"] == clock.now - 10 * SECONDS_PER_DAY
+
+
+def test_failing(tmp_path: Path, monkeypatch: MonkeyPatch):
+    clock = FakeTime(monkeypatch)
+    with AuditHistory(tmp_path / "history.sqlite3") as history:
+        run_id = history.start_run("org", None)
+        start = clock.now
+        # repo0 passed, then has failed for 5 days
+        history.record(run_id, AuditResult(REPOS[0], 0, 1.0), None, None)
+        history.record(
+            run_id, AuditResult(REPOS[1], 1, 1.0), None, None
+        )  # never passed
+        clock.advance_days(1)
+        failing_since = clock.now
+        history.record(run_id, AuditResult(REPOS[0], 1, 1.0), None, None)
+        history.record(run_id, AuditResult(REPOS[2], 1, 1.0), None, None)
+        clock.advance_days(4)
+        history.record(run_id, AuditResult(REPOS[0], 1, 1.0), None, None)
+        history.record(run_id, AuditResult(REPOS[2], 0, 1.0), None, None)  # recovered
+
+        rows = history.failing(days=3)
+        assert [
+            (row["repo"], row["failing_since"], row["last_good"]) for row in rows
+        ] == [("repo1", start, None), ("repo0", failing_since, start)]
+        assert [row["repo"] for row in history.failing(days=4.5)] == ["repo1"]
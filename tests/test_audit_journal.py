@@ -0,0 +1,109 @@
+import json
+from pathlib import Path
+import pytest
+from pytest import MonkeyPatch
+from orgwarden.audit import AuditResult
+from orgwarden.audit_journal import (
+    JOURNAL_VERSION,
+    AuditJournal,
+    default_journal_path,
+    run_fingerprint,
+)
+from orgwarden.repository import Repository
+
+REPOS = [
+    Repository(f"repo{i}", f"https://github.com/org/repo{i}", "org") for i in range(3)
+]
+FINGERPRINT = run_fingerprint(["https://github.com/org"], None, None, False, [])
+
+
+def test_default_journal_path(monkeypatch: MonkeyPatch, tmp_path: Path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_journal_path(FINGERPRINT) == (
+        tmp_path / "orgwarden" / "journals" / f"{FINGERPRINT[:16]}.ndjson"
+    )
+
+
+def test_run_fingerprint():
+    targets = ["https://github.com/org"]
+    assert FINGERPRINT == run_fingerprint(targets, None, None, False, [])
+    assert run_fingerprint(targets, ["A", "B"], None, False, ["x", "y"]) == (
+        run_fingerprint(targets, ["B", "A"], None, False, ["y", "x"])
+    )
+    others = [
+        run_fingerprint(["https://github.com/other"], None, None, False, []),
+        run_fingerprint(targets, ["GitHub"], None, False, []),
+        run_fingerprint(targets, None, {"repo0": "--flag"}, False, []),
+        run_fingerprint(targets, None, None, True, []),
+        run_fingerprint(targets, None, None, False, ["repo0"]),
+        run_fingerprint(targets, None, None, False, [], "1/2"),
+    ]
+    assert len({FINGERPRINT, *others}) == len(others) + 1
+
+
+def test_resume(tmp_path: Path):
+    path = tmp_path / "journals" / "run.ndjson"
+    with AuditJournal(FINGERPRINT, path) as journal:
+        journal.record(AuditResult(REPOS[0], 0, 1.5, output="not journaled"))
+        journal.record(AuditResult(REPOS[1], 2, 2.0))
+        # results are on disk as soon as they are recorded
+        assert len(path.read_text().splitlines()) == 3
+    with path.open("a") as f:
+        f.write('{"repo": "repo2", "url": ')  # cut off by a crash
+
+    with AuditJournal(FINGERPRINT, path, resume=True) as journal:
+        assert not journal.mismatched
+        assert list(journal.completed.values()) == [
+            AuditResult(REPOS[0], 0, 1.5, reused=True),
+            AuditResult(REPOS[1], 2, 2.0, reused=True),
+        ]
+        journal.record(AuditResult(REPOS[2], 0, 1.0))
+
+    with AuditJournal(FINGERPRINT, path, resume=True) as journal:
+        assert list(journal.completed) == [repo.url for repo in REPOS]
+
+    # without resuming, the journal starts over
+    with AuditJournal(FINGERPRINT, path) as journal:
+        assert journal.completed == {}
+    header, *lines = path.read_text().splitlines()
+    assert json.loads(header) == {
+        "version": JOURNAL_VERSION,
+        "fingerprint": FINGERPRINT,
+    }
+    assert lines == []
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        "",
+        "not json\n",
+        json.dumps({"version": JOURNAL_VERSION, "fingerprint": "other"}) + "\n",
+        json.dumps({"version": JOURNAL_VERSION + 1, "fingerprint": FINGERPRINT}) + "\n",
+    ],
+)
+def test_mismatched_journals_are_not_resumed(tmp_path: Path, header: str):
+    path = tmp_path / "run.ndjson"
+    line = json.dumps(
+        {"org": "org", "repo": "repo0", "url": "url0", "exit_code": 0, "duration": 1.0}
+    )
+    path.write_text(header + line + "\n")
+    with AuditJournal(FINGERPRINT, path, resume=True) as journal:
+        assert journal.mismatched
+        assert journal.completed == {}
+
+
+def test_missing_journal_is_resumed_empty(tmp_path: Path):
+    with AuditJournal(FINGERPRINT, tmp_path / "run.ndjson", resume=True) as journal:
+        assert not journal.mismatched
+        assert journal.completed == {}
+
+
+def test_discard(tmp_path: Path):
+    journal = AuditJournal(FINGERPRINT, tmp_path / "run.ndjson")
+    with pytest.raises(RuntimeError, match="not open"):
+        journal.record(AuditResult(REPOS[0], 0, 1.0))
+    journal.open()
+    journal.discard()
+    journal.close()  # closing a discarded journal is a no-op
+    assert not journal.path.exists()
@@ -0,0 +1,93 @@
+import json
+from pathlib import Path
+import pytest
+from pytest import MonkeyPatch
+from orgwarden.audit import AuditResult
+from orgwarden.audit_state import (
+    AuditStateStore,
+    audit_fingerprint,
+    default_state_path,
+)
+from orgwarden.repository import Repository
+
+REPO = Repository(
+    "repo",
+    "https://github.com/org/repo",
+    "org",
+    pushed_at="2025-01-01T00:00:00Z",
+    updated_at="2025-01-02T00:00:00Z",
+)
+
+
+def test_default_state_path(monkeypatch: MonkeyPatch, tmp_path: Path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_state_path() == tmp_path / "orgwarden" / "audit-state.json"
+
+
+def test_audit_fingerprint():
+    fingerprint = audit_fingerprint(REPO, ["GitHub"], "--flag")
+    assert fingerprint == audit_fingerprint(REPO, ["GitHub"], "--flag")
+
+    pushed = Repository(
+        REPO.name,
+        REPO.url,
+        REPO.org,
+        pushed_at="2025-02-01T00:00:00Z",
+        updated_at=REPO.updated_at,
+    )
+    assert audit_fingerprint(pushed, ["GitHub"], "--flag") != fingerprint
+    assert audit_fingerprint(REPO, None, "--flag") != fingerprint
+    assert audit_fingerprint(REPO, ["GitHub"], None) != fingerprint
+    # module order does not change the audit
+    assert audit_fingerprint(REPO, ["a", "b"], None) == audit_fingerprint(
+        REPO, ["b", "a"], None
+    )
+    assert audit_fingerprint(Repository("repo", "url", "org"), None, None) is None
+
+
+def test_reuses_results_of_unchanged_repos(tmp_path: Path):
+    STATE_FILE = tmp_path / "state" / "audit-state.json"
+    fingerprint = audit_fingerprint(REPO, None, None)
+
+    with AuditStateStore(STATE_FILE) as store:
+        assert store.lookup(REPO, fingerprint) is None
+        store.record(AuditResult(REPO, 3, 1.5, output="out"), fingerprint)
+        store.record(AuditResult(REPO, 0, 0.0, reused=True), fingerprint)  # ignored
+        store.record(
+            AuditResult(REPO, 124, 9.0, timed_out=True), fingerprint
+        )  # ignored
+    assert STATE_FILE.exists()
+
+    with AuditStateStore(STATE_FILE) as store:
+        result = store.lookup(REPO, fingerprint)
+        assert result == AuditResult(REPO, 3, 1.5, reused=True)
+        assert store.lookup(REPO, "changed fingerprint") is None
+        assert store.lookup(REPO, None) is None
+
+
+def test_max_age(tmp_path: Path, monkeypatch: MonkeyPatch):
+    STATE_FILE = tmp_path / "audit-state.json"
+    fingerprint = audit_fingerprint(REPO, None, None)
+    now = 1_000_000.0
+    monkeypatch.setattr("time.time", lambda: now)
+    with AuditStateStore(STATE_FILE) as store:
+        store.record(AuditResult(REPO, 0, 1.0), fingerprint)
+
+    now += 2 * 60 * 60
+    with AuditStateStore(STATE_FILE, max_age=3 * 60 * 60) as store:
+        assert store.lookup(REPO, fingerprint) is not None
+    with AuditStateStore(STATE_FILE, max_age=60 * 60) as store:
+        assert store.lookup(REPO, fingerprint) is None
+
+    with pytest.raises(ValueError, match="max_age"):
+        _ = AuditStateStore(STATE_FILE, max_age=-1)
+
+
+def test_ignores_unreadable_state(tmp_path: Path):
+    STATE_FILE = tmp_path / "audit-state.json"
+    fingerprint = audit_fingerprint(REPO, None, None)
+    for contents in ["not json", json.dumps(["not", "a", "dict"])]:
+        STATE_FILE.write_text(contents)
+        store = AuditStateStore(STATE_FILE)
+        store.load()
+        assert store.lookup(REPO, fingerprint) is None
@@ -0,0 +1,126 @@
+import sys
+from pathlib import Path
+import pytest
+from pytest import MonkeyPatch
+from orgwarden.audit import TIMEOUT_EXIT_CODE, build_repo_auditor_args
+from orgwarden.batch import BatchAuditor, BatchDriver
+from tests.constants import GITHUB_PAT, ORGWARDEN_REPO
+
+REPO_AUDITOR_PYTHON_IMPORT_PATH = "orgwarden.batch.REPO_AUDITOR_PYTHON"
+
+# stands in for RepoAuditor's entry point in the driver's interpreter, the first argument picks the behavior
+FAKE_ENTRY_POINT = """
+import os, sys, time
+
+def app(args, prog_name):
+    command = args[0]
+    if command == "exit":
+        print("auditing", flush=True)
+        os.system("echo from a child")
+        sys.exit(int(args[1]))
+    if command == "pid":
+        print(os.getpid())
+    elif command == "message":
+        sys.exit("bad arguments")
+    elif command == "raise":
+        raise RuntimeError("boom")
+    elif command == "hang":
+        time.sleep(60)
+    elif command == "crash":
+        os._exit(3)
+    else:
+        print(" ".join(args))
+"""
+
+
+@pytest.fixture(autouse=True)
+def fake_repo_auditor(monkeypatch: MonkeyPatch, tmp_path: Path):
+    package = tmp_path / "RepoAuditor"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "EntryPoint.py").write_text(FAKE_ENTRY_POINT)
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    monkeypatch.setattr(REPO_AUDITOR_PYTHON_IMPORT_PATH, [sys.executable])
+
+
+class TestBatchDriver:
+    def test_keeps_results_separate(self):
+        driver = BatchDriver(batch_size=10)
+        assert driver.run(["exit", "2"], None) == (2, "auditing\nfrom a child\n")
+        assert driver.run(["exit", "0"], None) == (0, "auditing\nfrom a child\n")
+        assert driver.run(["message"], None) == (1, "bad arguments\n")
+        exit_code, output = driver.run(["raise"], None)
+        assert exit_code == 1
+        assert "RuntimeError: boom" in output
+        assert driver.alive
+        driver.close()
+        assert not driver.alive
+
+    def test_exits_after_batch_size(self):
+        driver = BatchDriver(batch_size=2)
+        _, first_pid = driver.run(["pid"], None)
+        _, second_pid = driver.run(["pid"], None)
+        assert first_pid == second_pid  # one interpreter for the whole batch
+        assert not driver.alive
+
+    def test_timeout(self):
+        driver = BatchDriver(batch_size=10)
+        assert driver.run(["hang"], 0.5) is None
+        assert not driver.alive
+
+    def test_crash(self):
+        driver = BatchDriver(batch_size=10)
+        exit_code, output = driver.run(["crash"], None)
+        assert exit_code == 1
+        assert "exited unexpectedly (exit code 3)" in output
+        assert not driver.alive
+        driver.close()
+
+
+class TestBatchAuditor:
+    def test_rejects_invalid_batch_size(self):
+        with pytest.raises(ValueError, match="batch_size must be at least 1"):
+            _ = BatchAuditor(0)
+
+    def test_audit(self):
+        with BatchAuditor(batch_size=2) as auditor:
+            results = [
+                auditor.audit(ORGWARDEN_REPO, GITHUB_PAT, None, ["GitHub"])
+                for _ in range(3)
+            ]
+        assert [result.exit_code for result in results] == [0, 0, 0]
+        assert results[0].output == (
+            " ".join(
+                build_repo_auditor_args(ORGWARDEN_REPO, GITHUB_PAT, None, ["GitHub"])
+            )
+            + "\n"
+        )
+
+    def test_replaces_drivers(self, monkeypatch: MonkeyPatch):
+        monkeypatch.setattr(
+            "orgwarden.batch.build_repo_auditor_args", lambda *args: ["pid"]
+        )
+        with BatchAuditor(batch_size=2) as auditor:
+            pids = [
+                auditor.audit(ORGWARDEN_REPO, GITHUB_PAT, None, None).output
+                for _ in range(3)
+            ]
+        assert pids[0] == pids[1] != pids[2]
+
+    def test_timeout(self, monkeypatch: MonkeyPatch):
+        monkeypatch.setattr(
+            "orgwarden.batch.build_repo_auditor_args", lambda *args: ["hang"]
+        )
+        with BatchAuditor() as auditor:
+            result = auditor.audit(ORGWARDEN_REPO, GITHUB_PAT, None, None, timeout=0.5)
+        assert result.timed_out
+        assert result.exit_code == TIMEOUT_EXIT_CODE
+
+    def test_missing_program(self, monkeypatch: MonkeyPatch):
+        monkeypatch.setattr(
+            REPO_AUDITOR_PYTHON_IMPORT_PATH, ["orgwarden-missing-program"]
+        )
+        with BatchAuditor() as auditor:
+            result = auditor.audit(ORGWARDEN_REPO, GITHUB_PAT, None, None)
+        assert result.exit_code == 127
+        assert result.output
@@ -0,0 +1,204 @@
+import json
+import subprocess
+import requests
+import pytest
+from benchmarks import fake_repo_auditor
+from benchmarks.cases import BenchmarkCase, run_case
+from benchmarks.fake_github import (
+    FAKE_HOSTNAME,
+    FakeGitHubAPI,
+    FakeGitHubConfig,
+    expected_repo_count,
+    synthetic_org_name,
+)
+from benchmarks.results import (
+    append_records,
+    compare_records,
+    load_records,
+    make_record,
+    recorded_commits,
+)
+from orgwarden.github_client import GitHubClient
+from orgwarden.rate_limit import RateLimiter, is_rate_limited
+from orgwarden.repo_crawler import (
+    CrawlerBackend,
+    fetch_org_repos,
+    fetch_repo,
+)
+
+# The fake GitHub API lets the crawler be exercised over real HTTP without network access
+
+
+@pytest.fixture(scope="module")
+def fake_api():
+    with FakeGitHubAPI(FakeGitHubConfig(page_size=30)) as server:
+        yield server
+
+
+def create_client(server: FakeGitHubAPI, **kwargs) -> GitHubClient:
+    return GitHubClient(
+        FAKE_HOSTNAME,
+        "token",
+        base_url=server.base_url,
+        rate_limiter=kwargs.pop("rate_limiter", RateLimiter()),
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("backend", list(CrawlerBackend))
+@pytest.mark.parametrize("include_all_private_repos", [False, True])
+def test_fetch_org_repos(
+    fake_api: FakeGitHubAPI, backend: CrawlerBackend, include_all_private_repos: bool
+):
+    fake_api.reset_stats()
+    with create_client(fake_api) as client:
+        repos = fetch_org_repos(
+            synthetic_org_name(250),
+            FAKE_HOSTNAME,
+            "token",
+            include_all_private_repos=include_all_private_repos,
+            client=client,
+            backend=backend,
+        )
+
+    assert len(repos) == expected_repo_count(
+        250, include_all_private_repos=include_all_private_repos
+    )
+    assert len({repo.name for repo in repos}) == len(repos)
+    assert all(repo.pushed_at for repo in repos)
+    # pages are capped at 30 repositories and forks are filtered out server-side,
+    # GraphQL also leaves out private repositories unless they are all included
+    listed = expected_repo_count(
+        250,
+        include_all_private_repos=include_all_private_repos
+        or backend == CrawlerBackend.REST,
+    )
+    assert fake_api.request_count == -(-listed // 30)
+    resource = "core" if backend == CrawlerBackend.REST else "graphql"
+    assert client.rate_limiter.remaining(resource) is not None
+
+
+def test_fetch_repo(fake_api: FakeGitHubAPI):
+    with create_client(fake_api) as client:
+        repo = fetch_repo("org-10", "repo-00003", FAKE_HOSTNAME, "token", client=client)
+    assert repo.url == f"https://{FAKE_HOSTNAME}/org-10/repo-00003"
+
+
+def test_unknown_resources(fake_api: FakeGitHubAPI):
+    with create_client(fake_api) as client:
+        assert client.get("/orgs/unknown/repos").status_code == 404
+        assert client.get("/repos/org-10/repo-00010").status_code == 404
+        assert client.get("/users/someone").status_code == 404
+        body = client.graphql("query", {"org": "unknown"}).json()
+        assert body["errors"][0]["type"] == "NOT_FOUND"
+
+
+def test_rate_limit():
+    with FakeGitHubAPI(FakeGitHubConfig(rate_limit=2)) as server:
+        url = f"{server.base_url}/repos/org-10/repo-00001"
+        assert requests.get(url).headers["X-RateLimit-Remaining"] == "1"
+        assert requests.get(url).headers["X-RateLimit-Remaining"] == "0"
+        res = requests.get(url)
+        assert res.status_code == 403
+        assert is_rate_limited(res)
+        assert server.request_count == 3
+
+        server.reset_stats()
+        assert requests.get(url).status_code == 200
+
+
+def test_stream_case(fake_api: FakeGitHubAPI):
+    case = BenchmarkCase("stream", 100, backend="graphql")
+    assert case.name == "stream[graphql]"
+    metrics = run_case(case, fake_api.base_url)
+    assert metrics["listed_repos"] == expected_repo_count(
+        100, include_all_private_repos=False
+    )
+    assert metrics["memory_growth_mb"] >= 0
+
+
+def test_fake_repo_auditor(tmp_path, monkeypatch, capsys):
+    shim = fake_repo_auditor.install(tmp_path)
+    assert shim.name == "uv"
+    assert "fake_repo_auditor.py" in shim.read_text()
+
+    monkeypatch.setenv(fake_repo_auditor.OUTPUT_LINES_ENV_VAR, "2")
+    monkeypatch.setenv(fake_repo_auditor.EXIT_CODE_ENV_VAR, "3")
+    exit_code = fake_repo_auditor.main(["run", "repo_auditor", "https://x/y/z"])
+    assert exit_code == 3
+    assert capsys.readouterr().out.splitlines()[0] == "Auditing https://x/y/z"
+
+    # the batch engine imports the fake's entry point in `uv run python`
+    res = subprocess.run(
+        [
+            shim,
+            "run",
+            "python",
+            "-c",
+            "from RepoAuditor.EntryPoint import app; app(['https://x/y/z'], 'repo_auditor')",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    assert res.returncode == 3
+    assert res.stdout.splitlines()[0] == "Auditing https://x/y/z"
+
+
+def test_results(tmp_path):
+    results_path = tmp_path / "results.jsonl"
+    config = {"latency": 0.0}
+    append_records(
+        results_path,
+        [
+            make_record(
+                "base",
+                "fetch[rest]",
+                {"repos": 100},
+                config,
+                [
+                    {"wall_time": 1.0, "peak_memory_mb": 50.0},
+                    {"wall_time": 3.0, "peak_memory_mb": 40.0},
+                    {"wall_time": 2.0, "peak_memory_mb": None},
+                ],
+            ),
+            make_record(
+                "base",
+                "fetch[graphql]",
+                {"repos": 100},
+                config,
+                [{"wall_time": 1.0, "peak_memory_mb": None}],
+            ),
+        ],
+    )
+    append_records(
+        results_path,
+        [
+            make_record(
+                "head",
+                "fetch[rest]",
+                {"repos": 100},
+                config,
+                [{"wall_time": 3.0, "peak_memory_mb": 50.0}],
+            ),
+            make_record(
+                "head",
+                "fetch[rest]",
+                {"repos": 1000},  # not recorded for base
+                config,
+                [{"wall_time": 3.0, "peak_memory_mb": 50.0}],
+            ),
+        ],
+    )
+    with results_path.open("a") as f:
+        f.write("not json\n" + json.dumps({"commit": "missing metrics"}) + "\n")
+
+    records = load_records(results_path)
+    assert len(records) == 4
+    assert records[0]["metrics"] == {"wall_time": 2.0, "peak_memory_mb": 50.0}
+    assert recorded_commits(records) == ["base", "head"]
+
+    comparisons = compare_records(records, "base", "head")
+    assert [(c.metric, c.change) for c in comparisons] == [
+        ("wall_time", 0.5),
+        ("peak_memory_mb", 0.0),
+    ]
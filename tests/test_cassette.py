@@ -0,0 +1,126 @@
+import json
+from pathlib import Path
+import pytest
+import requests
+from benchmarks.fake_github import FAKE_HOSTNAME, FakeGitHubAPI, FakeGitHubConfig
+from orgwarden.cassette import (
+    BODIES_FILE,
+    INDEX_FILE,
+    Cassette,
+    CassetteError,
+    CassetteMode,
+)
+from orgwarden.github_client import GitHubClient
+from orgwarden.rate_limit import RateLimiter
+from orgwarden.repo_crawler import CrawlerBackend, fetch_org_repos, fetch_repo
+
+TOKEN = "secret-token"
+
+
+def make_response(status_code: int, body: bytes, url: str = "url") -> requests.Response:
+    res = requests.Response()
+    res.status_code = status_code
+    res.url = url
+    res.headers["Content-Encoding"] = "gzip"
+    res.headers["X-RateLimit-Remaining"] = "10"
+    res._content = body
+    return res
+
+
+def crawl(base_url: str, cassette: Cassette, backend: CrawlerBackend) -> list:
+    with GitHubClient(
+        FAKE_HOSTNAME,
+        TOKEN,
+        base_url=base_url,
+        cassette=cassette,
+        rate_limiter=RateLimiter(),
+        max_retries=0,
+    ) as client:
+        repos = fetch_org_repos(
+            "org-450",
+            FAKE_HOSTNAME,
+            TOKEN,
+            include_all_private_repos=True,
+            client=client,
+            backend=backend,
+        )
+        repos.append(
+            fetch_repo("org-450", "repo-00001", FAKE_HOSTNAME, TOKEN, client=client)
+        )
+    return repos
+
+
+@pytest.mark.parametrize("backend", list(CrawlerBackend))
+def test_record_and_replay(tmp_path: Path, backend: CrawlerBackend):
+    with FakeGitHubAPI(FakeGitHubConfig(page_size=50)) as server:
+        base_url = server.base_url
+        with Cassette(tmp_path, CassetteMode.RECORD) as cassette:
+            recorded = crawl(base_url, cassette, backend)
+        requests_sent = server.request_count
+
+    assert requests_sent > 1
+    assert TOKEN not in (tmp_path / INDEX_FILE).read_text()
+    # bodies are compressed, a REST entry alone is about 3 KB
+    assert (tmp_path / BODIES_FILE).stat().st_size < 450 * 1024
+
+    # the server is gone, every response comes from the cassette
+    with Cassette(tmp_path, CassetteMode.REPLAY) as cassette:
+        replayed = crawl(base_url, cassette, backend)
+    assert replayed == recorded
+    assert [repo.pushed_at for repo in replayed] == [
+        repo.pushed_at for repo in recorded
+    ]
+
+
+def test_replay_order(tmp_path: Path):
+    with Cassette(tmp_path, CassetteMode.RECORD) as cassette:
+        key = cassette.key("GET", "url", {"page": 2, "per_page": 100})
+        assert key == cassette.key("GET", "url", {"per_page": 100, "page": 2})
+        assert key != cassette.key("POST", "url", body={"query": "q"})
+        cassette.record(key, make_response(403, b'{"message": "rate limit"}'))
+        cassette.record(key, make_response(200, b"[1, 2]"))
+    cassette.close()  # closing twice is a no-op
+
+    with Cassette(tmp_path, CassetteMode.REPLAY) as cassette:
+        first, second, third = (cassette.replay(key) for _ in range(3))
+        with pytest.raises(CassetteError, match="No response"):
+            _ = cassette.replay(cassette.key("GET", "other"))
+
+    assert (first.status_code, first.reason) == (403, "Forbidden")
+    assert second.json() == third.json() == [1, 2]
+    assert second.headers["x-ratelimit-remaining"] == "10"
+    assert "Content-Encoding" not in second.headers
+    assert second.from_cassette  # type: ignore[attr-defined]
+
+
+def test_rerecording_discards_previous_recording(tmp_path: Path):
+    with Cassette(tmp_path, CassetteMode.RECORD) as cassette:
+        cassette.record("old", make_response(200, b"old"))
+    cassette = Cassette(tmp_path, CassetteMode.RECORD)
+    assert not (tmp_path / INDEX_FILE).exists()
+    cassette.close()
+
+    with Cassette(tmp_path, CassetteMode.REPLAY) as cassette:
+        with pytest.raises(CassetteError):
+            _ = cassette.replay("old")
+
+
+def test_invalid_cassettes(tmp_path: Path):
+    with pytest.raises(CassetteError, match="not a readable cassette"):
+        _ = Cassette(tmp_path / "missing", CassetteMode.REPLAY)
+
+    (tmp_path / BODIES_FILE).write_bytes(b"")
+    (tmp_path / INDEX_FILE).write_text("not json")
+    with pytest.raises(CassetteError, match="not a readable cassette"):
+        _ = Cassette(tmp_path, CassetteMode.REPLAY)
+
+    (tmp_path / INDEX_FILE).write_text(json.dumps({"version": 0, "interactions": {}}))
+    with pytest.raises(CassetteError, match="unsupported version"):
+        _ = Cassette(tmp_path, CassetteMode.REPLAY)
+
+
+def test_unknown_status_reason(tmp_path: Path):
+    with Cassette(tmp_path, CassetteMode.RECORD) as cassette:
+        cassette.record("key", make_response(599, b""))
+    with Cassette(tmp_path, CassetteMode.REPLAY) as cassette:
+        assert cassette.replay("key").reason == ""
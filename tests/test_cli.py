@@ -1,13 +1,23 @@
+import json
+import subprocess
+import time
+from pathlib import Path
 from types import SimpleNamespace
 from pytest import CaptureFixture, MonkeyPatch
 import pytest
 from typer import BadParameter
 from typer.testing import CliRunner
 from orgwarden.__main__ import app, reject_empty_string
+from orgwarden.audit import TIMEOUT_EXIT_CODE, AuditEngine, AuditResult
+from orgwarden.audit_history import AuditHistory
 from orgwarden.audit_settings import RepoAuditSettings, get_audit_settings
+from orgwarden.cassette import CassetteMode
+from orgwarden.github_client import GitHubClient
+from orgwarden.repo_crawler import AuthError, CrawlerBackend
 from orgwarden.repository import Repository
 from tests.constants import (
     GITHUB_PAT,
+    ORGWARDEN_REPO,
     ORGWARDEN_URL,
     TECH_AI_KNOWN_REPOS,
     TECH_AI_ORG_NAME,
@@ -16,13 +26,29 @@ from tests.constants import (
 
 validate_url_IMPORT_PATH = "orgwarden.__main__.validate_url"
 fetch_org_repos_IMPORT_PATH = "orgwarden.__main__.fetch_org_repos"
+iter_org_repos_IMPORT_PATH = "orgwarden.__main__.iter_org_repos"
+fetch_repo_IMPORT_PATH = "orgwarden.__main__.fetch_repo"
 get_audit_settings_IMPORT_PATH = "orgwarden.__main__.get_audit_settings"
 audit_repository_IMPORT_PATH = "orgwarden.__main__.audit_repository"
-requests_get_IMPORT_PATH = "requests.get"
+capture_audit_IMPORT_PATH = "orgwarden.__main__.capture_audit"
+AuditWorkerPool_IMPORT_PATH = "orgwarden.__main__.AuditWorkerPool"
+BatchAuditor_IMPORT_PATH = "orgwarden.__main__.BatchAuditor"
+DaemonServer_IMPORT_PATH = "orgwarden.__main__.DaemonServer"
+audit_repository_async_IMPORT_PATH = "orgwarden.__main__.audit_repository_async"
+# all GitHub API traffic goes through the pooled session of a GitHubClient
+requests_get_IMPORT_PATH = "requests.Session.get"
 
 runner = CliRunner()
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(monkeypatch: MonkeyPatch, tmp_path: Path):
+    """
+    Keeps the GitHub API response cache out of the user's cache directory.
+    """
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+
 def test_reject_empty_string():
     with pytest.raises(BadParameter, match="empty string"):
         _ = reject_empty_string("")
@@ -50,7 +76,9 @@ class TestSharedFunctionality:
             monkeypatch.setattr(
                 requests_get_IMPORT_PATH,
                 lambda *args, **kwargs: SimpleNamespace(
-                    status_code=403, json=lambda: {"message": "could not authenticate"}
+                    status_code=403,
+                    headers={},
+                    json=lambda: {"message": "could not authenticate"},
                 ),
             )
             res = runner.invoke(app, [command, TECH_AI_URL, "pat"])
@@ -62,7 +90,9 @@ class TestSharedFunctionality:
             monkeypatch.setattr(
                 requests_get_IMPORT_PATH,
                 lambda *args, **kwargs: SimpleNamespace(
-                    status_code=400, json=lambda: {"message": "some general api error"}
+                    status_code=400,
+                    headers={},
+                    json=lambda: {"message": "some general api error"},
                 ),
             )
             res = runner.invoke(app, [command, TECH_AI_URL, "pat"])
@@ -97,7 +127,7 @@ class TestAuditCommand:
     ):
         REPOS = [Repository("repo_one", "url", "org")]
         SETTINGS_SEQUENCE = ["repo_one: --flag-1", "extra_repo: --flag-1 --flag-2"]
-        monkeypatch.setattr(fetch_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
         res = runner.invoke(
             app, [self.COMMAND, TECH_AI_URL, GITHUB_PAT, *SETTINGS_SEQUENCE]
         )
@@ -130,7 +160,7 @@ class TestAuditCommand:
             "repo1": "--arg-1 --arg-2",
             "repo3": "--arg-1 --arg-2 --arg-3",
         }
-        monkeypatch.setattr(fetch_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
         mock_get_audit_settings_called = False
 
         def mock_get_audit_settings(settings_sequence: list[RepoAuditSettings]):
@@ -155,7 +185,7 @@ class TestAuditCommand:
         assert res.exit_code == 0
 
     def test_modules_flag(self, monkeypatch: MonkeyPatch):
-        def mock_audit(_repo, _gh_pat, _audit_settings, modules: list[str]):
+        def mock_audit(_repo, _gh_pat, _audit_settings, modules: list[str], **kwargs):
             assert "module-1" in modules
             assert "module-2" in modules
             return 0
@@ -174,3 +204,1046 @@ class TestAuditCommand:
             ],
         )
         assert res.exit_code == 0
+
+    def test_jobs_flag(self, monkeypatch: MonkeyPatch):
+        REPOS = [Repository(f"repo{i}", f"url{i}", TECH_AI_ORG_NAME) for i in range(4)]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+
+        def mock_audit_repository(*args, **kwargs):
+            raise AssertionError("output should be buffered when running jobs > 1")
+
+        def mock_capture_audit(repo: Repository, *args, **kwargs) -> AuditResult:
+            exit_code = 3 if repo.name == "repo2" else 0
+            return AuditResult(repo, exit_code, 1.5, output=f"output for {repo.name}\n")
+
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, mock_audit_repository)
+        monkeypatch.setattr(capture_audit_IMPORT_PATH, mock_capture_audit)
+        res = runner.invoke(app, [self.COMMAND, TECH_AI_URL, GITHUB_PAT, "--jobs", "2"])
+        assert res.exit_code == 3  # max exit code across all repos
+        for repo in REPOS:
+            assert f"output for {repo.name}\n" in res.stdout
+        assert "Audit Summary" in res.stdout
+        assert f"{TECH_AI_ORG_NAME}/repo2" in res.stdout
+
+    def test_summary_lists_sequential_audits(self, monkeypatch: MonkeyPatch):
+        REPOS = [Repository("repo1", "url1", TECH_AI_ORG_NAME)]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, lambda *args, **kwargs: 1)
+        res = runner.invoke(app, [self.COMMAND, TECH_AI_URL, GITHUB_PAT])
+        assert res.exit_code == 1
+        assert "Now Auditing: url1" in res.stdout
+        assert "Audit Summary" in res.stdout
+        assert f"{TECH_AI_ORG_NAME}/repo1" in res.stdout
+
+    def test_summary_columns_line_up(self, monkeypatch: MonkeyPatch):
+        # repository names shorter than the "Repository" header
+        REPOS = [Repository("a", "url1", "o"), Repository("bc", "url2", "o")]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, lambda *args, **kwargs: 0)
+        res = runner.invoke(app, [self.COMMAND, TECH_AI_URL, GITHUB_PAT])
+        assert res.exit_code == 0
+        header, *rows = res.stdout.split("Audit Summary")[1].splitlines()[1:]
+        assert header.startswith("Repository  Exit Code  ")
+        assert [row[: len("Repository  Exit Code")] for row in rows] == [
+            "o/a         0        ",
+            "o/bc        0        ",
+        ]
+
+    def test_summary_with_no_repos(self, monkeypatch: MonkeyPatch):
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: [])
+        res = runner.invoke(app, [self.COMMAND, TECH_AI_URL, GITHUB_PAT])
+        assert res.exit_code == 0
+        assert "No repositories were audited" in res.stdout
+
+    def test_engine_flag(self, monkeypatch: MonkeyPatch):
+        REPOS = [Repository("repo1", "url1", TECH_AI_ORG_NAME)]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+
+        def mock_capture_audit(repo: Repository, *args, engine: AuditEngine, **kwargs):
+            assert engine == AuditEngine.IN_PROCESS
+            return AuditResult(repo, 0, 0.1, output="in-process output\n")
+
+        monkeypatch.setattr(capture_audit_IMPORT_PATH, mock_capture_audit)
+        res = runner.invoke(
+            app, [self.COMMAND, TECH_AI_URL, GITHUB_PAT, "--engine", "in-process"]
+        )
+        assert res.exit_code == 0
+        assert "in-process output" in res.stdout
+
+    def test_worker_pool_engine(self, monkeypatch: MonkeyPatch):
+        REPOS = [Repository(f"repo{i}", f"url{i}", TECH_AI_ORG_NAME) for i in range(3)]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        pool_settings = {}
+
+        class MockWorkerPool:
+            def __init__(self, workers: int, **kwargs):
+                pool_settings.update(workers=workers, **kwargs)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pool_settings["shut_down"] = True
+
+            def audit(self, repo: Repository, *args, **kwargs) -> AuditResult:
+                return AuditResult(repo, 0, 0.1, output=f"pooled {repo.name}\n")
+
+        monkeypatch.setattr(AuditWorkerPool_IMPORT_PATH, MockWorkerPool)
+        res = runner.invoke(
+            app,
+            [
+                self.COMMAND,
+                TECH_AI_URL,
+                GITHUB_PAT,
+                "--engine",
+                "worker-pool",
+                "--jobs",
+                "2",
+                "--max-tasks-per-worker",
+                "5",
+                "--max-worker-memory",
+                "512",
+            ],
+        )
+        assert res.exit_code == 0
+        assert pool_settings == {
+            "workers": 2,
+            "max_tasks_per_worker": 5,
+            "max_worker_memory_mb": 512,
+            "shut_down": True,
+        }
+        for repo in REPOS:
+            assert f"pooled {repo.name}" in res.stdout
+
+    def test_batch_engine(self, monkeypatch: MonkeyPatch):
+        REPOS = [Repository(f"repo{i}", f"url{i}", TECH_AI_ORG_NAME) for i in range(3)]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        batch_settings = {}
+
+        class MockBatchAuditor:
+            def __init__(self, batch_size: int):
+                batch_settings["batch_size"] = batch_size
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                batch_settings["closed"] = True
+
+            def audit(self, repo: Repository, *args, **kwargs) -> AuditResult:
+                return AuditResult(repo, 0, 0.1, output=f"batched {repo.name}\n")
+
+        monkeypatch.setattr(BatchAuditor_IMPORT_PATH, MockBatchAuditor)
+        res = runner.invoke(
+            app,
+            [
+                self.COMMAND,
+                TECH_AI_URL,
+                GITHUB_PAT,
+                "--engine",
+                "batch",
+                "--batch-size",
+                "5",
+            ],
+        )
+        assert res.exit_code == 0
+        assert batch_settings == {"batch_size": 5, "closed": True}
+        for repo in REPOS:
+            assert f"batched {repo.name}" in res.stdout
+
+    def test_handles_mid_stream_crawl_error(self, monkeypatch: MonkeyPatch):
+        REPOS = [Repository("repo1", "url1", TECH_AI_ORG_NAME)]
+
+        def mock_iter_org_repos(*args, **kwargs):
+            yield REPOS[0]
+            raise AuthError("github.com", "token expired")
+
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, mock_iter_org_repos)
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, lambda *args, **kwargs: 0)
+        res = runner.invoke(app, ["audit", TECH_AI_URL, GITHUB_PAT])
+        assert res.exit_code == 1
+        assert f"Now Auditing: {REPOS[0].url}" in res.stdout
+        assert "could not authenticate with github.com" in res.stderr
+        assert "Audit Summary" in res.stdout
+
+    def test_incremental_skips_unchanged_repos(
+        self, monkeypatch: MonkeyPatch, tmp_path: Path
+    ):
+        STATE_FILE = tmp_path / "audit-state.json"
+        repos = [
+            Repository(
+                f"repo{i}",
+                f"url{i}",
+                TECH_AI_ORG_NAME,
+                pushed_at="2025-01-01T00:00:00Z",
+                updated_at="2025-01-01T00:00:00Z",
+            )
+            for i in range(2)
+        ]
+        audited: list[str] = []
+
+        def mock_audit_repository(repo: Repository, *args, **kwargs) -> int:
+            audited.append(repo.name)
+            return 0
+
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: repos)
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, mock_audit_repository)
+        ARGS = ["audit", TECH_AI_URL, GITHUB_PAT, "--incremental"]
+        ARGS += ["--state-file", str(STATE_FILE)]
+
+        res = runner.invoke(app, ARGS)
+        assert res.exit_code == 0
+        assert audited == ["repo0", "repo1"]
+
+        # repo1 was pushed to since its last audit
+        repos[1] = Repository(
+            "repo1",
+            "url1",
+            TECH_AI_ORG_NAME,
+            pushed_at="2025-02-01T00:00:00Z",
+            updated_at="2025-01-01T00:00:00Z",
+        )
+        audited.clear()
+        res = runner.invoke(app, ARGS)
+        assert res.exit_code == 0
+        assert audited == ["repo1"]
+        assert "Unchanged Since Last Audit: url0" in res.stdout
+        assert "reused" in res.stdout
+
+        # changing the modules invalidates every fingerprint
+        audited.clear()
+        res = runner.invoke(app, [*ARGS, "--module", "GitHub"])
+        assert audited == ["repo0", "repo1"]
+
+        # a zero max age always re-audits
+        audited.clear()
+        res = runner.invoke(app, [*ARGS, "--module", "GitHub", "--max-age", "0"])
+        assert audited == ["repo0", "repo1"]
+
+    def test_incremental_single_repo(self, monkeypatch: MonkeyPatch, tmp_path: Path):
+        fetched: list[tuple[str, str]] = []
+
+        def mock_fetch_repo(org_name: str, repo_name: str, *args, **kwargs):
+            fetched.append((org_name, repo_name))
+            return Repository(
+                repo_name, "html_url", org_name, pushed_at="2025-01-01T00:00:00Z"
+            )
+
+        monkeypatch.setattr(fetch_repo_IMPORT_PATH, mock_fetch_repo)
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, lambda *args, **kwargs: 0)
+        ARGS = ["audit", ORGWARDEN_URL, GITHUB_PAT, "--incremental"]
+        ARGS += ["--state-file", str(tmp_path / "audit-state.json")]
+
+        _ = runner.invoke(app, ARGS)
+        res = runner.invoke(app, ARGS)
+        assert res.exit_code == 0
+        assert len(fetched) == 2
+        assert f"Unchanged Since Last Audit: {ORGWARDEN_URL}" in res.stdout
+
+        def mock_fetch_repo_error(*args, **kwargs):
+            raise AuthError("github.com", "Bad credentials")
+
+        monkeypatch.setattr(fetch_repo_IMPORT_PATH, mock_fetch_repo_error)
+        res = runner.invoke(app, ARGS)
+        assert res.exit_code == 1
+        assert "could not authenticate" in res.stderr
+
+        def mock_fetch_repo_general_error(*args, **kwargs):
+            raise ValueError("some error")
+
+        monkeypatch.setattr(fetch_repo_IMPORT_PATH, mock_fetch_repo_general_error)
+        res = runner.invoke(app, ARGS)
+        assert res.exit_code == 1
+        assert "some error" in res.stderr
+
+    def test_records_history(self, monkeypatch: MonkeyPatch, tmp_path: Path):
+        DB = tmp_path / "history.sqlite3"
+        REPOS = [Repository(f"repo{i}", f"url{i}", TECH_AI_ORG_NAME) for i in range(2)]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        monkeypatch.setattr(
+            audit_repository_IMPORT_PATH,
+            lambda repo, *args, **kwargs: 0 if repo.name == "repo0" else 2,
+        )
+        ARGS = ["audit", TECH_AI_URL, GITHUB_PAT, "repo1: --flag"]
+        res = runner.invoke(app, [*ARGS, "--history-db", str(DB)])
+        assert res.exit_code == 2
+
+        with AuditHistory(DB) as history:
+            recent = history.recent(10)
+            assert {(row["repo"], row["exit_code"]) for row in recent} == {
+                ("repo0", 0),
+                ("repo1", 2),
+            }
+            assert [row["repo"] for row in history.failing(0)] == ["repo1"]
+
+        res = runner.invoke(app, [*ARGS, "--history-db", str(DB), "--no-history"])
+        with AuditHistory(DB) as history:
+            assert len(history.recent(10)) == 2
+
+    def test_handles_unusable_history_db(self, tmp_path: Path):
+        NOT_A_DIRECTORY = tmp_path / "file"
+        NOT_A_DIRECTORY.write_text("")
+        res = runner.invoke(
+            app,
+            [
+                "audit",
+                ORGWARDEN_URL,
+                GITHUB_PAT,
+                "--history-db",
+                str(NOT_A_DIRECTORY / "history.sqlite3"),
+            ],
+        )
+        assert res.exit_code == 1
+
+    def test_multiple_urls(self, monkeypatch: MonkeyPatch, tmp_path: Path):
+        GHES_URL = "https://github.gatech.edu/other-org"
+        URL_FILE = tmp_path / "urls.txt"
+        URL_FILE.write_text(f"# orgs\n{GHES_URL}\n{TECH_AI_URL}\n")
+        crawled: list[tuple[str, str, str]] = []
+        clients: dict[str, GitHubClient] = {}
+
+        def mock_iter_org_repos(
+            org_name: str, hostname: str, gh_pat: str, *args, client, **kwargs
+        ):
+            crawled.append((org_name, hostname, gh_pat))
+            clients.setdefault(hostname, client)
+            assert clients[hostname] is client  # one client per host
+            yield Repository(
+                f"{org_name}_repo", f"https://{hostname}/{org_name}/repo", org_name
+            )
+
+        audited: list[tuple[str, str]] = []
+
+        def mock_audit_repository(
+            repo: Repository, gh_pat: str, *args, **kwargs
+        ) -> int:
+            audited.append((repo.url, gh_pat))
+            return 0
+
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, mock_iter_org_repos)
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, mock_audit_repository)
+        res = runner.invoke(
+            app,
+            [
+                "audit",
+                f"@{URL_FILE}",
+                GITHUB_PAT,
+                "--url",
+                ORGWARDEN_URL,
+                "--url",
+                "https://github.com/another-org",
+                "--host-pat",
+                "github.gatech.edu=ghes_pat",
+            ],
+        )
+        assert res.exit_code == 0
+        # targets are grouped by host, in the order each host first appears
+        assert crawled == [
+            ("other-org", "github.gatech.edu", "ghes_pat"),
+            (TECH_AI_ORG_NAME, "github.com", GITHUB_PAT),
+            ("another-org", "github.com", GITHUB_PAT),
+        ]
+        assert clients["github.gatech.edu"].hostname == "github.gatech.edu"
+        assert audited == [
+            ("https://github.gatech.edu/other-org/repo", "ghes_pat"),
+            (f"https://github.com/{TECH_AI_ORG_NAME}/repo", GITHUB_PAT),
+            (ORGWARDEN_URL, GITHUB_PAT),
+            ("https://github.com/another-org/repo", GITHUB_PAT),
+        ]
+
+    def test_repo_inside_org_target_is_audited_once(
+        self, monkeypatch: MonkeyPatch, tmp_path: Path
+    ):
+        ORG_URL = f"https://github.com/{TECH_AI_ORG_NAME}"
+        REPOS = [
+            Repository(f"repo{i}", f"{ORG_URL}/repo{i}", TECH_AI_ORG_NAME)
+            for i in range(3)
+        ]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        audited: list[str] = []
+
+        def mock_capture_audit(repo: Repository, *args, **kwargs) -> AuditResult:
+            audited.append(repo.url)
+            return AuditResult(repo, 0, 0.1, output="audited\n")
+
+        monkeypatch.setattr(capture_audit_IMPORT_PATH, mock_capture_audit)
+        REPORT_FILE = tmp_path / "report.ndjson"
+        res = runner.invoke(
+            app,
+            [self.COMMAND, ORG_URL, GITHUB_PAT, "--url", f"{ORG_URL}/repo1/"]
+            + ["--url", f"{ORG_URL}/"]
+            + ["--report", "ndjson", "--report-file", str(REPORT_FILE)],
+        )
+        assert res.exit_code == 0
+        assert audited == [repo.url for repo in REPOS]
+        assert res.stdout.split("Audit Summary")[1].count("/repo1") == 1
+        records = [json.loads(line) for line in REPORT_FILE.read_text().splitlines()]
+        assert [record["repo"] for record in records] == ["repo0", "repo1", "repo2"]
+
+        # a report without duplicates can be merged on its own
+        res = runner.invoke(app, ["merge", str(REPORT_FILE)])
+        assert res.exit_code == 0
+
+    def test_failed_target_does_not_stop_others(self, monkeypatch: MonkeyPatch):
+        def mock_iter_org_repos(org_name: str, hostname: str, *args, **kwargs):
+            if org_name == "broken-org":
+                raise AuthError(hostname, "Bad credentials")
+            yield Repository("repo", "url", org_name)
+
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, mock_iter_org_repos)
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, lambda *args, **kwargs: 0)
+        res = runner.invoke(
+            app,
+            [
+                "audit",
+                "https://github.com/broken-org",
+                GITHUB_PAT,
+                "--url",
+                TECH_AI_URL,
+            ],
+        )
+        assert res.exit_code == 1
+        assert "could not authenticate with github.com" in res.stderr
+        assert "Now Auditing: url" in res.stdout
+
+    def test_handles_invalid_targets(self, tmp_path: Path):
+        res = runner.invoke(
+            app, ["audit", TECH_AI_URL, GITHUB_PAT, "--url", "not a url"]
+        )
+        assert res.exit_code == 1
+        assert "not a valid URL" in res.stderr
+
+        res = runner.invoke(app, ["audit", f"@{tmp_path / 'missing.txt'}", GITHUB_PAT])
+        assert res.exit_code == 1
+
+        EMPTY_FILE = tmp_path / "empty.txt"
+        EMPTY_FILE.write_text("# nothing here\n")
+        res = runner.invoke(app, ["audit", f"@{EMPTY_FILE}", GITHUB_PAT])
+        assert res.exit_code == 1
+        assert "No urls were provided." in res.stderr
+
+        res = runner.invoke(
+            app, ["audit", TECH_AI_URL, GITHUB_PAT, "--host-pat", "github.com"]
+        )
+        assert res.exit_code != 0
+        assert "hostname=pat" in res.stderr
+
+    def test_asyncio_engine(self, monkeypatch: MonkeyPatch, tmp_path: Path):
+        REPOS = [
+            Repository(f"repo{i}", f"url{i}", TECH_AI_ORG_NAME, pushed_at="t")
+            for i in range(5)
+        ]
+        audited: list[str] = []
+
+        async def mock_audit_repository_async(
+            repo: Repository, *args, **kwargs
+        ) -> AuditResult:
+            audited.append(repo.name)
+            return AuditResult(
+                repo, 1 if repo.name == "repo3" else 0, 0.1, f"async {repo.name}\n"
+            )
+
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        monkeypatch.setattr(
+            audit_repository_async_IMPORT_PATH, mock_audit_repository_async
+        )
+        ARGS = ["audit", TECH_AI_URL, GITHUB_PAT, "--engine", "asyncio", "--jobs", "50"]
+        ARGS += ["--incremental", "--state-file", str(tmp_path / "state.json")]
+        res = runner.invoke(app, ARGS)
+        assert res.exit_code == 1
+        assert sorted(audited) == [repo.name for repo in REPOS]
+        for repo in REPOS:
+            assert f"async {repo.name}" in res.stdout
+
+        # unchanged repositories are not audited again
+        audited.clear()
+        res = runner.invoke(app, ARGS)
+        assert res.exit_code == 1
+        assert audited == []
+
+    def test_cache_flags(self, monkeypatch: MonkeyPatch, tmp_path: Path):
+        clients = []
+
+        def mock_fetch_org_repos(*args, client: GitHubClient, **kwargs):
+            clients.append(client)
+            return []
+
+        monkeypatch.setattr(fetch_org_repos_IMPORT_PATH, mock_fetch_org_repos)
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, mock_fetch_org_repos)
+        for command in ["audit", "list-repos"]:
+            clients.clear()
+            CACHE_DIR = tmp_path / command
+            _ = runner.invoke(
+                app, [command, TECH_AI_URL, GITHUB_PAT, "--cache-dir", str(CACHE_DIR)]
+            )
+            _ = runner.invoke(
+                app,
+                [
+                    command,
+                    TECH_AI_URL,
+                    GITHUB_PAT,
+                    "--cache-dir",
+                    str(CACHE_DIR),
+                    "--refresh",
+                ],
+            )
+            _ = runner.invoke(app, [command, TECH_AI_URL, GITHUB_PAT, "--no-cache"])
+
+            assert clients[0].cache.directory == CACHE_DIR
+            assert not clients[0].cache.refresh
+            assert clients[1].cache.refresh
+            assert clients[2].cache is None
+
+    def test_cassette_flags(self, monkeypatch: MonkeyPatch, tmp_path: Path):
+        clients = []
+
+        def mock_fetch_org_repos(*args, client: GitHubClient, **kwargs):
+            clients.append(client)
+            return []
+
+        monkeypatch.setattr(fetch_org_repos_IMPORT_PATH, mock_fetch_org_repos)
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, mock_fetch_org_repos)
+        for command in ["audit", "list-repos"]:
+            clients.clear()
+            CASSETTE_DIR = tmp_path / command
+            res = runner.invoke(
+                app, [command, TECH_AI_URL, GITHUB_PAT, "--record", str(CASSETTE_DIR)]
+            )
+            assert res.exit_code == 0
+            assert (CASSETTE_DIR / "index.json").exists()  # written on exit
+            res = runner.invoke(
+                app, [command, TECH_AI_URL, GITHUB_PAT, "--replay", str(CASSETTE_DIR)]
+            )
+            assert res.exit_code == 0
+            assert clients[0].cassette.mode == CassetteMode.RECORD
+            assert clients[1].cassette.replaying
+
+            res = runner.invoke(
+                app,
+                [command, TECH_AI_URL, GITHUB_PAT, "--replay", str(tmp_path / "none")],
+            )
+            assert res.exit_code == 1
+            assert "not a readable cassette" in res.stderr
+
+            res = runner.invoke(
+                app,
+                [
+                    command,
+                    TECH_AI_URL,
+                    GITHUB_PAT,
+                    "--record",
+                    str(CASSETTE_DIR),
+                    "--replay",
+                    str(CASSETTE_DIR),
+                ],
+            )
+            assert res.exit_code == 2
+            assert len(clients) == 2
+
+    def test_api_flag(self, monkeypatch: MonkeyPatch):
+        backends = []
+
+        def mock_fetch_org_repos(*args, backend: CrawlerBackend, **kwargs):
+            backends.append(backend)
+            return []
+
+        monkeypatch.setattr(fetch_org_repos_IMPORT_PATH, mock_fetch_org_repos)
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, mock_fetch_org_repos)
+        for command in ["audit", "list-repos"]:
+            res = runner.invoke(
+                app, [command, TECH_AI_URL, GITHUB_PAT, "--api", "graphql"]
+            )
+            assert res.exit_code == 0
+        assert backends == [CrawlerBackend.GRAPHQL, CrawlerBackend.GRAPHQL]
+
+    def test_report_flags(self, monkeypatch: MonkeyPatch, tmp_path: Path):
+        REPOS = [Repository(f"repo{i}", f"url{i}", TECH_AI_ORG_NAME) for i in range(3)]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+
+        def mock_audit_repository(*args, **kwargs):
+            raise AssertionError("output should be captured for the report")
+
+        def mock_capture_audit(repo: Repository, *args, **kwargs) -> AuditResult:
+            exit_code = 2 if repo.name == "repo1" else 0
+            return AuditResult(repo, exit_code, 0.5, output=f"output {repo.name}\n")
+
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, mock_audit_repository)
+        monkeypatch.setattr(capture_audit_IMPORT_PATH, mock_capture_audit)
+
+        # records on stdout replace the human-readable output
+        res = runner.invoke(
+            app,
+            [self.COMMAND, TECH_AI_URL, GITHUB_PAT, "--report", "ndjson"]
+            + ["--module", "GitHub", "--report-max-output", "6"],
+        )
+        assert res.exit_code == 2
+        records = [json.loads(line) for line in res.stdout.splitlines()]
+        assert [(r["repo"], r["exit_code"], r["output"]) for r in records] == [
+            ("repo0", 0, "output"),
+            ("repo1", 2, "output"),
+            ("repo2", 0, "output"),
+        ]
+        assert all(record["modules"] == ["GitHub"] for record in records)
+
+        REPORT_FILE = tmp_path / "report.json"
+        res = runner.invoke(
+            app,
+            [self.COMMAND, TECH_AI_URL, GITHUB_PAT, "--report", "json"]
+            + ["--report-file", str(REPORT_FILE)],
+        )
+        assert res.exit_code == 2
+        assert "Audit Summary" in res.stdout
+        assert "output repo2" in res.stdout
+        results = json.loads(REPORT_FILE.read_text())["results"]
+        assert [result["output"] for result in results] == [
+            f"output {repo.name}\n" for repo in REPOS
+        ]
+
+        res = runner.invoke(
+            app,
+            [self.COMMAND, TECH_AI_URL, GITHUB_PAT, "--report", "json"]
+            + ["--report-file", str(tmp_path)],
+        )
+        assert res.exit_code == 1
+        assert "Is a directory" in res.stderr
+
+    def test_resume_flag(self, monkeypatch: MonkeyPatch, tmp_path: Path):
+        REPOS = [Repository(f"repo{i}", f"url{i}", TECH_AI_ORG_NAME) for i in range(4)]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        audited = []
+
+        def interrupted_audit(repo: Repository, *args, **kwargs) -> int:
+            if repo.name == "repo2":
+                raise KeyboardInterrupt()
+            audited.append(repo.name)
+            return 2 if repo.name == "repo1" else 0
+
+        def mock_audit_repository(repo: Repository, *args, **kwargs) -> int:
+            audited.append(repo.name)
+            return 0
+
+        JOURNAL_FILE = tmp_path / "journal.ndjson"
+        ARGS = ["audit", TECH_AI_URL, GITHUB_PAT, "--journal", str(JOURNAL_FILE)]
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, interrupted_audit)
+        res = runner.invoke(app, ARGS + ["--module", "GitHub"])
+        assert res.exit_code == 130  # interrupted
+        assert audited == ["repo0", "repo1"]
+        assert JOURNAL_FILE.exists()
+
+        # finished repositories are skipped, and their exit codes still count
+        audited.clear()
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, mock_audit_repository)
+        res = runner.invoke(app, ARGS + ["--module", "GitHub", "--resume"])
+        assert res.exit_code == 2
+        assert audited == ["repo2", "repo3"]
+        assert "Audited Before Resuming: url1" in res.stdout
+        assert "repo1" in res.stdout.split("Audit Summary")[1]
+        assert not JOURNAL_FILE.exists()  # the run finished
+
+        # a journal of a run with other modules is not resumed
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, interrupted_audit)
+        res = runner.invoke(app, ARGS + ["--module", "GitHub"])
+        audited.clear()
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, mock_audit_repository)
+        res = runner.invoke(app, ARGS + ["--resume"])
+        assert res.exit_code == 0
+        assert audited == ["repo0", "repo1", "repo2", "repo3"]
+        assert "from a different run" in res.stderr
+
+        res = runner.invoke(app, ARGS[:3] + ["--journal", str(tmp_path)])
+        assert res.exit_code == 1
+
+    def test_timeout_flags(self, monkeypatch: MonkeyPatch, tmp_path: Path):
+        REPOS = [Repository(f"repo{i}", f"url{i}", TECH_AI_ORG_NAME) for i in range(3)]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        timeouts = []
+
+        def mock_audit_repository(repo: Repository, *args, timeout: float) -> int:
+            timeouts.append(timeout)
+            if repo.name == "repo1":
+                raise subprocess.TimeoutExpired("repo_auditor", timeout)
+            return 0
+
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, mock_audit_repository)
+        JOURNAL_FILE = tmp_path / "journal.ndjson"
+        ARGS = ["audit", TECH_AI_URL, GITHUB_PAT, "--journal", str(JOURNAL_FILE)]
+        res = runner.invoke(app, ARGS + ["--repo-timeout", "60"])
+        assert res.exit_code == TIMEOUT_EXIT_CODE
+        assert timeouts == [60, 60, 60]
+        assert "Timed Out: url1" in res.stdout
+        assert "timed out" in res.stdout.split("Audit Summary")[1]
+
+        # audits in flight are cut short by the deadline, later repositories are left for --resume
+        def slow_audit_repository(repo: Repository, *args, timeout: float) -> int:
+            timeouts.append(timeout)
+            time.sleep(timeout)
+            raise subprocess.TimeoutExpired("repo_auditor", timeout)
+
+        timeouts.clear()
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, slow_audit_repository)
+        res = runner.invoke(app, ARGS + ["--repo-timeout", "60", "--deadline", "1"])
+        assert res.exit_code == TIMEOUT_EXIT_CODE
+        assert len(timeouts) == 1 and timeouts[0] <= 1
+        assert "deadline passed" in res.stderr
+        assert JOURNAL_FILE.exists()
+
+    def test_schedule_flag(self, monkeypatch: MonkeyPatch):
+        REPOS = [Repository(f"repo{i}", f"url{i}", TECH_AI_ORG_NAME) for i in range(4)]
+        DURATIONS = {"repo0": 1.0, "repo1": 1.0, "repo2": 1.0, "repo3": 4.0}
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        with AuditHistory() as history:
+            run_id = history.start_run(TECH_AI_URL, None)
+            history.record(run_id, AuditResult(REPOS[3], 0, 240.0), None, None)
+            history.record(run_id, AuditResult(REPOS[0], 0, 60.0), None, None)
+            history.record(run_id, AuditResult(REPOS[1], 0, 30.0), None, None)
+            history.record(run_id, AuditResult(REPOS[2], 0, 10.0), None, None)
+        started = []
+
+        def mock_capture_audit(repo: Repository, *args, **kwargs) -> AuditResult:
+            started.append(repo.name)
+            return AuditResult(repo, 0, DURATIONS[repo.name], output="")
+
+        monkeypatch.setattr(capture_audit_IMPORT_PATH, mock_capture_audit)
+        res = runner.invoke(
+            app,
+            ["audit", TECH_AI_URL, GITHUB_PAT, "--jobs", "2"]
+            + ["--schedule", "longest-first"],
+        )
+        assert res.exit_code == 0
+        # the two slots start the longest audits, each in either order
+        assert {*started[:2]} == {"repo3", "repo0"}
+        assert {*started[2:]} == {"repo1", "repo2"}
+        assert (
+            "Auditing longest-first took an estimated 4.0s instead of 5.0s in listing order, saving 1.0s."
+            in res.stdout
+        )
+
+        # without history, repositories keep their listing order
+        started.clear()
+        res = runner.invoke(
+            app,
+            ["audit", TECH_AI_URL, GITHUB_PAT, "--report", "ndjson", "--no-history"]
+            + ["--schedule", "oldest-result-first"],
+        )
+        assert res.exit_code == 0
+        assert started == ["repo0", "repo1", "repo2", "repo3"]
+
+    def test_trace_flag(self, monkeypatch: MonkeyPatch, tmp_path: Path):
+        REPOS = [Repository(f"repo{i}", f"url{i}", TECH_AI_ORG_NAME) for i in range(2)]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        monkeypatch.setattr(fetch_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        monkeypatch.setattr(audit_repository_IMPORT_PATH, lambda *args, **kwargs: 0)
+
+        TRACE_FILE = tmp_path / "trace.json"
+        res = runner.invoke(
+            app,
+            ["audit", TECH_AI_URL, GITHUB_PAT, "repo0: --flag"]
+            + ["--trace", str(TRACE_FILE)],
+        )
+        assert res.exit_code == 0
+        assert "Trace Summary" in res.stderr
+        assert str(TRACE_FILE) in res.stderr
+        events = json.loads(TRACE_FILE.read_text())["traceEvents"]
+        assert {event["name"] for event in events if event.get("cat") == "audit"} == {
+            f"audit {TECH_AI_ORG_NAME}/repo0",
+            f"audit {TECH_AI_ORG_NAME}/repo1",
+        }
+        assert any(event.get("cat") == "settings" for event in events)
+
+        # tracing stops with the command
+        res = runner.invoke(app, ["list-repos", TECH_AI_URL, GITHUB_PAT])
+        assert "Trace Summary" not in res.output
+
+        res = runner.invoke(
+            app, ["list-repos", TECH_AI_URL, GITHUB_PAT, "--trace", str(tmp_path)]
+        )
+        assert res.exit_code == 0
+        assert "No spans were recorded" in res.stderr
+        assert "Could not write trace" in res.stderr
+
+    def test_trace_flag_with_report_on_stdout(
+        self, monkeypatch: MonkeyPatch, tmp_path: Path
+    ):
+        REPOS = [Repository(f"repo{i}", f"url{i}", TECH_AI_ORG_NAME) for i in range(2)]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+
+        def mock_capture_audit(repo: Repository, *args, **kwargs) -> AuditResult:
+            return AuditResult(repo, 0, 0.1, output="audited\n")
+
+        monkeypatch.setattr(capture_audit_IMPORT_PATH, mock_capture_audit)
+        res = runner.invoke(
+            app,
+            [self.COMMAND, TECH_AI_URL, GITHUB_PAT, "--report", "ndjson"]
+            + ["--trace", str(tmp_path / "trace.json")],
+        )
+        assert res.exit_code == 0
+        # every line of stdout is a record, the trace summary goes to stderr
+        records = [json.loads(line) for line in res.stdout.splitlines()]
+        assert [record["repo"] for record in records] == ["repo0", "repo1"]
+        assert "Trace Summary" in res.stderr
+
+        res = runner.invoke(
+            app,
+            [self.COMMAND, TECH_AI_URL, GITHUB_PAT, "--report", "json"]
+            + ["--trace", str(tmp_path / "trace.json")],
+        )
+        assert res.exit_code == 0
+        assert len(json.loads(res.stdout)["results"]) == 2
+
+
+class TestServeCommand:
+    COMMAND = "serve"
+
+    def test_serve(self, monkeypatch: MonkeyPatch):
+        REPOS = [
+            ORGWARDEN_REPO,
+            Repository("repo1", f"{TECH_AI_URL}/repo1", TECH_AI_ORG_NAME),
+        ]
+        monkeypatch.setattr(
+            iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: iter(REPOS)
+        )
+
+        def mock_capture_audit(repo: Repository, *args, **kwargs) -> AuditResult:
+            return AuditResult(repo, 0, 0.1, output=f"audited {repo.name}\n")
+
+        monkeypatch.setattr(capture_audit_IMPORT_PATH, mock_capture_audit)
+        server_calls = []
+
+        class MockServer:
+            def __init__(self, address, audit_daemon, secret):
+                self.audit_daemon = audit_daemon
+                self.server_address = address
+                server_calls.append(secret)
+
+            def wait_for_audits(self, count: int):
+                deadline = time.monotonic() + 10
+                while self.audit_daemon.audited < count:
+                    assert time.monotonic() < deadline
+                    time.sleep(0.01)
+
+            def serve_forever(self):
+                self.wait_for_audits(len(REPOS))  # every repository is audited on start
+                push = {
+                    "repository": {
+                        "name": "repo1",
+                        "html_url": REPOS[1].url,
+                        "private": False,
+                        "fork": False,
+                    }
+                }
+                server_calls.append(self.audit_daemon.handle_event("push", push))
+                self.wait_for_audits(len(REPOS) + 1)
+                raise KeyboardInterrupt  # Ctrl-C
+
+            def server_close(self):
+                server_calls.append("closed")
+
+        monkeypatch.setattr(DaemonServer_IMPORT_PATH, MockServer)
+        res = runner.invoke(
+            app,
+            [
+                self.COMMAND,
+                TECH_AI_URL,
+                GITHUB_PAT,
+                "--port",
+                "9000",
+                "--webhook-secret",
+                "secret",
+            ],
+        )
+        assert res.exit_code == 0
+        assert server_calls == ["secret", [REPOS[1]], "closed"]
+        assert "http://127.0.0.1:9000/webhook" in res.stdout
+        assert "http://127.0.0.1:9000/status" in res.stdout
+        assert res.stdout.count("audited OrgWarden") == 1
+        assert res.stdout.count("audited repo1") == 2
+        assert "without verifying" not in res.stderr
+        with AuditHistory() as history:
+            assert len(history.recent(10)) == 3
+
+    def test_rejected_options(self, monkeypatch: MonkeyPatch):
+        res = runner.invoke(
+            app, [self.COMMAND, TECH_AI_URL, GITHUB_PAT, "--engine", "asyncio"]
+        )
+        assert res.exit_code == 2
+        assert "not supported" in res.stderr
+
+        def mock_server(*args):
+            raise OSError("Address already in use")
+
+        monkeypatch.setattr(DaemonServer_IMPORT_PATH, mock_server)
+        res = runner.invoke(
+            app, [self.COMMAND, TECH_AI_URL, GITHUB_PAT, "--no-history"]
+        )
+        assert res.exit_code == 1
+        assert "Address already in use" in res.stderr
+
+
+class TestHistoryCommand:
+    COMMAND = "history"
+
+    def test_without_history(self, tmp_path: Path):
+        res = runner.invoke(
+            app, [self.COMMAND, "--history-db", str(tmp_path / "missing.sqlite3")]
+        )
+        assert res.exit_code == 0
+        assert "No audits have been recorded yet." in res.stdout
+
+    def test_views(self, tmp_path: Path):
+        DB = tmp_path / "history.sqlite3"
+        with AuditHistory(DB) as history:
+            run_id = history.start_run(TECH_AI_URL, None)
+            REPO_ONE = Repository("repo1", "url1", TECH_AI_ORG_NAME)
+            REPO_TWO = Repository("repo2", "url2", TECH_AI_ORG_NAME)
+            history.record(
+                run_id, AuditResult(REPO_ONE, 0, 1.5, output="all good\n"), None, None
+            )
+            history.record(run_id, AuditResult(REPO_TWO, 1, 4.0), None, None)
+            history.record(
+                run_id, AuditResult(REPO_TWO, 1, 0.0, reused=True), None, None
+            )
+
+        def invoke(*args: str) -> str:
+            res = runner.invoke(app, [self.COMMAND, *args, "--history-db", str(DB)])
+            assert res.exit_code == 0
+            return res.stdout
+
+        stdout = invoke()
+        assert "Audit History: recent" in stdout
+        assert f"{TECH_AI_ORG_NAME}/repo1" in stdout
+        assert "reused" in stdout
+
+        stdout = invoke("recent", "--repo", "repo1", "--output")
+        assert "all good" in stdout
+        assert f"{TECH_AI_ORG_NAME}/repo2" not in stdout
+        assert "No output was captured." in invoke(
+            "recent", "--repo", "repo2", "--output"
+        )
+
+        stdout = invoke("slowest")
+        assert stdout.index("repo2") < stdout.index("repo1")
+        assert "4.0s" in stdout
+        # views without captured output ignore --output
+        assert invoke("slowest", "--output") == stdout
+        assert "Output:" not in invoke("failing", "--output")
+
+        stdout = invoke("failing")
+        assert f"{TECH_AI_ORG_NAME}/repo2" in stdout
+        assert "never" in stdout
+        assert f"{TECH_AI_ORG_NAME}/repo1" not in stdout
+        assert "No matching audits were found." in invoke("failing", "--days", "3")
+
+        stdout = invoke("last-good", "--org", TECH_AI_ORG_NAME)
+        assert f"{TECH_AI_ORG_NAME}/repo1" in stdout
+        assert f"{TECH_AI_ORG_NAME}/repo2" not in stdout
+        assert "all good" in invoke("last-good", "--output")
+
+
+class TestMergeCommand:
+    COMMAND = "merge"
+
+    def run_shards(
+        self, monkeypatch: MonkeyPatch, tmp_path: Path, count: int, *extra: str
+    ) -> list[Path]:
+        REPOS = [Repository(f"repo{i}", f"url{i}", TECH_AI_ORG_NAME) for i in range(30)]
+        monkeypatch.setattr(iter_org_repos_IMPORT_PATH, lambda *args, **kwargs: REPOS)
+        monkeypatch.setattr(
+            capture_audit_IMPORT_PATH,
+            lambda repo, *args, **kwargs: AuditResult(
+                repo, 3 if repo.name == "repo7" else 0, 1.0, output="output\n"
+            ),
+        )
+        reports = []
+        for index in range(1, count + 1):
+            report = tmp_path / f"shard{index}.ndjson"
+            res = runner.invoke(
+                app,
+                ["audit", TECH_AI_URL, GITHUB_PAT, "--shard", f"{index}/{count}"]
+                + ["--report", "ndjson", "--report-file", str(report), *extra],
+            )
+            assert res.exit_code in (0, 3)
+            reports.append(report)
+        return reports
+
+    def test_shards_are_merged(self, monkeypatch: MonkeyPatch, tmp_path: Path):
+        reports = self.run_shards(monkeypatch, tmp_path, 3)
+        shard_sizes = [len(report.read_text().splitlines()) for report in reports]
+        assert sum(shard_sizes) == 30
+        assert all(size > 0 for size in shard_sizes)
+
+        MERGED = tmp_path / "merged.json"
+        res = runner.invoke(
+            app, [self.COMMAND, *map(str, reports), "--report-file", str(MERGED)]
+        )
+        assert res.exit_code == 3  # highest exit code of any repository
+        assert "Audit Summary" in res.stdout
+        results = json.loads(MERGED.read_text())["results"]
+        assert sorted(result["repo"] for result in results) == sorted(
+            f"repo{i}" for i in range(30)
+        )
+
+        # the merged report balances the next sharded run
+        reports = self.run_shards(
+            monkeypatch, tmp_path, 3, "--shard-durations", str(MERGED)
+        )
+        shard_sizes = [len(report.read_text().splitlines()) for report in reports]
+        assert shard_sizes == [10, 10, 10]
+
+        res = runner.invoke(app, [self.COMMAND, str(reports[0]), "--report", "ndjson"])
+        assert res.exit_code in (0, 3)
+        assert len(res.stdout.splitlines()) == 10  # records replace the summary
+        assert "No results from shard 2/3" in res.stderr
+
+    def test_inconsistent_shards(self, monkeypatch: MonkeyPatch, tmp_path: Path):
+        reports = self.run_shards(monkeypatch, tmp_path, 2)
+        res = runner.invoke(app, [self.COMMAND, str(reports[0]), str(reports[0])])
+        assert res.exit_code == 1
+        assert f"appears more than once in {reports[0]}" in res.stderr
+        assert "--shard-durations" not in res.stderr  # the same shard twice
+
+        other = self.run_shards(monkeypatch, tmp_path / "other", 1)
+        res = runner.invoke(app, [self.COMMAND, str(reports[0]), str(other[0])])
+        assert res.exit_code == 1
+        assert f"appears in both {reports[0]} and {other[0]}" in res.stderr
+        assert "audited by both shard 1/2 and shard 1/1" in res.stderr
+        assert "--shard-durations" in res.stderr
+
+        res = runner.invoke(app, [self.COMMAND, str(tmp_path / "missing")])
+        assert res.exit_code == 1
+        assert "not a readable report" in res.stderr
+
+        res = runner.invoke(
+            app,
+            ["audit", TECH_AI_URL, GITHUB_PAT, "--shard", "1/2"]
+            + ["--shard-durations", str(tmp_path / "missing")],
+        )
+        assert res.exit_code == 1
+        assert "not a readable report" in res.stderr
+
+    def test_different_shard_counts(self, tmp_path: Path):
+        REPORT = tmp_path / "report.ndjson"
+        records = [
+            {"shard": shard, "org": "org", "repo": repo, "url": repo}
+            | {"exit_code": 0, "duration": 1.0}
+            for shard, repo in [("1/2", "a"), ("1/3", "b")]
+        ]
+        REPORT.write_text("\n".join(json.dumps(record) for record in records))
+        res = runner.invoke(app, [self.COMMAND, str(REPORT)])
+        assert res.exit_code == 1
+        assert "different numbers of shards: 2, 3" in res.stderr
+
+    def test_duplicate_in_unsharded_report(self, tmp_path: Path):
+        REPORT = tmp_path / "report.ndjson"
+        record = {
+            "org": "org",
+            "repo": "a",
+            "url": "a",
+            "exit_code": 0,
+            "duration": 1.0,
+        }
+        REPORT.write_text(json.dumps(record) + "\n" + json.dumps(record))
+        res = runner.invoke(app, [self.COMMAND, str(REPORT)])
+        assert res.exit_code == 1
+        assert f"a appears more than once in {REPORT}." in res.stderr
+        assert "audited by both shard" not in res.stderr
+        assert "--shard-durations" not in res.stderr
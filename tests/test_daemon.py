@@ -0,0 +1,308 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+import pytest
+import requests
+from orgwarden.audit import AuditResult
+from orgwarden.daemon import (
+    MAX_WEBHOOK_BODY,
+    AuditDaemon,
+    DaemonServer,
+    TargetScope,
+    verify_signature,
+)
+from orgwarden.repository import Repository
+from orgwarden.url_tools import validate_url
+
+ORG_URL = "https://github.com/Org"
+REPO_TARGET_URL = "https://github.com/other/Tool"
+REPOS = [
+    Repository(f"repo{i}", f"https://github.com/Org/repo{i}", "Org") for i in range(3)
+]
+SECRET = "webhook-secret"
+
+
+def make_scope(**kwargs) -> TargetScope:
+    return TargetScope(
+        [(url, validate_url(url)) for url in (ORG_URL, REPO_TARGET_URL)],
+        kwargs.get("included", set()),
+        kwargs.get("include_all", False),
+    )
+
+
+def entry(name: str, org: str = "Org", **fields) -> dict:
+    return {
+        "name": name,
+        "html_url": f"https://github.com/{org}/{name}",
+        "private": False,
+        "fork": False,
+        **fields,
+    }
+
+
+def wait_for(condition, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting"
+        time.sleep(0.01)
+
+
+class Auditor:
+    """
+    Records the order repositories are audited in. Audits block until released while `gate` is clear.
+    """
+
+    def __init__(self):
+        self.audited: list[str] = []
+        self.running: set[str] = set()
+        self.overlapped = False
+        self.gate = threading.Event()
+        self.gate.set()
+        self._lock = threading.Lock()
+
+    def __call__(self, repo: Repository) -> AuditResult:
+        with self._lock:
+            self.overlapped |= repo.url in self.running
+            self.running.add(repo.url)
+        self.gate.wait()
+        with self._lock:
+            self.running.discard(repo.url)
+            self.audited.append(repo.name)
+        if repo.name == "broken":
+            raise RuntimeError("boom")
+        return AuditResult(repo, 0, 0.01, output="")
+
+
+def test_verify_signature():
+    body = b'{"zen": "hi"}'
+    signature = "sha256=" + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+    assert verify_signature(SECRET, body, signature)
+    assert not verify_signature(SECRET, body + b" ", signature)
+    assert not verify_signature("other", body, signature)
+    assert not verify_signature(SECRET, body, None)
+
+
+def test_target_scope():
+    scope = make_scope(included={"secret"})
+    # organizations match case-insensitively, and keep the target's spelling
+    assert scope.repository(entry("repo0", org="org")) == Repository(
+        "repo0", "https://github.com/org/repo0", "Org"
+    )
+    assert scope.repository(entry("secret", private=True)) is not None
+    assert scope.repository(entry("hidden", private=True)) is None
+    assert scope.repository(entry("fork", fork=True)) is None
+    assert scope.repository(entry("repo0", org="elsewhere")) is None
+    # repository targets are audited whatever their visibility, under the target's url
+    assert scope.repository(entry("tool", org="Other", private=True)) == Repository(
+        "Tool", REPO_TARGET_URL, "other"
+    )
+    assert scope.repository(entry("unlisted", org="other")) is None
+    assert scope.repository({"html_url": "https://github.com/org"}) is None
+    assert scope.repository({"name": "repo0"}) is None
+    assert scope.repository({"html_url": "https://github.com/org/repo0"}) is None
+
+    repo = make_scope().repository(entry("repo0", pushed_at=0))
+    assert repo is not None and repo.pushed_at == "1970-01-01T00:00:00Z"
+
+
+class TestAuditDaemon:
+    def test_rejects_invalid_arguments(self):
+        with pytest.raises(ValueError, match="jobs must be at least 1"):
+            _ = AuditDaemon(list, Auditor(), make_scope(), jobs=0)
+        with pytest.raises(ValueError, match="interval must be positive"):
+            _ = AuditDaemon(list, Auditor(), make_scope(), interval=0)
+
+    def test_audits_listing_and_events(self):
+        auditor = Auditor()
+        auditor.gate.clear()
+        results: list[AuditResult] = []
+        daemon = AuditDaemon(
+            lambda: REPOS, auditor, make_scope(), on_result=results.append
+        )
+        with daemon:
+            try:
+                wait_for(lambda: auditor.running == {REPOS[0].url})
+                assert daemon.inventory == {repo.url: repo for repo in REPOS}
+                assert daemon.last_refresh is not None
+                assert daemon.next_refresh is None
+
+                # queued ahead of the listing, and only once
+                push = {"repository": entry("repo2")}
+                assert daemon.handle_event("push", push) == [REPOS[2]]
+                assert daemon.handle_event("push", push) == []
+                # a repository being audited is queued again, but not audited twice at once
+                assert daemon.handle_event("push", {"repository": entry("repo0")})
+                status = daemon.status()
+                assert status["queue_depth"] == 3
+                assert status["urgent"] == 2
+                assert status["in_progress"] == [REPOS[0].url]
+                assert status["repositories"] == 3
+            finally:
+                auditor.gate.set()  # stopping waits for the audit in progress
+            wait_for(lambda: daemon.audited == 4)
+        assert auditor.audited == ["repo0", "repo2", "repo0", "repo1"]
+        assert not auditor.overlapped
+        assert len(results) == 4
+        recent = daemon.status()["recent_results"]
+        assert [record["repo"] for record in recent] == [
+            "repo1",
+            "repo0",
+            "repo2",
+            "repo0",
+        ]
+        assert recent[0]["passed"]
+
+    def test_repository_events(self):
+        daemon = AuditDaemon(list, Auditor(), make_scope())
+        daemon.inventory = {repo.url: repo for repo in REPOS}
+
+        created = daemon.handle_event(
+            "repository", {"action": "created", "repository": entry("new")}
+        )
+        assert [repo.name for repo in created] == ["new"]
+        assert "https://github.com/Org/new" in daemon.inventory
+
+        renamed = daemon.handle_event(
+            "repository",
+            {
+                "action": "renamed",
+                "repository": entry("renamed"),
+                "changes": {"repository": {"name": {"from": "repo1"}}},
+            },
+        )
+        assert [repo.name for repo in renamed] == ["renamed"]
+        assert REPOS[1].url not in daemon.inventory
+
+        assert daemon.handle_event(
+            "repository",
+            {
+                "action": "archived",
+                "repository": entry("repo2", archived=True),
+            },
+        )
+        assert REPOS[2].url in daemon.inventory
+
+        for payload in [
+            {"action": "deleted", "repository": entry("repo0")},
+            {"action": "privatized", "repository": entry("new", private=True)},
+        ]:
+            assert daemon.handle_event("repository", payload) == []
+        assert REPOS[0].url not in daemon.inventory
+        assert "https://github.com/Org/new" not in daemon.inventory
+        # the queued audits of dropped repositories are dropped too
+        assert daemon.status()["queue_depth"] == 2
+
+        # other events, repositories and malformed payloads are ignored
+        assert daemon.handle_event("issues", {"repository": entry("repo2")}) == []
+        assert daemon.handle_event("push", {"repository": entry("x", org="y")}) == []
+        assert daemon.handle_event("push", {"repository": "repo2"}) == []
+        assert daemon.handle_event("ping", {"zen": "hi"}) == []
+        assert daemon.handle_event(
+            "repository",
+            {"action": "renamed", "repository": entry("another"), "changes": None},
+        )
+
+    def test_refreshes_periodically(self):
+        listings = []
+        errors = []
+
+        def list_repos():
+            listings.append(time.monotonic())
+            if len(listings) == 2:
+                raise RuntimeError("listing failed")
+            return REPOS[:1]
+
+        auditor = Auditor()
+        with AuditDaemon(
+            list_repos, auditor, make_scope(), interval=0.05, on_error=errors.append
+        ) as daemon:
+            wait_for(lambda: len(listings) >= 3)
+        assert [str(e) for e in errors] == ["listing failed"]
+        assert daemon.inventory == {
+            REPOS[0].url: REPOS[0]
+        }  # kept over the failed listing
+        assert daemon.next_refresh is not None
+        assert "repo0" in auditor.audited
+
+    def test_keeps_working_after_errors(self):
+        broken = Repository("broken", "https://github.com/Org/broken", "Org")
+        results: list[AuditResult] = []
+        with AuditDaemon(
+            lambda: [broken, REPOS[0]],
+            Auditor(),
+            make_scope(),
+            jobs=2,
+            on_result=results.append,
+        ) as daemon:
+            wait_for(lambda: daemon.audited == 2)
+        assert sorted(result.exit_code for result in results) == [0, 1]
+        assert "boom" in next(result.output for result in results if result.exit_code)
+        assert not daemon.enqueue(REPOS[1])  # stopped
+
+
+@pytest.fixture
+def server():
+    auditor = Auditor()
+    auditor.gate.clear()  # keep events queued
+    daemon = AuditDaemon(list, auditor, make_scope())
+    server = DaemonServer(("127.0.0.1", 0), daemon, SECRET)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post_event(server: DaemonServer, event: str, body: bytes, secret: str = SECRET):
+    signature = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return requests.post(
+        f"http://127.0.0.1:{server.server_address[1]}/webhook",
+        data=body,
+        headers={"X-GitHub-Event": event, "X-Hub-Signature-256": signature},
+        timeout=10,
+    )
+
+
+class TestDaemonServer:
+    def test_webhook(self, server: DaemonServer):
+        body = json.dumps({"repository": entry("repo0")}).encode()
+        res = post_event(server, "push", body)
+        assert res.status_code == 202
+        assert res.json() == {"event": "push", "queued": [REPOS[0].url]}
+
+        res = post_event(server, "ping", b'{"zen": "hi"}')
+        assert res.status_code == 202
+        assert res.json()["queued"] == []
+
+        assert post_event(server, "push", body, secret="wrong").status_code == 401
+        res = post_event(server, "push", b"payload=%7B%7D")
+        assert res.status_code == 400
+        assert "application/json" in res.json()["error"]
+
+    def test_rejects_invalid_requests(self, server: DaemonServer):
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        assert requests.get(f"{base_url}/other", timeout=10).status_code == 404
+        assert requests.post(f"{base_url}/status", timeout=10).status_code == 404
+        res = requests.post(
+            f"{base_url}/webhook",
+            headers={"Content-Length": str(MAX_WEBHOOK_BODY + 1)},
+            timeout=10,
+        )
+        assert res.status_code == 413
+        res = requests.post(
+            f"{base_url}/webhook", headers={"Content-Length": "x"}, timeout=10
+        )
+        assert res.status_code == 400
+
+    def test_status(self, server: DaemonServer):
+        post_event(server, "push", json.dumps({"repository": entry("repo0")}).encode())
+        res = requests.get(
+            f"http://127.0.0.1:{server.server_address[1]}/status?pretty", timeout=10
+        )
+        assert res.status_code == 200
+        status = res.json()
+        assert status["queue_depth"] == 1
+        assert status["repositories"] == 1
+        assert status["recent_results"] == []
@@ -0,0 +1,242 @@
+import json
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from orgwarden.github_client import (
+    GitHubClient,
+    RETRY_STATUS_CODES,
+    api_base_url,
+    graphql_url,
+)
+from orgwarden.rate_limit import RateLimiter, shared_rate_limiter
+from tests.constants import GITHUB_HOSTNAME, GITHUB_PAT
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """
+    Responds with a 502 until `failures_remaining` reaches zero, then with a 403 until
+    `rate_limits_remaining` reaches zero, then with a JSON body.
+    The 403 is a secondary rate limit, unless `rate_limit_message` is changed.
+    """
+
+    failures_remaining = 0
+    rate_limits_remaining = 0
+    rate_limit_message = "You have exceeded a secondary rate limit."
+    requests_received: list[dict] = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.do_GET()
+
+    def do_GET(self):
+        type(self).requests_received.append(
+            {"path": self.path, "headers": dict(self.headers)}
+        )
+        if type(self).failures_remaining > 0:
+            type(self).failures_remaining -= 1
+            self.send_response(502)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if type(self).rate_limits_remaining > 0:
+            type(self).rate_limits_remaining -= 1
+            body = json.dumps({"message": type(self).rate_limit_message}).encode()
+            self.send_response(403)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        body = json.dumps({"ok": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # keep test output clean
+
+
+@pytest.fixture
+def server() -> Iterator[ThreadingHTTPServer]:
+    FlakyHandler.failures_remaining = 0
+    FlakyHandler.rate_limits_remaining = 0
+    FlakyHandler.rate_limit_message = "You have exceeded a secondary rate limit."
+    FlakyHandler.requests_received = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def server_url(httpd: ThreadingHTTPServer) -> str:
+    return f"http://127.0.0.1:{httpd.server_address[1]}"
+
+
+def test_api_base_url():
+    assert api_base_url(GITHUB_HOSTNAME) == "https://api.github.com"
+    assert api_base_url("github.gatech.edu") == "https://github.gatech.edu/api/v3"
+
+
+def test_graphql_url():
+    assert graphql_url(GITHUB_HOSTNAME) == "https://api.github.com/graphql"
+    assert graphql_url("github.gatech.edu") == "https://github.gatech.edu/api/graphql"
+    with GitHubClient(
+        "localhost", GITHUB_PAT, base_url="http://127.0.0.1:1/"
+    ) as client:
+        assert client.graphql_url == "http://127.0.0.1:1/graphql"
+
+
+def test_rejects_invalid_settings():
+    with pytest.raises(ValueError, match="pool_size"):
+        _ = GitHubClient(GITHUB_HOSTNAME, GITHUB_PAT, pool_size=0)
+    with pytest.raises(ValueError, match="max_retries"):
+        _ = GitHubClient(GITHUB_HOSTNAME, GITHUB_PAT, max_retries=-1)
+    with pytest.raises(ValueError, match="max_rate_limit_retries"):
+        _ = GitHubClient(GITHUB_HOSTNAME, GITHUB_PAT, max_rate_limit_retries=-1)
+
+
+def test_session_configuration():
+    with GitHubClient(
+        GITHUB_HOSTNAME,
+        GITHUB_PAT,
+        pool_size=4,
+        connect_timeout=1,
+        read_timeout=2,
+        max_retries=5,
+    ) as client:
+        assert client.base_url == "https://api.github.com"
+        assert client.timeout == (1, 2)
+        assert GITHUB_PAT in client.session.headers["Authorization"]
+        adapter = client.session.get_adapter(client.base_url)
+        assert adapter._pool_maxsize == 4
+        assert adapter.max_retries.total == 5
+        assert set(adapter.max_retries.status_forcelist) == RETRY_STATUS_CODES
+
+
+def test_retries_server_errors(server: ThreadingHTTPServer):
+    FlakyHandler.failures_remaining = 2
+    with GitHubClient(
+        "localhost", GITHUB_PAT, base_url=server_url(server), backoff_factor=0
+    ) as client:
+        res = client.get("/orgs/org/repos", params={"page": 1})
+
+    assert res.status_code == 200
+    assert res.json() == {"ok": True}
+    assert len(FlakyHandler.requests_received) == 3
+    assert FlakyHandler.requests_received[-1]["path"] == "/orgs/org/repos?page=1"
+    assert GITHUB_PAT in FlakyHandler.requests_received[-1]["headers"]["Authorization"]
+
+
+def test_returns_final_server_error(server: ThreadingHTTPServer):
+    FlakyHandler.failures_remaining = 10
+    with GitHubClient(
+        "localhost",
+        GITHUB_PAT,
+        base_url=server_url(server),
+        max_retries=1,
+        backoff_factor=0,
+    ) as client:
+        res = client.get("/")
+
+    assert res.status_code == 502
+    assert len(FlakyHandler.requests_received) == 2
+
+
+def test_retries_connection_errors():
+    with GitHubClient(
+        "localhost",
+        GITHUB_PAT,
+        base_url="http://127.0.0.1:1",  # nothing listens on port 1
+        max_retries=1,
+        backoff_factor=0,
+    ) as client:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            _ = client.get("/")
+
+
+def test_graphql_retries_server_errors(server: ThreadingHTTPServer):
+    FlakyHandler.failures_remaining = 1
+    with GitHubClient(
+        "localhost", GITHUB_PAT, base_url=server_url(server), backoff_factor=0
+    ) as client:
+        res = client.graphql("query { viewer { login } }")
+
+    assert res.status_code == 200
+    assert [request["path"] for request in FlakyHandler.requests_received] == [
+        "/graphql",
+        "/graphql",
+    ]
+
+
+def test_shares_rate_limiter_per_token():
+    with (
+        GitHubClient(GITHUB_HOSTNAME, GITHUB_PAT) as client_one,
+        GitHubClient(GITHUB_HOSTNAME, GITHUB_PAT) as client_two,
+        GitHubClient(GITHUB_HOSTNAME, "other_pat") as client_three,
+    ):
+        assert client_one.rate_limiter is client_two.rate_limiter
+        assert client_one.rate_limiter is shared_rate_limiter(
+            GITHUB_HOSTNAME, GITHUB_PAT
+        )
+        assert client_three.rate_limiter is not client_one.rate_limiter
+
+
+def test_waits_out_secondary_rate_limit(server: ThreadingHTTPServer):
+    FlakyHandler.rate_limits_remaining = 2
+    sleeps: list[float] = []
+    rate_limiter = RateLimiter(clock=lambda: 0.0, sleep=sleeps.append)
+    with GitHubClient(
+        "localhost", GITHUB_PAT, base_url=server_url(server), rate_limiter=rate_limiter
+    ) as client:
+        res = client.get("/")
+
+    assert res.status_code == 200
+    assert len(FlakyHandler.requests_received) == 3
+    assert sleeps == [60.0, 60.0]  # each secondary rate limit pauses for a minute
+
+
+def test_does_not_retry_auth_failures(server: ThreadingHTTPServer):
+    FlakyHandler.rate_limits_remaining = 1
+    FlakyHandler.rate_limit_message = "Resource not accessible by integration"
+    sleeps: list[float] = []
+    with GitHubClient(
+        "localhost",
+        GITHUB_PAT,
+        base_url=server_url(server),
+        rate_limiter=RateLimiter(sleep=sleeps.append),
+    ) as client:
+        res = client.get("/")
+
+    assert res.status_code == 403
+    assert len(FlakyHandler.requests_received) == 1
+    assert not sleeps
+
+
+def test_gives_up_on_long_rate_limits(server: ThreadingHTTPServer):
+    FlakyHandler.rate_limits_remaining = 10
+    with GitHubClient(
+        "localhost",
+        GITHUB_PAT,
+        base_url=server_url(server),
+        rate_limiter=RateLimiter(max_wait=1),
+    ) as client:
+        res = client.graphql("query { viewer { login } }")
+    assert res.status_code == 403
+    assert len(FlakyHandler.requests_received) == 1
+
+    FlakyHandler.requests_received.clear()
+    with GitHubClient(
+        "localhost",
+        GITHUB_PAT,
+        base_url=server_url(server),
+        rate_limiter=RateLimiter(sleep=lambda seconds: None),
+        max_rate_limit_retries=1,
+    ) as client:
+        res = client.get("/")
+    assert res.status_code == 403
+    assert len(FlakyHandler.requests_received) == 2
@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import pytest
+import requests
+from orgwarden.github_client import GitHubClient
+from orgwarden.http_cache import ResponseCache, default_cache_dir
+from tests.constants import GITHUB_PAT
+
+ETAG = '"abc123"'
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """
+    Serves a JSON list with an ETag, replying 304 to matching conditional requests.
+    """
+
+    requests_received: list[dict] = []
+
+    def do_GET(self):
+        type(self).requests_received.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.send_header("X-RateLimit-Remaining", "4999")
+            self.end_headers()
+            return
+        body = json.dumps([{"name": "repo"}]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.send_header("Link", '<http://example.com?page=1>; rel="last"')
+        self.send_header("X-RateLimit-Remaining", "5000")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url() -> Iterator[str]:
+    ETagHandler.requests_received = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ETagHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_response(body: str = "[]", **headers: str) -> requests.Response:
+    res = requests.Response()
+    res.status_code = 200
+    res.url = "https://api.github.com/orgs/org/repos?page=1"
+    res.headers.update(headers)
+    res._content = body.encode()
+    return res
+
+
+def test_default_cache_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_cache_dir() == tmp_path / "orgwarden" / "http"
+
+
+def test_keys_depend_on_token(tmp_path: Path):
+    cache = ResponseCache(tmp_path)
+    assert cache.key("url", "token 1") != cache.key("url", "token 2")
+    assert cache.key("url", "token 1") == cache.key("url", "token 1")
+
+
+def test_store_and_load(tmp_path: Path):
+    cache = ResponseCache(tmp_path)
+    key = cache.key("url", None)
+    assert cache.load(key) is None
+
+    cache.store(key, make_response(ETag=ETAG, **{"Last-Modified": "yesterday"}))
+    entry = cache.load(key)
+    assert entry is not None
+    assert cache.conditional_headers(entry) == {
+        "If-None-Match": ETAG,
+        "If-Modified-Since": "yesterday",
+    }
+
+    assert ResponseCache(tmp_path, refresh=True).load(key) is None
+
+
+def test_skips_responses_without_validators(tmp_path: Path):
+    cache = ResponseCache(tmp_path)
+    key = cache.key("url", None)
+    cache.store(key, make_response())
+    assert cache.load(key) is None
+
+
+def test_expires_entries(tmp_path: Path):
+    cache = ResponseCache(tmp_path, ttl=60)
+    key = cache.key("url", None)
+    cache.store(key, make_response(ETag=ETAG))
+    old = time.time() - 120
+    os.utime(tmp_path / f"{key}.json", (old, old))
+    assert cache.load(key) is None
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_evicts_least_recently_used(tmp_path: Path):
+    body = "x" * 1000
+    cache = ResponseCache(tmp_path, max_size=3000)
+    keys = [cache.key(f"url{i}", None) for i in range(3)]
+    for age, key in zip([30, 20, 10], keys):
+        cache.store(key, make_response(body, ETag=ETAG))
+        then = time.time() - age
+        os.utime(tmp_path / f"{key}.json", (then, then))
+
+    cache.evict()
+    assert cache.load(keys[0]) is None  # least recently used
+    assert cache.load(keys[1]) is not None
+    assert cache.load(keys[2]) is not None
+
+    old = time.time() - 2 * cache.ttl
+    os.utime(tmp_path / f"{keys[1]}.json", (old, old))
+    cache.evict()
+    assert cache.load(keys[1]) is None  # expired
+
+
+def test_scans_directory_only_when_needed(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+):
+    body = "x" * 1000
+    cache = ResponseCache(tmp_path, max_size=10_000)
+    evictions = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, "evict", lambda: evictions.append(1) or evict())
+
+    keys = [cache.key(f"url{i}", None) for i in range(20)]
+    for key in keys[:5]:
+        cache.store(key, make_response(body, ETag=ETAG))
+    cache.store(
+        keys[0], make_response(body, ETag=ETAG)
+    )  # replacing an entry adds nothing
+    assert len(evictions) == 1  # the first store learns the cache's size
+
+    # the running total notices when the cache outgrows `max_size`
+    for key in keys[5:]:
+        cache.store(key, make_response(body, ETag=ETAG))
+    # evicting down to `EVICTION_TARGET` leaves room for more stores before the next scan
+    assert 1 < len(evictions) < 8
+    assert sum(path.stat().st_size for path in tmp_path.glob("*.json")) <= 10_000
+    assert cache.load(keys[-1]) is not None
+
+
+def test_conditional_requests_through_client(server_url: str, tmp_path: Path):
+    cache = ResponseCache(tmp_path)
+    with GitHubClient(
+        "localhost", GITHUB_PAT, base_url=server_url, cache=cache
+    ) as client:
+        first = client.get("/orgs/org/repos", params={"page": 1})
+        second = client.get("/orgs/org/repos", params={"page": 1})
+
+    assert "If-None-Match" not in ETagHandler.requests_received[0]
+    assert ETagHandler.requests_received[1]["If-None-Match"] == ETAG
+    assert not getattr(first, "from_cache", False)
+    assert second.from_cache
+    assert second.status_code == 200
+    assert second.json() == first.json() == [{"name": "repo"}]
+    assert second.headers["Link"] == first.headers["Link"]
+    assert second.headers["X-RateLimit-Remaining"] == "4999"  # from the 304 reply
+
+
+def test_refresh_bypasses_cache(server_url: str, tmp_path: Path):
+    with GitHubClient(
+        "localhost", GITHUB_PAT, base_url=server_url, cache=ResponseCache(tmp_path)
+    ) as client:
+        _ = client.get("/")
+    with GitHubClient(
+        "localhost",
+        GITHUB_PAT,
+        base_url=server_url,
+        cache=ResponseCache(tmp_path, refresh=True),
+    ) as client:
+        res = client.get("/")
+
+    assert "If-None-Match" not in ETagHandler.requests_received[1]
+    assert res.status_code == 200
+    assert len(list(tmp_path.glob("*.json"))) == 1
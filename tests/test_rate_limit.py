@@ -0,0 +1,187 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from orgwarden.rate_limit import (
+    SECONDARY_RATE_LIMIT_WAIT,
+    RateLimiter,
+    is_rate_limited,
+    shared_rate_limiter,
+)
+from tests.constants import GITHUB_HOSTNAME, GITHUB_PAT
+
+
+class FakeClock:
+    """
+    A clock that only advances when `sleep` is called.
+    """
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(clock: FakeClock, **kwargs) -> RateLimiter:
+    return RateLimiter(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def rate_limit_headers(
+    limit: int, remaining: int, reset: float, resource: str = "core"
+) -> dict[str, str]:
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(reset)),
+        "X-RateLimit-Resource": resource,
+    }
+
+
+def make_response(status_code: int, headers: dict, message: str = ""):
+    return SimpleNamespace(
+        status_code=status_code, headers=headers, json=lambda: {"message": message}
+    )
+
+
+def test_is_rate_limited():
+    assert is_rate_limited(make_response(429, {}))
+    assert is_rate_limited(make_response(403, {"X-RateLimit-Remaining": "0"}))
+    assert is_rate_limited(make_response(403, {"Retry-After": "30"}))
+    assert is_rate_limited(
+        make_response(403, {}, "You have exceeded a secondary rate limit.")
+    )
+    assert not is_rate_limited(make_response(403, {}, "Bad credentials"))
+    assert not is_rate_limited(make_response(401, {}, "Requires authentication"))
+    assert not is_rate_limited(make_response(200, {"X-RateLimit-Remaining": "0"}))
+
+    def invalid_json():
+        raise ValueError
+
+    assert not is_rate_limited(
+        SimpleNamespace(status_code=403, headers={}, json=invalid_json)
+    )
+
+
+def test_rejects_invalid_settings():
+    with pytest.raises(ValueError, match="reserve"):
+        _ = RateLimiter(reserve=1)
+    with pytest.raises(ValueError, match="max_wait"):
+        _ = RateLimiter(max_wait=-1)
+
+
+def test_unknown_budget_does_not_wait():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    assert limiter.remaining() is None
+    for _ in range(100):
+        assert limiter.acquire() == 0
+    assert not clock.sleeps
+
+
+def test_spends_tokens_from_reported_budget():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    limiter.update(rate_limit_headers(5000, 4000, clock.now + 600))
+    _ = limiter.acquire()
+    _ = limiter.acquire()
+    assert limiter.remaining() == 3998
+    assert not clock.sleeps
+
+
+def test_paces_requests_near_the_limit():
+    clock = FakeClock()
+    limiter = make_limiter(clock, reserve=0.1)
+    limiter.update(rate_limit_headers(100, 5, clock.now + 50))
+    delays = [limiter.acquire() for _ in range(3)]
+    # 5 tokens over 50 seconds -> one request every 10 seconds
+    assert delays == [0, pytest.approx(10), pytest.approx(10)]
+
+
+def test_sleeps_until_reset_when_exhausted():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    reset = clock.now + 120
+    limiter.update(rate_limit_headers(5000, 0, reset))
+    assert limiter.acquire() == pytest.approx(120)
+    assert clock.now == reset
+    assert limiter.remaining() == 4999  # refilled at the reset
+
+
+def test_keeps_lowest_count_within_window():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    reset = clock.now + 600
+    limiter.update(rate_limit_headers(5000, 10, reset))
+    limiter.update(rate_limit_headers(5000, 12, reset))  # an older, slower response
+    assert limiter.remaining() == 10
+    limiter.update(rate_limit_headers(5000, 4999, reset + 3600))  # next window
+    assert limiter.remaining() == 4999
+    limiter.update({"X-RateLimit-Remaining": "not a number"})
+    assert limiter.remaining() == 4999
+
+
+def test_tracks_resources_separately():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    limiter.update(rate_limit_headers(5000, 0, clock.now + 60, resource="graphql"))
+    assert limiter.acquire("core") == 0
+    assert limiter.remaining("graphql") == 0
+    assert limiter.acquire("graphql") == pytest.approx(60)
+
+
+def test_retry_delay():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    assert limiter.retry_delay(make_response(403, {"Retry-After": "30"})) == 30
+    assert (
+        limiter.retry_delay(
+            make_response(
+                403,
+                {
+                    "X-RateLimit-Remaining": "0",
+                    "X-RateLimit-Reset": str(clock.now + 90),
+                },
+            )
+        )
+        == 90
+    )
+    assert (
+        limiter.retry_delay(make_response(403, {"Retry-After": "soon"}))
+        == SECONDARY_RATE_LIMIT_WAIT
+    )
+    assert (
+        limiter.retry_delay(make_response(403, {"X-RateLimit-Remaining": "0"}))
+        == SECONDARY_RATE_LIMIT_WAIT
+    )
+
+
+def test_pause_blocks_every_thread():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    limiter.pause(30)
+    limiter.pause(10)  # a shorter pause never shortens an existing one
+    delays: list[float] = []
+    lock = threading.Lock()
+
+    def worker():
+        delay = limiter.acquire()
+        with lock:
+            delays.append(delay)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(delays) == pytest.approx(30)
+
+
+def test_shared_rate_limiter():
+    limiter = shared_rate_limiter(GITHUB_HOSTNAME, GITHUB_PAT)
+    assert shared_rate_limiter(GITHUB_HOSTNAME, GITHUB_PAT) is limiter
+    assert shared_rate_limiter("github.gatech.edu", GITHUB_PAT) is not limiter
@@ -2,11 +2,37 @@ from subprocess import CompletedProcess
 from types import SimpleNamespace
 import pytest
 from pytest import MonkeyPatch
-from orgwarden.repo_crawler import APIError, AuthError, fetch_org_repos
+from requests import Session
+import gc
+import threading
+import time
+import weakref
+from benchmarks.fake_github import (
+    FAKE_HOSTNAME,
+    FakeGitHubAPI,
+    FakeGitHubConfig,
+    expected_repo_count,
+)
+from orgwarden.repo_crawler import (
+    APIError,
+    AuthError,
+    CrawlerBackend,
+    MAX_DIRECT_PRIVATE_REPO_FETCHES,
+    PER_PAGE,
+    RateLimitError,
+    fetch_org_repos,
+    fetch_repo,
+    iter_org_repos,
+    last_page_number,
+)
+from orgwarden.github_client import GitHubClient
+from orgwarden.rate_limit import RateLimiter
 from orgwarden.repository import Repository
 from tests.constants import TECH_AI_ORG_NAME, GITHUB_HOSTNAME, GITHUB_PAT
 
-requests_get_IMPORT_PATH = "requests.get"
+# all GitHub API traffic goes through the pooled session of a GitHubClient
+requests_get_IMPORT_PATH = "requests.Session.get"
+requests_post_IMPORT_PATH = "requests.Session.post"
 
 
 def test_missing_org():
@@ -26,13 +52,16 @@ def test_missing_hostname():
 def test_requests_get_called_correctly(monkeypatch: MonkeyPatch):
     mock_get_called = False
 
-    def mock_get(url: str, params: dict, headers: dict) -> CompletedProcess[str]:
+    def mock_get(
+        session: Session, url: str, params: dict, timeout: tuple
+    ) -> CompletedProcess[str]:
         nonlocal mock_get_called
         mock_get_called = True
-        assert params, headers
+        assert params, timeout
+        assert params["type"] == "sources"  # forks are filtered out server-side
         assert TECH_AI_ORG_NAME in url, GITHUB_HOSTNAME in url
-        assert GITHUB_PAT in headers["Authorization"]
-        return SimpleNamespace(status_code=200, json=lambda: [])  # type: ignore
+        assert GITHUB_PAT in session.headers["Authorization"]
+        return SimpleNamespace(status_code=200, headers={}, json=lambda: [])  # type: ignore
 
     monkeypatch.setattr(requests_get_IMPORT_PATH, mock_get)
     _ = fetch_org_repos(
@@ -45,18 +74,38 @@ def test_invalid_auth(monkeypatch: MonkeyPatch):
     monkeypatch.setattr(
         requests_get_IMPORT_PATH,
         lambda *args, **kwargs: SimpleNamespace(
-            status_code=401, json=lambda: {"message": "Must authenticate"}
+            status_code=401, headers={}, json=lambda: {"message": "Must authenticate"}
         ),
     )
     with pytest.raises(AuthError, match="Must authenticate"):
         _ = fetch_org_repos("org", "host", "pat", include_all_private_repos=False)
 
 
+def test_rate_limit_is_not_an_auth_error(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(
+        requests_get_IMPORT_PATH,
+        lambda *args, **kwargs: SimpleNamespace(
+            status_code=403,
+            headers={},
+            json=lambda: {"message": "You have exceeded a secondary rate limit."},
+        ),
+    )
+    # don't wait out the rate limit
+    client = GitHubClient("host", "pat", rate_limiter=RateLimiter(max_wait=0))
+    with pytest.raises(RateLimitError, match="secondary rate limit") as exc_info:
+        _ = fetch_org_repos(
+            "org", "host", "pat", include_all_private_repos=False, client=client
+        )
+    assert exc_info.value.hostname == "host"
+
+
 def test_generic_api_error(monkeypatch: MonkeyPatch):
     monkeypatch.setattr(
         requests_get_IMPORT_PATH,
         lambda *args, **kwargs: SimpleNamespace(
-            status_code=400, json=lambda: {"message": "Some general API error"}
+            status_code=400,
+            headers={},
+            json=lambda: {"message": "Some general API error"},
         ),
     )
     with pytest.raises(APIError, match="Some general API error"):
@@ -74,6 +123,7 @@ def test_invalid_json_response(monkeypatch: MonkeyPatch):
             requests_get_IMPORT_PATH,
             lambda *args, **kwargs: SimpleNamespace(
                 status_code=200,
+                headers={},
                 json=lambda: json_resp if kwargs["params"]["page"] == 1 else [],
             ),
         )
@@ -90,6 +140,9 @@ def test_api_response_parsing(monkeypatch: MonkeyPatch):
             "html_url": "url1",
             "private": False,
             "fork": False,
+            "pushed_at": "2025-01-01T00:00:00Z",
+            "updated_at": "2025-01-02T00:00:00Z",
+            "size": 2048,
         },
         {
             "name": "repo2",
@@ -113,6 +166,7 @@ def test_api_response_parsing(monkeypatch: MonkeyPatch):
         requests_get_IMPORT_PATH,
         lambda *args, **kwargs: SimpleNamespace(
             status_code=200,
+            headers={},
             json=lambda: JSON_OUTPUT if kwargs["params"]["page"] == 1 else [],
         ),
     )
@@ -121,6 +175,11 @@ def test_api_response_parsing(monkeypatch: MonkeyPatch):
     )
     for actual, expected in zip(repos, EXPECTED_REPOS):
         assert actual == expected
+    assert repos[0].pushed_at == "2025-01-01T00:00:00Z"
+    assert repos[0].updated_at == "2025-01-02T00:00:00Z"
+    assert repos[0].size == 2048
+    assert repos[1].pushed_at is None
+    assert repos[1].size is None
 
 
 def test_skips_private_forks_dotgithub(monkeypatch: MonkeyPatch):
@@ -148,6 +207,7 @@ def test_skips_private_forks_dotgithub(monkeypatch: MonkeyPatch):
         requests_get_IMPORT_PATH,
         lambda *args, **kwargs: SimpleNamespace(
             status_code=200,
+            headers={},
             json=lambda: JSON_OUTPUT if kwargs["params"]["page"] == 1 else [],
         ),
     )
@@ -174,6 +234,7 @@ def test_includes_all_private_repos(monkeypatch: MonkeyPatch):
         requests_get_IMPORT_PATH,
         lambda *args, **kwargs: SimpleNamespace(
             status_code=200,
+            headers={},
             json=lambda: JSON_OUTPUT if kwargs["params"]["page"] == 1 else [],
         ),
     )
@@ -200,6 +261,7 @@ def test_includes_specific_private_repos(monkeypatch: MonkeyPatch):
         requests_get_IMPORT_PATH,
         lambda *args, **kwargs: SimpleNamespace(
             status_code=200,
+            headers={},
             json=lambda: JSON_OUTPUT if kwargs["params"]["page"] == 1 else [],
         ),
     )
@@ -212,3 +274,450 @@ def test_includes_specific_private_repos(monkeypatch: MonkeyPatch):
     )
     assert len(repos) == 1
     assert repos[0].name == "included_repo"
+
+
+def make_repo_entries(page_num: int, count: int = PER_PAGE) -> list[dict]:
+    return [
+        {
+            "name": f"repo_{page_num}_{i}",
+            "html_url": f"url_{page_num}_{i}",
+            "private": False,
+            "fork": False,
+        }
+        for i in range(count)
+    ]
+
+
+def test_last_page_number():
+    TEST_CASES = [  # link header, expected
+        (None, None),
+        ("", None),
+        ('<https://api.github.com/orgs/org/repos?page=2>; rel="next"', None),
+        (
+            '<https://api.github.com/orgs/org/repos?page=2&per_page=100>; rel="next", '
+            '<https://api.github.com/orgs/org/repos?page=51&per_page=100>; rel="last"',
+            51,
+        ),
+        ('<https://api.github.com/orgs/org/repos?page=abc>; rel="last"', None),
+    ]
+    for link_header, expected in TEST_CASES:
+        assert last_page_number(link_header) == expected
+
+
+def test_fetches_remaining_pages_concurrently(monkeypatch: MonkeyPatch):
+    LAST_PAGE = 6
+    LINK = (
+        f'<https://api.github.com/orgs/org/repos?page=2&per_page={PER_PAGE}>; rel="next", '
+        f'<https://api.github.com/orgs/org/repos?page={LAST_PAGE}&per_page={PER_PAGE}>; rel="last"'
+    )
+    requested_pages: list[int] = []
+    in_flight = max_in_flight = 0
+    lock = threading.Lock()
+
+    def mock_get(session: Session, url: str, params: dict, timeout: tuple):
+        nonlocal in_flight, max_in_flight
+        page_num = params["page"]
+        with lock:
+            requested_pages.append(page_num)
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.05 * (LAST_PAGE - page_num))  # later pages finish first
+        with lock:
+            in_flight -= 1
+        return SimpleNamespace(
+            status_code=200,
+            headers={"Link": LINK} if page_num == 1 else {},
+            json=lambda: make_repo_entries(page_num),
+        )
+
+    monkeypatch.setattr(requests_get_IMPORT_PATH, mock_get)
+    repos = fetch_org_repos(
+        "org", "host", "pat", include_all_private_repos=False, max_concurrent_requests=3
+    )
+    assert sorted(requested_pages) == list(range(1, LAST_PAGE + 1))  # no empty page
+    assert 1 < max_in_flight <= 3
+    assert [repo.name for repo in repos] == [
+        entry["name"]
+        for page_num in range(1, LAST_PAGE + 1)
+        for entry in make_repo_entries(page_num)
+    ]
+
+
+def test_walks_pages_without_link_header(monkeypatch: MonkeyPatch):
+    requested_pages: list[int] = []
+
+    def mock_get(session: Session, url: str, params: dict, timeout: tuple):
+        page_num = params["page"]
+        requested_pages.append(page_num)
+        return SimpleNamespace(
+            status_code=200,
+            headers={},
+            json=lambda: make_repo_entries(page_num) if page_num <= 2 else [],
+        )
+
+    monkeypatch.setattr(requests_get_IMPORT_PATH, mock_get)
+    repos = fetch_org_repos("org", "host", "pat", include_all_private_repos=False)
+    assert requested_pages == [1, 2, 3]
+    assert len(repos) == 2 * PER_PAGE
+
+
+def test_walks_pages_capped_below_per_page(monkeypatch: MonkeyPatch):
+    PAGE_SIZE = 30  # e.g. a GitHub Enterprise Server with a lower `per_page` limit
+    requested_pages: list[int] = []
+
+    def mock_get(session: Session, url: str, params: dict, timeout: tuple):
+        page_num = params["page"]
+        requested_pages.append(page_num)
+        return SimpleNamespace(
+            status_code=200,
+            headers={},
+            json=lambda: (
+                make_repo_entries(page_num, count=PAGE_SIZE) if page_num <= 3 else []
+            ),
+        )
+
+    monkeypatch.setattr(requests_get_IMPORT_PATH, mock_get)
+    repos = fetch_org_repos("org", "host", "pat", include_all_private_repos=False)
+    assert requested_pages == [1, 2, 3, 4]
+    assert len(repos) == 3 * PAGE_SIZE
+
+
+def test_single_page_needs_one_request(monkeypatch: MonkeyPatch):
+    requested_pages: list[int] = []
+
+    def mock_get(session: Session, url: str, params: dict, timeout: tuple):
+        requested_pages.append(params["page"])
+        return SimpleNamespace(
+            status_code=200,
+            headers={
+                "Link": '<https://api.github.com/orgs/org/repos?page=1>; rel="last"'
+            },
+            json=lambda: make_repo_entries(1, count=5),
+        )
+
+    monkeypatch.setattr(requests_get_IMPORT_PATH, mock_get)
+    repos = fetch_org_repos("org", "host", "pat", include_all_private_repos=False)
+    assert requested_pages == [1]
+    assert len(repos) == 5
+
+
+def test_iter_org_repos_streams_pages(monkeypatch: MonkeyPatch):
+    requested_pages: list[int] = []
+
+    def mock_get(session: Session, url: str, params: dict, timeout: tuple):
+        page_num = params["page"]
+        requested_pages.append(page_num)
+        return SimpleNamespace(
+            status_code=200,
+            headers={},
+            json=lambda: make_repo_entries(page_num) if page_num <= 2 else [],
+        )
+
+    monkeypatch.setattr(requests_get_IMPORT_PATH, mock_get)
+    repos = iter_org_repos("org", "host", "pat", include_all_private_repos=False)
+    assert requested_pages == [1]  # the first page is fetched eagerly
+    first_repo = next(repos)
+    assert first_repo.name == make_repo_entries(1)[0]["name"]
+    assert requested_pages == [1]  # later pages are only fetched once needed
+    assert len(list(repos)) == 2 * PER_PAGE - 1
+    assert requested_pages == [1, 2, 3]
+
+
+class DecodedPage(list):
+    """
+    A decoded API response that can be tracked with a weak reference.
+    """
+
+
+class DecodedBody(dict):
+    """
+    A decoded GraphQL response that can be tracked with a weak reference.
+    """
+
+
+def test_iter_org_repos_releases_decoded_pages(monkeypatch: MonkeyPatch):
+    decoded: list[weakref.ref] = []
+
+    def decode(page_num: int) -> DecodedPage:
+        page = DecodedPage(make_repo_entries(page_num) if page_num <= 2 else [])
+        decoded.append(weakref.ref(page))
+        return page
+
+    monkeypatch.setattr(
+        requests_get_IMPORT_PATH,
+        lambda session, url, params, timeout: SimpleNamespace(
+            status_code=200, headers={}, json=lambda: decode(params["page"])
+        ),
+    )
+    repos = iter_org_repos("org", "host", "pat", include_all_private_repos=False)
+    _ = next(repos)
+    gc.collect()
+    # only the included repositories are kept while the consumer works through a page
+    assert [ref() for ref in decoded] == [None]
+    assert len(list(repos)) == 2 * PER_PAGE - 1
+    assert not hasattr(Repository("name", "url", "org"), "__dict__")
+
+
+def test_iter_org_repos_raises_first_page_errors_eagerly(monkeypatch: MonkeyPatch):
+    monkeypatch.setattr(
+        requests_get_IMPORT_PATH,
+        lambda *args, **kwargs: SimpleNamespace(
+            status_code=401, headers={}, json=lambda: {"message": "Must authenticate"}
+        ),
+    )
+    with pytest.raises(AuthError, match="Must authenticate"):
+        _ = iter_org_repos(
+            TECH_AI_ORG_NAME,
+            GITHUB_HOSTNAME,
+            GITHUB_PAT,
+            include_all_private_repos=False,
+        )
+
+
+def test_rejects_invalid_concurrency():
+    with pytest.raises(ValueError, match="at least 1"):
+        _ = fetch_org_repos(
+            "org",
+            "host",
+            "pat",
+            include_all_private_repos=False,
+            max_concurrent_requests=0,
+        )
+
+
+class TestGraphQLBackend:
+    PAGES = [
+        {
+            "nodes": [
+                {"name": "repo1", "url": "url1", "isPrivate": False, "isFork": False},
+                {"name": "private", "url": "url2", "isPrivate": True, "isFork": False},
+            ],
+            "pageInfo": {"hasNextPage": True, "endCursor": "cursor1"},
+        },
+        {
+            "nodes": [
+                {
+                    "name": "repo3",
+                    "url": "url3",
+                    "isPrivate": False,
+                    "isFork": False,
+                    "pushedAt": "2025-01-01T00:00:00Z",
+                    "updatedAt": "2025-01-02T00:00:00Z",
+                    "diskUsage": 2048,
+                },
+                {"name": ".github", "url": "url4", "isPrivate": False, "isFork": False},
+            ],
+            "pageInfo": {"hasNextPage": False, "endCursor": "cursor2"},
+        },
+    ]
+
+    def fetch(self, monkeypatch: MonkeyPatch, mock_post, **kwargs) -> list[Repository]:
+        monkeypatch.setattr(requests_post_IMPORT_PATH, mock_post)
+        monkeypatch.setattr(
+            requests_get_IMPORT_PATH,
+            lambda *args, **kwargs: pytest.fail("REST API should not be used"),
+        )
+        return fetch_org_repos(
+            TECH_AI_ORG_NAME,
+            GITHUB_HOSTNAME,
+            GITHUB_PAT,
+            backend=CrawlerBackend.GRAPHQL,
+            **{"include_all_private_repos": False, **kwargs},
+        )
+
+    def test_paginates_with_cursor(self, monkeypatch: MonkeyPatch):
+        cursors = []
+
+        def mock_post(session: Session, url: str, json: dict, timeout: tuple):
+            assert url == "https://api.github.com/graphql"
+            assert GITHUB_PAT in session.headers["Authorization"]
+            assert "isFork: false" in json["query"]
+            assert json["variables"]["org"] == TECH_AI_ORG_NAME
+            cursors.append(json["variables"]["cursor"])
+            page = self.PAGES[len(cursors) - 1]
+            return SimpleNamespace(
+                status_code=200,
+                headers={},
+                json=lambda: {"data": {"organization": {"repositories": page}}},
+            )
+
+        repos = self.fetch(monkeypatch, mock_post)
+        assert cursors == [None, "cursor1"]
+        assert repos == [
+            Repository("repo1", "url1", TECH_AI_ORG_NAME),
+            Repository("repo3", "url3", TECH_AI_ORG_NAME),
+        ]
+        assert repos[1].pushed_at == "2025-01-01T00:00:00Z"
+        assert repos[1].updated_at == "2025-01-02T00:00:00Z"
+        assert repos[1].size == 2048
+
+        cursors.clear()
+        repos = self.fetch(monkeypatch, mock_post, include_all_private_repos=True)
+        assert [repo.name for repo in repos] == ["repo1", "private", "repo3"]
+
+    def test_filters_private_repos_server_side(self, monkeypatch: MonkeyPatch):
+        privacy = []
+
+        def mock_post(session: Session, url: str, json: dict, timeout: tuple):
+            privacy.append(json["variables"]["privacy"])
+            return SimpleNamespace(
+                status_code=200,
+                headers={},
+                json=lambda: {
+                    "data": {"organization": {"repositories": self.PAGES[1]}}
+                },
+            )
+
+        _ = self.fetch(monkeypatch, mock_post)
+        _ = self.fetch(monkeypatch, mock_post, include_all_private_repos=True)
+        # too many named private repositories to fetch one by one, they are listed instead
+        many = {f"private{i}" for i in range(MAX_DIRECT_PRIVATE_REPO_FETCHES + 1)}
+        _ = self.fetch(monkeypatch, mock_post, specific_included_private_repos=many)
+        assert privacy == ["PUBLIC", None, None]
+
+    def test_fetches_named_private_repos_directly(self):
+        NAMED = {
+            "repo-00006",  # private
+            "repo-00013",  # private
+            "repo-00001",  # public, listed already
+            "repo-00069",  # private fork
+            "repo-99999",  # does not exist
+        }
+        with (
+            FakeGitHubAPI(FakeGitHubConfig(page_size=50)) as server,
+            GitHubClient(
+                FAKE_HOSTNAME,
+                GITHUB_PAT,
+                base_url=server.base_url,
+                rate_limiter=RateLimiter(),
+            ) as client,
+        ):
+            repos = fetch_org_repos(
+                "org-100",
+                FAKE_HOSTNAME,
+                GITHUB_PAT,
+                NAMED,
+                include_all_private_repos=False,
+                client=client,
+                backend=CrawlerBackend.GRAPHQL,
+            )
+            requests_sent = server.request_count
+
+        public = expected_repo_count(100, include_all_private_repos=False)
+        assert [repo.name for repo in repos[public:]] == ["repo-00006", "repo-00013"]
+        assert len({repo.name for repo in repos}) == len(repos) == public + 2
+        assert requests_sent == -(-public // 50) + len(NAMED)
+
+    def test_releases_decoded_pages(self, monkeypatch: MonkeyPatch):
+        decoded: list[weakref.ref] = []
+
+        def mock_post(session: Session, url: str, json: dict, timeout: tuple):
+            page = self.PAGES[len(decoded)]
+            body = DecodedBody(data={"organization": {"repositories": page}})
+            decoded.append(weakref.ref(body))
+            return SimpleNamespace(status_code=200, headers={}, json=lambda: body)
+
+        monkeypatch.setattr(requests_post_IMPORT_PATH, mock_post)
+        repos = iter_org_repos(
+            TECH_AI_ORG_NAME,
+            GITHUB_HOSTNAME,
+            GITHUB_PAT,
+            include_all_private_repos=False,
+            backend=CrawlerBackend.GRAPHQL,
+        )
+        assert next(repos).name == "repo1"
+        gc.collect()
+        assert [ref() for ref in decoded] == [None]
+
+    def test_errors(self, monkeypatch: MonkeyPatch):
+        def respond(status_code: int, body):
+            return lambda *args, **kwargs: SimpleNamespace(
+                status_code=status_code, headers={}, json=lambda: body
+            )
+
+        with pytest.raises(AuthError):
+            _ = self.fetch(monkeypatch, respond(401, {"message": "Bad credentials"}))
+        with pytest.raises(APIError, match="Error fetching repos"):
+            _ = self.fetch(monkeypatch, respond(502, {"message": "Bad gateway"}))
+        with pytest.raises(APIError, match="Could not resolve"):
+            _ = self.fetch(
+                monkeypatch,
+                respond(200, {"errors": [{"message": "Could not resolve org"}]}),
+            )
+
+        INVALID_BODIES = [
+            [],
+            {"data": None},
+            {
+                "data": {
+                    "organization": {
+                        "repositories": {
+                            "nodes": {},
+                            "pageInfo": {"hasNextPage": False, "endCursor": None},
+                        }
+                    }
+                }
+            },
+            {
+                "data": {
+                    "organization": {
+                        "repositories": {
+                            "nodes": [{"name": "no url"}],
+                            "pageInfo": {"hasNextPage": False, "endCursor": None},
+                        }
+                    }
+                }
+            },
+        ]
+        for body in INVALID_BODIES:
+            with pytest.raises(APIError, match="expected JSON schema"):
+                _ = self.fetch(monkeypatch, respond(200, body))
+
+
+def test_fetch_repo(monkeypatch: MonkeyPatch):
+    requested_urls: list[str] = []
+
+    def mock_get(session: Session, url: str, params: dict | None, timeout: tuple):
+        requested_urls.append(url)
+        return SimpleNamespace(
+            status_code=200,
+            headers={},
+            json=lambda: {
+                "name": "repo",
+                "html_url": "https://github.com/org/repo",
+                "pushed_at": "2025-01-01T00:00:00Z",
+                "updated_at": "2025-01-02T00:00:00Z",
+            },
+        )
+
+    monkeypatch.setattr(requests_get_IMPORT_PATH, mock_get)
+    repo = fetch_repo("org", "repo", GITHUB_HOSTNAME, GITHUB_PAT)
+    assert requested_urls == ["https://api.github.com/repos/org/repo"]
+    assert repo == Repository("repo", "https://github.com/org/repo", "org")
+    assert repo.pushed_at == "2025-01-01T00:00:00Z"
+    assert repo.updated_at == "2025-01-02T00:00:00Z"
+
+
+def test_fetch_repo_errors(monkeypatch: MonkeyPatch):
+    with pytest.raises(ValueError, match="empty string"):
+        _ = fetch_repo("", "repo", GITHUB_HOSTNAME, GITHUB_PAT)
+    with pytest.raises(ValueError, match="empty string"):
+        _ = fetch_repo("org", "", GITHUB_HOSTNAME, GITHUB_PAT)
+
+    monkeypatch.setattr(
+        requests_get_IMPORT_PATH,
+        lambda *args, **kwargs: SimpleNamespace(
+            status_code=404, headers={}, json=lambda: {"message": "Not Found"}
+        ),
+    )
+    with pytest.raises(APIError, match="Error fetching org/repo"):
+        _ = fetch_repo("org", "repo", GITHUB_HOSTNAME, GITHUB_PAT)
+
+    monkeypatch.setattr(
+        requests_get_IMPORT_PATH,
+        lambda *args, **kwargs: SimpleNamespace(
+            status_code=200, headers={}, json=lambda: []
+        ),
+    )
+    with pytest.raises(APIError, match="JSON schema"):
+        _ = fetch_repo("org", "repo", GITHUB_HOSTNAME, GITHUB_PAT)
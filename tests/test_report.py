@@ -0,0 +1,109 @@
+import json
+from pathlib import Path
+import pytest
+from pytest import CaptureFixture
+from orgwarden.audit import KNOWN_MODULES, AuditResult
+from orgwarden.report import (
+    REPORT_SCHEMA_VERSION,
+    ReportError,
+    ReportFormat,
+    ReportWriter,
+    read_report,
+    report_record,
+    result_from_record,
+)
+from orgwarden.repository import Repository
+
+REPO = Repository("repo", "https://github.com/org/repo", "org")
+
+
+def test_report_record():
+    record = report_record(AuditResult(REPO, 2, 1.23456, "x" * 10), ["GitHub"], 4)
+    assert record.pop("finished_at").endswith("+00:00")
+    assert record == {
+        "schema_version": REPORT_SCHEMA_VERSION,
+        "shard": None,
+        "org": "org",
+        "repo": "repo",
+        "url": "https://github.com/org/repo",
+        "modules": ["GitHub"],
+        "exit_code": 2,
+        "passed": False,
+        "duration": 1.235,
+        "reused": False,
+        "timed_out": False,
+        "output": "xxxx",
+        "output_truncated": True,
+    }
+
+    record = report_record(AuditResult(REPO, 0, 1.0, reused=True), None, 4)
+    assert record["modules"] == KNOWN_MODULES
+    assert record["passed"] and record["reused"]
+    assert record["output"] is None and not record["output_truncated"]
+
+
+def test_ndjson_report(tmp_path: Path):
+    path = tmp_path / "reports" / "report.ndjson"
+    with ReportWriter(path, ReportFormat.NDJSON) as report:
+        report.write(AuditResult(REPO, 0, 1.0, "first\n"), None)
+        # records are flushed as they are written
+        assert json.loads(path.read_text())["output"] == "first\n"
+        report.write(AuditResult(REPO, 1, 1.0, "second\n"), None)
+    report.close()  # closing twice is a no-op
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [record["exit_code"] for record in records] == [0, 1]
+
+
+@pytest.mark.parametrize("count", [0, 1, 3])
+def test_json_report(capsys: CaptureFixture, count: int):
+    with ReportWriter(None, ReportFormat.JSON, max_output=0) as report:
+        for exit_code in range(count):
+            report.write(AuditResult(REPO, exit_code, 1.0, "output"), ["GitHub"])
+
+    document = json.loads(capsys.readouterr().out)
+    assert document["schema_version"] == REPORT_SCHEMA_VERSION
+    assert [record["exit_code"] for record in document["results"]] == list(range(count))
+    assert all(record["output"] == "" for record in document["results"])
+
+
+def test_rejects_negative_max_output():
+    with pytest.raises(ValueError, match="cannot be negative"):
+        _ = ReportWriter(None, ReportFormat.NDJSON, max_output=-1)
+
+
+@pytest.mark.parametrize("report_format", list(ReportFormat))
+def test_read_report(tmp_path: Path, report_format: ReportFormat):
+    path = tmp_path / "report"
+    with ReportWriter(path, report_format) as report:
+        report.write(AuditResult(REPO, 0, 1.0, "output"), None, shard="1/2")
+        report.write(AuditResult(REPO, 3, 2.0, reused=True), None, shard="1/2")
+        report.write(AuditResult(REPO, 124, 9.0, timed_out=True), None, shard="1/2")
+
+    records = list(read_report(path))
+    assert [record["shard"] for record in records] == ["1/2"] * 3
+    assert [result_from_record(record) for record in records] == [
+        AuditResult(REPO, 0, 1.0, "output"),
+        AuditResult(REPO, 3, 2.0, reused=True),
+        AuditResult(REPO, 124, 9.0, timed_out=True),
+    ]
+
+    path.write_text("")
+    assert list(read_report(path)) == []
+    # a JSON document on a single line, as reformatted by another tool
+    path.write_text(json.dumps({"results": records}))
+    assert list(read_report(path)) == records
+
+
+def test_read_report_errors(tmp_path: Path):
+    with pytest.raises(ReportError, match="not a readable report"):
+        _ = list(read_report(tmp_path / "missing"))
+    path = tmp_path / "report"
+    path.write_text('{"repo": "repo"}\nnot json\n')
+    with pytest.raises(ReportError, match="not a readable report"):
+        _ = list(read_report(path))
+    path.write_text('{"results": {}}')
+    with pytest.raises(ReportError, match="not an array"):
+        _ = list(read_report(path))
+    with pytest.raises(ReportError, match="Malformed"):
+        _ = result_from_record({"repo": "repo"})
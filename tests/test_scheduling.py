@@ -0,0 +1,75 @@
+import pytest
+from orgwarden.repository import Repository
+from orgwarden.scheduling import (
+    DEFAULT_SECONDS_PER_KB,
+    DurationEstimator,
+    RepoStats,
+    SchedulePolicy,
+    schedule,
+    simulate_wall_time,
+    stats_from_history,
+)
+
+
+def repo(name: str, size: int | None = None) -> Repository:
+    return Repository(name, f"url-{name}", "Org", size=size)
+
+
+def test_stats_from_history():
+    rows = [
+        {"org": "Org", "repo": "Repo", "average_duration": 2.0, "last_audited": 5.0}
+    ]
+    assert stats_from_history(rows) == {"org/repo": RepoStats(2.0, 5.0)}
+
+
+class TestDurationEstimator:
+    def test_prefers_history(self):
+        estimator = DurationEstimator({"org/a": RepoStats(30.0, None)}, [])
+        assert estimator.estimate(repo("a", size=1)) == 30.0
+
+    def test_scales_size_by_audited_repos(self):
+        REPOS = [repo("a", size=1000), repo("b", size=3000), repo("c", size=500)]
+        stats = {"org/a": RepoStats(10.0, None), "org/b": RepoStats(20.0, None)}
+        estimator = DurationEstimator(stats, REPOS)
+        assert estimator.seconds_per_kb == 30.0 / 4000
+        assert estimator.estimate(REPOS[2]) == 500 * 30.0 / 4000
+
+    def test_defaults(self):
+        REPOS = [repo("a", size=1000), repo("b"), repo("c", size=3000)]
+        estimator = DurationEstimator({}, REPOS)
+        assert estimator.seconds_per_kb == DEFAULT_SECONDS_PER_KB
+        assert estimator.estimate(REPOS[1]) is None
+        # repositories nothing is known about are expected to take a typical time
+        assert estimator.estimates(REPOS) == [1.0, 2.0, 3.0]
+        assert DurationEstimator({}, []).estimates([repo("a")]) == [0.0]
+
+
+class TestSchedule:
+    REPOS = [repo("a", size=10), repo("b", size=5000), repo("c"), repo("d", size=100)]
+    STATS = {
+        "org/a": RepoStats(60.0, 300.0),
+        "org/c": RepoStats(None, 100.0),
+        "org/d": RepoStats(5.0, 200.0),
+    }
+
+    def test_listing(self):
+        assert schedule(self.REPOS, SchedulePolicy.LISTING, self.STATS) == self.REPOS
+
+    def test_longest_first(self):
+        order = schedule(self.REPOS, SchedulePolicy.LONGEST_FIRST, self.STATS)
+        # b's size at a and d's rate of 65s per 110KB makes it the longest
+        assert [r.name for r in order] == ["b", "a", "c", "d"]
+
+    def test_oldest_result_first(self):
+        order = schedule(self.REPOS, SchedulePolicy.OLDEST_RESULT_FIRST, self.STATS)
+        assert [r.name for r in order] == ["b", "c", "d", "a"]
+
+
+def test_simulate_wall_time():
+    # a long audit started last leaves the other slot idle
+    assert simulate_wall_time([1, 1, 1, 1, 4], 2) == 6
+    assert simulate_wall_time([4, 1, 1, 1, 1], 2) == 4
+    assert simulate_wall_time([4, 1, 1], 1) == 6
+    assert simulate_wall_time([], 3) == 0
+    with pytest.raises(ValueError, match="jobs must be at least 1"):
+        _ = simulate_wall_time([1], 0)
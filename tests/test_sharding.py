@@ -0,0 +1,69 @@
+import pytest
+from typer import BadParameter
+from orgwarden.repository import Repository
+from orgwarden.sharding import (
+    Shard,
+    ShardPlan,
+    durations_from_records,
+    hash_shard,
+    parse_shard,
+    repo_key,
+)
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == Shard(2, 4)
+    assert str(Shard(2, 4)) == "2/4"
+    for value in ["0/4", "5/4", "1/0", "a/b", "3", ""]:
+        with pytest.raises(BadParameter):
+            _ = parse_shard(value)
+
+
+def test_hash_shard_is_balanced_for_clustered_names():
+    COUNT = 4
+    keys = [repo_key("org", f"service-{i:04d}") for i in range(2000)]
+    sizes = [0] * COUNT
+    for key in keys:
+        sizes[hash_shard(key, COUNT) - 1] += 1
+    assert all(abs(size - 500) < 75 for size in sizes)
+    # the assignment is stable and case-insensitive
+    assert hash_shard(repo_key("Org", "Service-0001"), COUNT) == hash_shard(
+        keys[1], COUNT
+    )
+
+
+def test_shard_plan_balances_durations():
+    durations = {repo_key("org", f"repo{i}"): float(i) for i in range(1, 41)}
+    durations[repo_key("org", "huge")] = 400.0
+    plan = ShardPlan(3, durations)
+    loads = [0.0] * 3
+    for key, duration in durations.items():
+        org, _, name = key.partition("/")
+        loads[plan.shard_of(Repository(name, "url", org)) - 1] += duration
+    # the huge repository is topped up with the smallest ones, the rest is split evenly
+    assert max(loads) - min(loads) <= 1
+
+    # the plan only depends on its inputs, not on the order durations were read in
+    reordered = ShardPlan(3, dict(reversed(list(durations.items()))))
+    repos = [Repository(f"repo{i}", "url", "org") for i in range(1, 60)]
+    assert [plan.shard_of(repo) for repo in repos] == [
+        reordered.shard_of(repo) for repo in repos
+    ]
+    # repositories without a known duration are hashed
+    new_repo = Repository("new", "url", "org")
+    assert plan.shard_of(new_repo) == hash_shard(repo_key("org", "new"), 3)
+
+
+def test_shard_plan_rejects_invalid_count():
+    with pytest.raises(ValueError, match="at least 1"):
+        _ = ShardPlan(0)
+
+
+def test_durations_from_records():
+    records = [
+        {"org": "org", "repo": "a", "duration": 1.0},
+        {"org": "org", "repo": "A", "duration": 2.0},
+        {"org": "org", "repo": "b"},
+        {"org": "org", "repo": "c", "duration": "slow"},
+    ]
+    assert durations_from_records(records) == {"org/a": 2.0}
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+from pathlib import Path
+import pytest
+from benchmarks.fake_github import FAKE_HOSTNAME, FakeGitHubAPI, FakeGitHubConfig
+from orgwarden import tracing
+from orgwarden.audit_settings import RepoAuditSettings, get_audit_settings
+from orgwarden.github_client import GitHubClient
+from orgwarden.rate_limit import RateLimiter
+from orgwarden.repo_crawler import CrawlerBackend, fetch_org_repos
+from orgwarden.tracing import PhaseSummary, Tracer
+
+
+@pytest.fixture
+def tracer():
+    tracer = tracing.start_tracing()
+    yield tracer
+    tracing.stop_tracing()
+
+
+def test_spans_are_free_when_tracing_is_off():
+    assert tracing.active_tracer() is None
+    assert tracing.span("a", "api") is tracing.span("b", "audit")
+    with tracing.span("a", "api"):
+        pass
+
+
+def test_span(tracer: Tracer):
+    assert tracing.active_tracer() is tracer
+    with tracing.span("GET /orgs/x/repos", "api", page=1):
+        pass
+    with pytest.raises(ValueError), tracing.span("failing", "api"):
+        raise ValueError()
+
+    first, second = tracer.events
+    assert first["name"] == "GET /orgs/x/repos"
+    assert first["cat"] == "api"
+    assert first["ph"] == "X"
+    assert first["args"] == {"page": 1}
+    assert first["tid"] == threading.get_ident()
+    assert 0 <= first["ts"] <= second["ts"]
+    assert "args" not in second  # spans are recorded even if their block raises
+
+
+def test_tasks_and_threads_get_their_own_track(tracer: Tracer):
+    async def audit(name: str):
+        with tracing.span(name, "audit"):
+            await asyncio.sleep(0.01)
+
+    async def audit_all():
+        await asyncio.gather(audit("one"), audit("two"))
+
+    def fetch():
+        with tracing.span("thread", "api"):
+            pass
+
+    asyncio.run(audit_all())
+    thread = threading.Thread(target=fetch)
+    thread.start()
+    thread.join()
+    with tracing.span("main", "api"):
+        pass
+
+    tracks = {event["name"]: event["tid"] for event in tracer.events}
+    assert len(set(tracks.values())) == 4
+    assert tracks["main"] == threading.get_ident()
+
+
+def test_summary_and_write(tmp_path: Path):
+    tracer = Tracer()
+    start = tracer.start
+    tracer.add_span("GET 1", "api", start, start + 1.0)
+    tracer.add_span("audit", "audit", start, start + 4.0, engine="subprocess")
+    tracer.add_span("GET 2", "api", start + 1.0, start + 3.0)
+
+    assert tracer.summary() == [
+        PhaseSummary("api", 2, 3.0, 2.0),
+        PhaseSummary("audit", 1, 4.0, 4.0),
+    ]
+
+    path = tmp_path / "nested" / "trace.json"
+    tracer.write(path)
+    trace = json.loads(path.read_text())
+    assert trace["displayTimeUnit"] == "ms"
+    metadata, *events = trace["traceEvents"]
+    assert metadata["ph"] == "M"
+    assert [event["dur"] for event in events] == [1e6, 4e6, 2e6]
+    assert events[2]["ts"] == 1e6
+
+
+def test_get_audit_settings_is_traced(tracer: Tracer):
+    _ = get_audit_settings([RepoAuditSettings("repo", "--flag")])
+    (event,) = tracer.events
+    assert event["cat"] == "settings"
+    assert event["args"] == {"entries": 1}
+
+
+@pytest.mark.parametrize("backend", list(CrawlerBackend))
+def test_api_requests_are_traced(tracer: Tracer, backend: CrawlerBackend):
+    with FakeGitHubAPI(FakeGitHubConfig(page_size=50)) as server:
+        with GitHubClient(
+            FAKE_HOSTNAME,
+            "token",
+            base_url=server.base_url,
+            rate_limiter=RateLimiter(),
+            max_retries=0,
+        ) as client:
+            repos = fetch_org_repos(
+                "org-120",
+                FAKE_HOSTNAME,
+                "token",
+                include_all_private_repos=True,
+                client=client,
+                backend=backend,
+            )
+
+    phases = {phase.phase: phase for phase in tracer.summary()}
+    assert phases["api"].count == server.request_count
+    assert phases["decode"].count == phases["filter"].count == server.request_count
+    requests_sent = [e for e in tracer.events if e["cat"] == "api"]
+    assert requests_sent[0]["name"] in ("GET /orgs/org-120/repos", "POST graphql")
+    assert requests_sent[0]["args"] == {"attempt": 0}
+    assert repos
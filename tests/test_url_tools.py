@@ -1,5 +1,6 @@
+from pathlib import Path
 import pytest
-from orgwarden.url_tools import validate_url
+from orgwarden.url_tools import group_urls_by_hostname, read_url_file, validate_url
 
 
 def test_invalid_urls():
@@ -48,3 +49,38 @@ def test_repo_urls():
         assert parsed_url.hostname == hostname
         assert parsed_url.org_name == org
         assert parsed_url.repo_name == repo
+
+
+def test_read_url_file(tmp_path: Path):
+    URL_FILE = tmp_path / "urls.txt"
+    URL_FILE.write_text(
+        "# our organizations\n"
+        "https://github.com/gt-tech-ai\n"
+        "\n"
+        "  https://github.gatech.edu/gt-tech-ai/OrgWarden  \n"
+    )
+    assert read_url_file(URL_FILE) == [
+        "https://github.com/gt-tech-ai",
+        "https://github.gatech.edu/gt-tech-ai/OrgWarden",
+    ]
+
+
+def test_group_urls_by_hostname():
+    groups = group_urls_by_hostname(
+        [
+            "https://github.com/org_one",
+            "https://github.gatech.edu/org_two",
+            "https://github.com/org_three/repo",
+            "https://github.com/org_one",  # duplicate
+            "https://github.com/org_three/repo/",  # duplicate with a trailing slash
+        ]
+    )
+    assert list(groups) == ["github.com", "github.gatech.edu"]
+    assert [url for url, _ in groups["github.com"]] == [
+        "https://github.com/org_one",
+        "https://github.com/org_three/repo",
+    ]
+    assert groups["github.com"][1][1].repo_name == "repo"
+    assert group_urls_by_hostname([]) == {}
+    with pytest.raises(ValueError, match="not a valid URL"):
+        _ = group_urls_by_hostname(["https://github.com/org", "not a url"])
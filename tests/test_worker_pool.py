@@ -0,0 +1,191 @@
+import os
+import queue
+import time
+from pathlib import Path
+from types import SimpleNamespace
+import pytest
+from orgwarden.audit import TIMEOUT_EXIT_CODE, build_repo_auditor_args
+from orgwarden.worker_pool import AuditWorkerPool, _worker_main, peak_memory_mb
+from tests.constants import GITHUB_PAT, ORGWARDEN_REPO
+
+# Worker processes are spawned, so fake runners must be importable module-level functions
+
+
+def echo_runner(args: list[str]) -> tuple[int, str]:
+    return int(args[0]), str(os.getpid())
+
+
+def crashing_runner(args: list[str]) -> tuple[int, str]:
+    if args[0] == "crash":
+        os._exit(3)
+    return 0, str(os.getpid())
+
+
+def hanging_runner(args: list[str]) -> tuple[int, str]:
+    if args[0] != "ok":
+        time.sleep(60)
+    return 0, str(os.getpid())
+
+
+def args_runner(args: list[str]) -> tuple[int, str]:
+    return 0, " ".join(args)
+
+
+def touching_runner(args: list[str]) -> tuple[int, str]:
+    time.sleep(float(args[0]))
+    Path(args[1]).touch()
+    return 0, str(os.getpid())
+
+
+def test_rejects_invalid_settings():
+    with pytest.raises(ValueError, match="workers must be at least 1"):
+        _ = AuditWorkerPool(0)
+    with pytest.raises(ValueError, match="max_tasks_per_worker must be at least 1"):
+        _ = AuditWorkerPool(1, max_tasks_per_worker=0)
+
+
+def test_submit_requires_running_pool():
+    pool = AuditWorkerPool(1, runner=echo_runner, initializer=None)
+    with pytest.raises(RuntimeError, match="not running"):
+        _ = pool.submit(["0"])
+
+
+def test_workers_are_reused():
+    with AuditWorkerPool(2, runner=echo_runner, initializer=None) as pool:
+        pool.start()  # starting twice is a no-op
+        futures = [pool.submit([str(i)]) for i in range(6)]
+        results = [future.result(timeout=30) for future in futures]
+
+    assert [exit_code for exit_code, _ in results] == list(range(6))
+    assert len({pid for _, pid in results}) <= 2  # no new processes per task
+    assert pool.recycled_workers == 0
+    pool.shutdown()  # shutting down twice is a no-op
+
+
+def test_recycles_after_max_tasks():
+    with AuditWorkerPool(
+        1, max_tasks_per_worker=2, runner=echo_runner, initializer=None
+    ) as pool:
+        results = [pool.submit(["0"]).result(timeout=30) for _ in range(5)]
+
+    pids = [pid for _, pid in results]
+    assert pids[0] == pids[1] and pids[2] == pids[3]
+    assert len(set(pids)) == 3
+    assert pool.recycled_workers == 2
+
+
+def test_recycles_after_memory_ceiling():
+    assert peak_memory_mb() > 1
+    with AuditWorkerPool(
+        1, max_worker_memory_mb=1, runner=echo_runner, initializer=None
+    ) as pool:
+        results = [pool.submit(["0"]).result(timeout=30) for _ in range(3)]
+
+    assert len({pid for _, pid in results}) == 3  # every worker exceeds 1 MB
+
+
+def test_replaces_crashed_workers():
+    with AuditWorkerPool(1, runner=crashing_runner, initializer=None) as pool:
+        exit_code, output = pool.submit(["crash"]).result(timeout=30)
+        assert exit_code == 1
+        assert "exited unexpectedly" in output
+
+        exit_code, _ = pool.submit(["ok"]).result(timeout=30)
+        assert exit_code == 0
+
+
+def test_kills_workers_that_time_out():
+    with AuditWorkerPool(1, runner=hanging_runner, initializer=None) as pool:
+        _, pid = pool.submit(["ok"]).result(timeout=30)
+        result = pool.audit(ORGWARDEN_REPO, GITHUB_PAT, None, None, timeout=0.5)
+        assert result.timed_out
+        assert result.exit_code == TIMEOUT_EXIT_CODE
+        assert result.duration < 30
+
+        # the killed worker is replaced
+        exit_code, replacement_pid = pool.submit(["ok"]).result(timeout=30)
+        assert exit_code == 0
+        assert replacement_pid != pid
+
+
+def test_abandoned_tasks_never_run(tmp_path: Path):
+    with AuditWorkerPool(1, runner=touching_runner, initializer=None) as pool:
+        running = pool.submit(["1", str(tmp_path / "running")])
+        waiting = pool.submit(["0", str(tmp_path / "waiting")])
+        assert pool._kill_task(waiting)
+        assert running.result(timeout=30)[0] == 0
+        assert pool.submit(["0", str(tmp_path / "later")]).result(timeout=30)[0] == 0
+
+    assert not waiting.done()
+    assert not (tmp_path / "waiting").exists()
+    assert (tmp_path / "later").exists()
+    assert not pool._kill_task(running)  # already finished
+
+
+def test_shutdown_skips_waiting_tasks(tmp_path: Path):
+    pool = AuditWorkerPool(1, runner=touching_runner, initializer=None)
+    pool.start()
+    running = pool.submit(["1", str(tmp_path / "running")])
+    waiting = [pool.submit(["0", str(tmp_path / f"waiting{i}")]) for i in range(3)]
+    pool.shutdown()
+
+    assert running.result(timeout=30)[0] == 0
+    for future in waiting:
+        exit_code, output = future.result(timeout=30)
+        assert exit_code == 1
+        assert "shut down before this audit ran" in output
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["running"]
+
+
+def test_audit_builds_repo_auditor_args():
+    with AuditWorkerPool(1, runner=args_runner, initializer=None) as pool:
+        result = pool.audit(ORGWARDEN_REPO, GITHUB_PAT, None, None)
+
+    assert result.repo == ORGWARDEN_REPO
+    assert result.exit_code == 0
+    assert result.output == " ".join(
+        build_repo_auditor_args(ORGWARDEN_REPO, GITHUB_PAT, None, None)
+    )
+
+
+class TestWorkerMain:
+    """
+    Runs the worker loop in the current process so its behavior is visible to coverage.
+    """
+
+    def run_worker(self, tasks: list, **kwargs) -> list:
+        task_queue, result_queue = queue.Queue(), queue.Queue()
+        for task in tasks:
+            task_queue.put(task)
+        current_task = SimpleNamespace(value=-1)
+        initialized = []
+        _worker_main(
+            task_queue,
+            result_queue,
+            current_task,
+            echo_runner,
+            lambda: initialized.append(True),
+            kwargs.get("max_tasks"),
+            kwargs.get("max_memory_mb"),
+        )
+        assert initialized == [True]
+        assert current_task.value == -1
+        return [result_queue.get_nowait() for _ in range(result_queue.qsize())]
+
+    def test_stops_at_sentinel(self):
+        results = self.run_worker([(0, ["2"]), (1, ["0"]), None, (2, ["0"])])
+        assert [(task_id, exit_code) for _, task_id, exit_code, _, _ in results] == [
+            (0, 2),
+            (1, 0),
+        ]
+        assert not any(recycle for *_, recycle in results)
+
+    def test_stops_at_task_limit(self):
+        results = self.run_worker([(0, ["0"]), (1, ["0"]), (2, ["0"])], max_tasks=2)
+        assert len(results) == 2
+        assert results[-1][-1]  # recycle flag
+
+    def test_stops_at_memory_limit(self):
+        results = self.run_worker([(0, ["0"]), (1, ["0"])], max_memory_mb=1)
+        assert len(results) == 1
+        assert results[-1][-1]